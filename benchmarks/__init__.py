@@ -0,0 +1,8 @@
+"""
+Offline benchmarks for the INA orchestrator.
+
+Run from the project root, e.g.:
+
+    python -m benchmarks.session_codec_bench
+    python -m benchmarks.load_test
+"""
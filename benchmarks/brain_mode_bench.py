@@ -0,0 +1,193 @@
+"""
+Strategy Engine mode benchmark — remote HTTP call vs embedded make_decision.
+
+Runs the same MAKE_OFFER decisions through brain_client.call_brain in both
+STRATEGY_ENGINE_MODEs and reports, per mode:
+
+    - latency of one call (sequential)          p50 / p95 / p99
+    - throughput with --concurrency callers     decisions/s
+    - decisions that differ from the other mode (must be 0)
+
+Remote mode needs a strategy engine over HTTP. By default the load-test
+stubs are started with --real-strategy (the real strategy_core behind a
+local uvicorn, zero added latency), so the difference measured is the
+network hop + JSON + validation + retry/breaker plumbing. Point --url at a
+running strategy-engine container to measure the real deployment instead
+(export INTERNAL_SERVICE_KEY for it).
+
+Usage (from project root):
+    python -m benchmarks.brain_mode_bench
+    python -m benchmarks.brain_mode_bench --calls 5000 --concurrency 50 --json
+    INTERNAL_SERVICE_KEY=... python -m benchmarks.brain_mode_bench --url http://localhost:8001
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_test.driver import _summary_ms, build_negotiation
+from benchmarks.load_test.stubs import fake_nlu
+from orchestrator.lib import brain_client, http_pool
+
+
+def build_calls(count: int, seed: int) -> list:
+    """call_brain kwargs for `count` MAKE_OFFER turns from scripted negotiations."""
+    rng = random.Random(seed)
+    calls = []
+    while len(calls) < count:
+        plan = build_negotiation(rng)
+        session_id = f"bench-brain-{len(calls)}"
+        history = []
+        for message in plan["messages"][1:-1]:
+            offer = fake_nlu(message)["entities"]["PRICE"]
+            calls.append(
+                {
+                    "mam": plan["session"]["mam"],
+                    "asking_price": plan["session"]["asking_price"],
+                    "user_offer": offer,
+                    "user_intent": "MAKE_OFFER",
+                    "user_sentiment": rng.choice(["neutral", "positive", "negative"]),
+                    "session_id": session_id,
+                    "history": list(history),
+                }
+            )
+            history.append({"from": "user", "text": message, "user_offer": offer})
+            history.append(
+                {
+                    "from": "ina",
+                    "text": "Counter",
+                    "brain_action": "COUNTER",
+                    "bot_offer": plan["session"]["asking_price"] * 0.95,
+                }
+            )
+    return calls[:count]
+
+
+async def run_mode(mode: str, calls: list, concurrency: int) -> dict:
+    brain_client.STRATEGY_ENGINE_MODE = mode
+
+    # Sequential: latency of one decision
+    decisions, latencies = [], []
+    for kwargs in calls:
+        started = time.perf_counter()
+        decisions.append(await brain_client.call_brain(**kwargs))
+        latencies.append(time.perf_counter() - started)
+
+    # Concurrent: throughput
+    queue = list(calls)
+
+    async def caller():
+        while queue:
+            await brain_client.call_brain(**queue.pop())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "calls": len(calls),
+        "fallbacks": sum(1 for d in decisions if d.get("is_fallback")),
+        "latency": _summary_ms(latencies),
+        "throughput_per_s": len(calls) / wall if wall else 0.0,
+        "decisions": decisions,
+    }
+
+
+async def run(args) -> dict:
+    calls = build_calls(args.calls, args.seed)
+    try:
+        if brain_client.load_strategy_engine() is None:
+            raise SystemExit("strategy engine not importable — see STRATEGY_ENGINE_PATH")
+        results = [
+            await run_mode(mode, calls, args.concurrency)
+            for mode in ("remote", "embedded")
+        ]
+    finally:
+        await http_pool.close_http_client()
+
+    remote, embedded = (r.pop("decisions") for r in results)
+    mismatches = [
+        {"input": kwargs, "remote": r, "embedded": e}
+        for kwargs, r, e in zip(calls, remote, embedded)
+        if r != e
+    ]
+    return {"results": results, "mismatches": mismatches}
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"stubs exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"stubs not healthy at {url}")
+
+
+def _print_table(report: dict):
+    header = f"{'mode':<10} {'calls':>6} {'fb':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'dec/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in report["results"]:
+        lat = row["latency"]
+        print(
+            f"{row['mode']:<10} {row['calls']:>6} {row['fallbacks']:>4} "
+            f"{lat['p50_ms']:>8.3f} {lat['p95_ms']:>8.3f} {lat['p99_ms']:>8.3f} "
+            f"{row['throughput_per_s']:>9.0f}"
+        )
+    print(f"decisions differing between modes: {len(report['mismatches'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="existing strategy engine (skip spawning stubs)")
+    parser.add_argument("--stub-port", type=int, default=9101)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    proc = None
+    url = args.url
+    try:
+        if not url:
+            url = f"http://127.0.0.1:{args.stub_port}"
+            proc = subprocess.Popen(
+                [
+                    sys.executable, "-m", "benchmarks.load_test.stubs",
+                    "--port", str(args.stub_port),
+                    "--brain-latency", "fixed:0",
+                    "--real-strategy",
+                ]
+            )
+            _wait_healthy(f"{url}/health", proc)
+        brain_client.STRATEGY_ENGINE_URL = url
+        report = asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(report)
+    if report["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Graph executor benchmark — LangGraph StateGraph vs the native executor.
+
+Three parts, all offline (no services, no Redis):
+
+    equivalence   runs the real node functions through both executors over
+                  scripted negotiations (driver.build_negotiation) plus an
+                  INVALID input, with the downstream services answered by an
+                  in-process httpx.MockTransport (the load-test stub rules),
+                  and checks both return exactly the same state. Exits 1 on
+                  any difference.
+    overhead      per-turn executor cost with no-op nodes (same topology,
+                  same routing), i.e. what the executor itself adds per turn.
+                  Also reported with the real nodes + mock transport.
+    import        cold import time of langgraph.graph vs
+                  orchestrator.graph.native (fresh interpreter per sample).
+
+Usage (from project root):
+    python -m benchmarks.graph_executor_bench
+    python -m benchmarks.graph_executor_bench --turns 20000 --import-samples 10
+    python -m benchmarks.graph_executor_bench --only equivalence
+    python -m benchmarks.graph_executor_bench --json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_test.driver import build_negotiation
+from benchmarks.load_test.stubs import fake_decision, fake_nlu, fake_phrase
+from orchestrator.graph import workflow
+from orchestrator.lib import http_pool
+
+EXECUTORS = ("langgraph", "native")
+
+_INVALID_TEXT = "asdkj qwe zzz"
+
+
+# ---------------------- Mock services ----------------------
+def _mock_services(request: httpx.Request) -> httpx.Response:
+    payload = json.loads(request.content)
+    path = request.url.path
+    if path == "/api/v1/parse":
+        if payload["text"] == _INVALID_TEXT:
+            body = {
+                "intent": "INVALID",
+                "entities": {"PRICE": None},
+                "sentiment": "neutral",
+                "language": "other",
+                "error_message": "Please send a message about the product.",
+            }
+        else:
+            body = fake_nlu(payload["text"])
+    elif path == "/api/v1/decide":
+        body = fake_decision(payload)
+    elif path == "/api/v1/phrase":
+        body = fake_phrase(payload)
+    else:
+        return httpx.Response(404)
+    return httpx.Response(200, json=body)
+
+
+def _use_mock_services():
+    http_pool._client = httpx.AsyncClient(transport=httpx.MockTransport(_mock_services))
+
+
+def _cases(negotiations: int, seed: int) -> list:
+    rng = random.Random(seed)
+    cases = []
+    for i in range(negotiations):
+        plan = build_negotiation(rng)
+        history = []
+        for message in plan["messages"]:
+            cases.append(
+                {
+                    "session_id": f"bench-graph-{i}",
+                    "request_id": f"bench-{len(cases)}",
+                    "mam": plan["session"]["mam"],
+                    "asking_price": plan["session"]["asking_price"],
+                    "user_input": message,
+                    "history": list(history),
+                }
+            )
+            history.append({"from": "user", "text": message})
+    cases.append({**cases[0], "user_input": _INVALID_TEXT, "request_id": "bench-invalid"})
+    return cases
+
+
+# ---------------------- Equivalence ----------------------
+async def check_equivalence(negotiations: int, seed: int) -> dict:
+    graphs = {name: workflow.build_workflow(name) for name in EXECUTORS}
+    mismatches = []
+    routes = {}
+    cases = _cases(negotiations, seed)
+    for case in cases:
+        results = {
+            name: await graph.ainvoke(dict(case)) for name, graph in graphs.items()
+        }
+        if results["langgraph"] != results["native"]:
+            mismatches.append({"input": case["user_input"], **results})
+        route = workflow.route_after_nlu(results["native"])
+        routes[route] = routes.get(route, 0) + 1
+    return {"cases": len(cases), "mismatches": mismatches, "routes": routes}
+
+
+# ---------------------- Overhead ----------------------
+def _noop_nodes() -> dict:
+    async def nlu(state):
+        text = state["user_input"]
+        state["intent"] = "MAKE_OFFER" if any(c.isdigit() for c in text) else "GREET"
+        state["is_fallback"] = False
+        return state
+
+    async def brain(state):
+        state["brain_action"] = "COUNTER"
+        state["counter_price"] = 1.0
+        return state
+
+    async def fast_track(state):
+        state["brain_action"] = "GREETING"
+        return state
+
+    async def mouth(state):
+        state["final_response"] = "ok"
+        return state
+
+    return {"nlu": nlu, "brain": brain, "fast_track": fast_track, "mouth": mouth}
+
+
+async def _time_turns(graph, cases: list, turns: int) -> list:
+    samples = []
+    for i in range(turns):
+        case = cases[i % len(cases)]
+        started = time.perf_counter()
+        await graph.ainvoke(dict(case))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _summary_us(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+    }
+
+
+async def measure_overhead(turns: int, seed: int) -> list:
+    cases = _cases(20, seed)
+    rows = []
+    for label, nodes, n in (
+        ("noop_nodes", _noop_nodes(), turns),
+        ("mock_services", None, max(1, turns // 20)),
+    ):
+        builders = {
+            "langgraph": workflow.build_langgraph_workflow,
+            "native": workflow.build_native_workflow,
+        }
+        for name, build in builders.items():
+            graph = build(nodes)
+            await _time_turns(graph, cases, min(n, 200))  # warm-up
+            rows.append(
+                {
+                    "nodes": label,
+                    "executor": name,
+                    "turns": n,
+                    **_summary_us(await _time_turns(graph, cases, n)),
+                }
+            )
+    return rows
+
+
+# ---------------------- Import time ----------------------
+def measure_import(samples: int) -> list:
+    rows = []
+    for name, module in (
+        ("langgraph", "langgraph.graph"),
+        ("native", "orchestrator.graph.native"),
+    ):
+        code = (
+            "import time; t = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - t)"
+        )
+        times = [
+            float(subprocess.check_output([sys.executable, "-c", code], text=True))
+            for _ in range(samples)
+        ]
+        rows.append(
+            {
+                "executor": name,
+                "module": module,
+                "samples": samples,
+                "median_ms": statistics.median(times) * 1000,
+            }
+        )
+    return rows
+
+
+# ---------------------- Main ----------------------
+async def run(args) -> dict:
+    results = {}
+    _use_mock_services()
+    try:
+        if args.only in (None, "equivalence"):
+            results["equivalence"] = await check_equivalence(args.negotiations, args.seed)
+        if args.only in (None, "overhead"):
+            results["overhead"] = await measure_overhead(args.turns, args.seed)
+    finally:
+        await http_pool.close_http_client()
+    if args.only in (None, "import"):
+        results["import"] = measure_import(args.import_samples)
+    return results
+
+
+def _print_report(results: dict):
+    if "equivalence" in results:
+        eq = results["equivalence"]
+        status = "OK" if not eq["mismatches"] else f"{len(eq['mismatches'])} MISMATCHES"
+        print(f"equivalence: {eq['cases']} turns, {status}  routes={eq['routes']}")
+        for mismatch in eq["mismatches"][:5]:
+            print(f"  {mismatch['input']!r}")
+            print(f"    langgraph: {mismatch['langgraph']}")
+            print(f"    native:    {mismatch['native']}")
+    if "overhead" in results:
+        header = f"{'nodes':<14} {'executor':<10} {'turns':>7} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}"
+        print()
+        print(header)
+        print("-" * len(header))
+        for row in results["overhead"]:
+            print(
+                f"{row['nodes']:<14} {row['executor']:<10} {row['turns']:>7} "
+                f"{row['mean_us']:>9.1f} {row['p50_us']:>9.1f} {row['p99_us']:>9.1f}"
+            )
+    if "import" in results:
+        print()
+        for row in results["import"]:
+            print(
+                f"import {row['module']:<28} median {row['median_ms']:>7.1f} ms "
+                f"({row['samples']} cold starts)"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--only", choices=["equivalence", "overhead", "import"])
+    parser.add_argument(
+        "--negotiations", type=int, default=50, help="scripted negotiations to compare"
+    )
+    parser.add_argument("--turns", type=int, default=5000, help="timed turns per executor")
+    parser.add_argument("--import-samples", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        _print_report(results)
+    if results.get("equivalence", {}).get("mismatches"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Offline load-test harness: stub services + multi-turn negotiation driver.
+
+    python -m benchmarks.load_test --help
+
+See __main__.py (runner), stubs.py (service stand-ins) and driver.py.
+"""
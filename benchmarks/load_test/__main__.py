@@ -0,0 +1,215 @@
+"""
+Offline multi-turn load test — no Groq/OpenAI, no real services.
+
+Starts (unless pointed at existing ones):
+    - a local redis-server on --redis-port          (--redis-url to reuse one)
+    - the stub services from stubs.py on --stub-port
+    - the orchestrator (uvicorn, --workers) on --port, wired to the stubs
+then runs the driver and prints a summary table, or the full report with
+--json / --out so runs can be diffed.
+
+Usage (from project root; needs redis-server on PATH unless --redis-url):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --negotiations 500 --concurrency 50 --out run.json
+    python -m benchmarks.load_test --phraser-latency lognormal:600:0.6 --nlu-error-rate 0.02
+    python -m benchmarks.load_test --env SESSION_CONCURRENCY_MODE=optimistic --env RATE_LIMIT_DEFAULT=100/minute
+    python -m benchmarks.load_test --target http://localhost:8000 --no-stubs   # existing stack
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_test.stubs import add_stage_arguments, stage_args
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, name: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"{name} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{name} not healthy at {url} after {timeout:.0f}s")
+
+
+def _wait_redis(port: int, proc: subprocess.Popen, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"redis-server exited with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"redis-server not listening on {port}")
+
+
+def _print_table(report: dict):
+    summary, latency = report["summary"], report["summary"]["latency"]
+    print(
+        f"turns={summary['turns']} ok={summary['ok']} "
+        f"throughput={summary['throughput_per_s']:.1f}/s "
+        f"429={summary['rate_429']:.1%} 409={summary['rate_409']:.1%} "
+        f"fallback={summary['fallback_rate']:.1%}"
+    )
+    print(f"status codes: {report['status_codes']}  negotiations: {report['negotiations']}")
+    header = f"{'stage':<22} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = {"end_to_end": {"calls": latency["count"], **latency}, **report["stages"]}
+    for name, row in rows.items():
+        print(
+            f"{name:<22} {row.get('calls', row['count']):>6} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--negotiations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument(
+        "--think-ms", type=float, default=0.0, help="mean user think time between turns"
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--target", help="existing orchestrator URL (skip spawning one)")
+    parser.add_argument("--port", type=int, default=9000, help="spawned orchestrator port")
+    parser.add_argument("--workers", type=int, default=1, help="spawned orchestrator workers")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra env for the spawned orchestrator (repeatable)",
+    )
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--no-stubs", action="store_true", help="stubs already running")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL"))
+    parser.add_argument("--redis-port", type=int, default=6390, help="spawned redis port")
+    parser.add_argument("--json", action="store_true", help="print the full report")
+    parser.add_argument("--out", help="also write the full report to this file")
+    add_stage_arguments(parser)
+    args = parser.parse_args(argv)
+
+    procs = []
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    try:
+        if not args.redis_url:
+            if not shutil.which("redis-server"):
+                raise SystemExit("redis-server not found — install it or pass --redis-url")
+            redis_proc = subprocess.Popen(
+                [
+                    "redis-server",
+                    "--port", str(args.redis_port),
+                    "--save", "",
+                    "--appendonly", "no",
+                ],
+                stdout=subprocess.DEVNULL,
+            )
+            procs.append(redis_proc)
+            _wait_redis(args.redis_port, redis_proc)
+            args.redis_url = f"redis://127.0.0.1:{args.redis_port}/0"
+        # The driver seeds sessions through state_manager (reads REDIS_URL on import)
+        os.environ["REDIS_URL"] = args.redis_url
+
+        if not args.no_stubs:
+            stub_proc = subprocess.Popen(
+                [
+                    sys.executable, "-m", "benchmarks.load_test.stubs",
+                    "--port", str(args.stub_port),
+                    *stage_args(args),
+                ]
+            )
+            procs.append(stub_proc)
+            _wait_healthy(f"{stub_url}/health", stub_proc, "stubs")
+
+        target = args.target
+        if not target:
+            env = {
+                **os.environ,
+                "REDIS_URL": args.redis_url,
+                "NLU_URL": stub_url,
+                "STRATEGY_ENGINE_URL": stub_url,
+                "LLM_PHRASER_URL": stub_url,
+                "NEGOTIATION_SYNC_URL": f"{stub_url}/sync",
+                "INTERNAL_SERVICE_KEY": "load-test",
+            }
+            env.update(item.split("=", 1) for item in args.env)
+            orchestrator = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", "orchestrator.main:app",
+                    "--host", "127.0.0.1", "--port", str(args.port),
+                    "--workers", str(args.workers), "--log-level", "warning",
+                ],
+                env=env,
+            )
+            procs.append(orchestrator)
+            target = f"http://127.0.0.1:{args.port}"
+            _wait_healthy(f"{target}/health", orchestrator, "orchestrator")
+
+        from benchmarks.load_test.driver import run_load
+        from orchestrator.lib import state_manager
+
+        async def _run():
+            try:
+                return await run_load(
+                    target,
+                    negotiations=args.negotiations,
+                    concurrency=args.concurrency,
+                    think_ms=args.think_ms,
+                    timeout=args.timeout,
+                    seed=args.seed,
+                    stats_url=None if args.no_stubs else stub_url,
+                )
+            finally:
+                await state_manager.close_redis()
+
+        report = asyncio.run(_run())
+        report["config"].update(
+            {
+                "workers": None if args.target else args.workers,
+                "orchestrator_env": args.env,
+                "stages": {
+                    key: value
+                    for key, value in vars(args).items()
+                    if key.endswith(("_latency", "_error_rate"))
+                },
+                "real_strategy": args.real_strategy,
+            }
+        )
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(report)
+
+
+if __name__ == "__main__":
+    main()
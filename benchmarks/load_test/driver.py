@@ -0,0 +1,222 @@
+"""
+Async load driver: replays scripted multi-turn negotiations against /ina/v1/chat.
+
+Each virtual user (one per --concurrency) takes the next negotiation off a
+shared queue and plays it turn by turn on its own seeded session:
+
+    GREET → 2..6 rising MAKE_OFFERs → DEAL (70%) or BYE
+
+stopping early once the orchestrator reports the deal closed (is_locked).
+Every turn carries its own X-Request-ID so stage timings recorded by the
+stubs (see stubs.py) can be joined back onto it.
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+import httpx
+
+from orchestrator.lib import state_manager
+
+_GREETINGS = ["Hi", "Salam", "Hello there"]
+_OFFER_LINES = ["I'll give you {p}", "{p} de do", "How about {p}?", "{p} final hai"]
+_CLOSERS = {"DEAL": ["Deal", "Theek hai, done"], "BYE": ["Bye", "Allah hafiz"]}
+
+
+def build_negotiation(rng: random.Random) -> dict:
+    """One scripted negotiation: session seed values plus the user messages."""
+    asking = float(rng.randrange(1000, 50000, 500))
+    offers = rng.randint(2, 6)
+    start, end = asking * rng.uniform(0.4, 0.6), asking * rng.uniform(0.7, 0.85)
+    step = (end - start) / max(1, offers - 1)
+
+    messages = [rng.choice(_GREETINGS)]
+    for i in range(offers):
+        messages.append(rng.choice(_OFFER_LINES).format(p=int(start + i * step)))
+    closer = "DEAL" if rng.random() < 0.7 else "BYE"
+    messages.append(rng.choice(_CLOSERS[closer]))
+
+    return {
+        "closer": closer,
+        "session": {
+            "mam": round(asking * 0.7, 2),
+            "asking_price": asking,
+            "offer_count": 0,
+            "status": "negotiating",
+            "messages": [],
+        },
+        "messages": messages,
+    }
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary_ms(values: list) -> dict:
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": _percentile(values, 50) * 1000,
+        "p95_ms": _percentile(values, 95) * 1000,
+        "p99_ms": _percentile(values, 99) * 1000,
+        "max_ms": max(values) * 1000 if values else 0.0,
+    }
+
+
+async def _seed(sessions: dict, batch: int = 100):
+    items = list(sessions.items())
+    for i in range(0, len(items), batch):
+        await asyncio.gather(
+            *(state_manager.set_session(sid, data) for sid, data in items[i : i + batch])
+        )
+
+
+async def _cleanup(session_ids: list):
+    client = state_manager.get_redis_client()
+    for sid in session_ids:
+        await client.delete(*state_manager._session_keys(sid), f"ratelimit:session:{sid}")
+
+
+async def run_load(
+    target: str,
+    negotiations: int = 200,
+    concurrency: int = 20,
+    think_ms: float = 0.0,
+    timeout: float = 30.0,
+    seed: int = 7,
+    stats_url: Optional[str] = None,
+) -> dict:
+    """
+    Run the load and return the machine-readable report.
+
+    target:    orchestrator base URL (e.g. http://127.0.0.1:9000)
+    stats_url: stubs base URL; when set, per-stage timings are included
+    """
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    plans = {f"load-{run_id}-{i}": build_negotiation(rng) for i in range(negotiations)}
+    await _seed({sid: plan["session"] for sid, plan in plans.items()})
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for sid in plans:
+        queue.put_nowait(sid)
+
+    turns = []  # (request_id, status, seconds, code, is_fallback)
+    outcomes = Counter()
+
+    async def virtual_user(client: httpx.AsyncClient):
+        while not queue.empty():
+            sid = queue.get_nowait()
+            outcome = "unfinished"
+            for message in plans[sid]["messages"]:
+                request_id = str(uuid.uuid4())
+                started = time.perf_counter()
+                try:
+                    resp = await client.post(
+                        "/ina/v1/chat",
+                        json={"user_id": sid, "message": message},
+                        headers={"X-Request-ID": request_id},
+                    )
+                    status, body = resp.status_code, resp.json()
+                except (httpx.HTTPError, ValueError) as exc:
+                    status, body = 0, {"code": type(exc).__name__}
+                elapsed = time.perf_counter() - started
+
+                code = body.get("code") if isinstance(body, dict) else None
+                fallback = bool(status == 200 and body.get("is_fallback"))
+                turns.append((request_id, status, elapsed, code, fallback))
+
+                if status == 200 and body.get("is_locked"):
+                    outcome = "deal" if body.get("deal_accepted") else "closed"
+                    break
+                if status in (0, 401):
+                    outcome = "error"
+                    break
+                if think_ms:
+                    await asyncio.sleep(rng.expovariate(1000 / think_ms))
+            else:
+                outcome = "walked_away" if plans[sid]["closer"] == "BYE" else "no_deal"
+            outcomes[outcome] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(virtual_user(client) for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    stage_timings = {"requests": {}, "background": {}}
+    if stats_url:
+        async with httpx.AsyncClient(base_url=stats_url, timeout=timeout) as client:
+            stage_timings = (await client.get("/stats")).json()
+    await _cleanup(list(plans))
+
+    return _report(
+        turns,
+        outcomes,
+        stage_timings,
+        wall,
+        config={
+            "target": target,
+            "negotiations": negotiations,
+            "concurrency": concurrency,
+            "think_ms": think_ms,
+            "seed": seed,
+        },
+    )
+
+
+def _report(turns, outcomes, stage_timings, wall, config) -> dict:
+    statuses = Counter(str(status) for _, status, _, _, _ in turns)
+    codes = Counter(code for _, _, _, code, _ in turns if code)
+    ok = [t for t in turns if t[1] == 200]
+    total = len(turns)
+
+    stages = {}
+    overhead = []
+    for request_id, _, elapsed, _, _ in ok:
+        timing = stage_timings["requests"].get(request_id)
+        if timing is None:
+            continue
+        for stage, (calls, seconds) in timing.items():
+            entry = stages.setdefault(stage, {"calls": 0, "seconds": []})
+            entry["calls"] += calls
+            entry["seconds"].append(seconds)
+        overhead.append(max(0.0, elapsed - sum(s for _, s in timing.values())))
+
+    # Per turn: time spent in each downstream stage (all its calls, incl. retries)
+    stage_report = {
+        stage: {"calls": entry["calls"], **_summary_ms(entry["seconds"])}
+        for stage, entry in sorted(stages.items())
+    }
+    if overhead:
+        stage_report["orchestrator_overhead"] = _summary_ms(overhead)
+    # Off the request path (outbox → DB sync): per call
+    for stage, seconds in sorted(stage_timings["background"].items()):
+        stage_report[stage] = {"calls": len(seconds), **_summary_ms(seconds)}
+
+    return {
+        "config": config,
+        "summary": {
+            "turns": total,
+            "ok": len(ok),
+            "wall_s": wall,
+            "throughput_per_s": total / wall if wall else 0.0,
+            "rate_429": statuses.get("429", 0) / total if total else 0.0,
+            "rate_409": statuses.get("409", 0) / total if total else 0.0,
+            "fallback_rate": sum(1 for t in ok if t[4]) / len(ok) if ok else 0.0,
+            "latency": _summary_ms([t[2] for t in ok]),
+        },
+        "status_codes": dict(statuses),
+        "error_codes": dict(codes),
+        "negotiations": dict(outcomes),
+        "stages": stage_report,
+    }
@@ -0,0 +1,314 @@
+"""
+Local stand-ins for the services the orchestrator calls.
+
+One FastAPI app serves every downstream route, so a single port can be
+used for NLU_URL, STRATEGY_ENGINE_URL, LLM_PHRASER_URL and
+NEGOTIATION_SYNC_URL:
+
+    POST /api/v1/parse          nlu-service     (rule-based intent + PRICE)
+    POST /api/v1/decide         strategy-engine (stub rules, or the real
+                                                 strategy_core with --real-strategy)
+    POST /api/v1/phrase         llm-phraser     (templated text, no LLM)
+    POST /sync                  negotiation DB sync endpoint
+    POST /v1/chat/completions   OpenAI-compatible LM for nlu-service's DSPy
+                                program (fake_nlu answer in DSPy's
+                                ChatAdapter format, or JSON when the
+                                request sets response_format)
+    GET  /stats                 per-request stage timings (see below)
+    POST /stats/reset
+
+Each stage has its own latency distribution and error rate (errors answer
+503). Latency specs, all in milliseconds:
+
+    fixed:20            always 20 ms
+    uniform:10:50       uniform between 10 and 50 ms
+    normal:40:10        mean 40, sd 10 (clipped at 0)
+    lognormal:300:0.4   median 300, sigma 0.4 — LLM-like long tail
+
+Stage timings are recorded per X-Request-ID (the orchestrator forwards its
+request id to every service), which lets the driver split each chat turn
+into nlu / brain / phraser time and orchestrator overhead. Calls without a
+request id (the outbox flusher's DB sync) are kept per call under
+"background".
+
+Run standalone:
+    python -m benchmarks.load_test.stubs --port 9100 --phraser-latency lognormal:400:0.5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+STAGES = ("nlu", "brain", "phraser", "sync", "llm")
+
+_STRATEGY_ENGINE_DIR = (
+    Path(__file__).resolve().parents[2] / "microservices" / "strategy-engine"
+)
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Latency spec → sampler returning seconds (see module docstring)."""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda: max(0.0, random.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Invalid latency spec {spec!r}")
+
+
+# ---------------------- Stage behaviour ----------------------
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def fake_nlu(text: str) -> dict:
+    """Keyword NLU good enough for the scripted negotiations in driver.py."""
+    lowered = text.lower()
+    match = _PRICE_RE.search(text)
+    price = float(match.group().replace(",", "")) if match else None
+    if price is not None:
+        intent = "MAKE_OFFER"
+    elif any(w in lowered for w in ("deal", "done", "theek hai")):
+        intent = "DEAL"
+    elif any(w in lowered for w in ("bye", "allah hafiz", "khuda hafiz")):
+        intent = "BYE"
+    elif any(w in lowered for w in ("hi", "hello", "salam")):
+        intent = "GREET"
+    elif "?" in text:
+        intent = "ASK_QUESTION"
+    else:
+        intent = "UNKNOWN"
+    return {
+        "intent": intent,
+        "entities": {"PRICE": price},
+        "sentiment": "neutral",
+        "language": "roman_urdu" if "de do" in lowered else "english",
+    }
+
+
+def fake_decision(payload: dict) -> dict:
+    """Cheap stand-in for strategy_core.make_decision."""
+    return {"policy_type": "load-test-stub", **_fake_action(payload)}
+
+
+def _fake_action(payload: dict) -> dict:
+    mam = float(payload["mam"])
+    asking = float(payload["asking_price"])
+    offer = float(payload.get("user_offer") or 0)
+    if payload.get("user_intent") == "DEAL" or offer >= max(mam, asking * 0.85):
+        return {"action": "ACCEPT", "response_key": "ACCEPT_FINAL", "counter_price": None}
+    if offer < mam * 0.5:
+        return {"action": "REJECT", "response_key": "REJECT_LOWBALL", "counter_price": None}
+    return {
+        "action": "COUNTER",
+        "response_key": "STANDARD_COUNTER",
+        "counter_price": round(max(mam, (offer + asking) / 2), 2),
+    }
+
+
+def _real_decision() -> Callable[[dict], dict]:
+    """The real strategy engine, imported in-process."""
+    sys.path.insert(0, str(_STRATEGY_ENGINE_DIR))
+    from app.schemas import StrategyInput
+    from app.strategy_core import make_decision
+
+    return lambda payload: make_decision(StrategyInput(**payload)).model_dump()
+
+
+def fake_phrase(payload: dict) -> dict:
+    price = payload.get("counter_price")
+    text = {
+        "ACCEPT": "Deal! Let's close it.",
+        "REJECT": "Sorry, that is too low for us.",
+        "COUNTER": f"The best I can do is Rs {price:,.0f}." if price else "Let's talk price.",
+        "GREETING": "Welcome! What would you like to offer?",
+        "FAREWELL": "Thanks for stopping by!",
+    }.get(payload.get("action"), "Could you tell me your offer?")
+    return {"response_text": text}
+
+
+_DSPY_USER_MESSAGE_RE = re.compile(r"\[\[ ## user_message ## \]\]\n(.*?)\n\n", re.DOTALL)
+
+
+def fake_chat_completion(payload: dict) -> dict:
+    """OpenAI chat completion answering the NLU signature's fields."""
+    match = _DSPY_USER_MESSAGE_RE.search(payload["messages"][-1]["content"])
+    nlu = fake_nlu(match.group(1) if match else "")
+    price = nlu["entities"]["PRICE"]
+    fields = {
+        "reasoning": "Load-test stub.",
+        "intent": nlu["intent"],
+        "price": str(price) if price is not None else "None",
+        "sentiment": nlu["sentiment"],
+        "language": nlu["language"],
+        "error_message": "None",
+    }
+    if "reasoning" not in str(payload["messages"][0].get("content", "")):
+        fields.pop("reasoning")  # dspy.Predict program: no reasoning field
+    if payload.get("response_format"):  # DSPy JSONAdapter: fields as one JSON object
+        content = json.dumps(fields)
+    else:
+        content = "".join(f"[[ ## {name} ## ]]\n{value}\n\n" for name, value in fields.items())
+        content += "[[ ## completed ## ]]"
+    # ~4 characters per token, enough to compare prompt sizes
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in payload["messages"]) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "stub"),
+        "service_tier": "default",  # LiteLLM's Groq provider reads it
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+# ---------------------- App ----------------------
+def build_app(
+    latency: Dict[str, Callable[[], float]],
+    error_rate: Dict[str, float],
+    real_strategy: bool = False,
+) -> FastAPI:
+    app = FastAPI(title="INA load-test stubs")
+    decide = _real_decision() if real_strategy else fake_decision
+    # request_id → stage → [calls, seconds]
+    timings: Dict[str, Dict[str, list]] = defaultdict(dict)
+    # stage → [seconds per call] for calls made outside a chat request
+    background: Dict[str, list] = defaultdict(list)
+
+    async def _serve(stage: str, request: Request, handler: Callable[[dict], dict]):
+        started = time.perf_counter()
+        payload = await request.json()
+        await asyncio.sleep(latency[stage]())
+        if random.random() < error_rate[stage]:
+            response = JSONResponse(status_code=503, content={"detail": "stub error"})
+        else:
+            response = JSONResponse(content=handler(payload))
+
+        elapsed = time.perf_counter() - started
+        request_id = request.headers.get("X-Request-ID")
+        if request_id:
+            entry = timings[request_id].setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+        else:
+            background[stage].append(elapsed)
+        return response
+
+    @app.post("/api/v1/parse")
+    async def parse(request: Request):
+        return await _serve("nlu", request, lambda p: fake_nlu(p["text"]))
+
+    @app.post("/api/v1/decide")
+    async def decide_route(request: Request):
+        return await _serve("brain", request, decide)
+
+    @app.post("/api/v1/phrase")
+    async def phrase(request: Request):
+        return await _serve("phraser", request, fake_phrase)
+
+    @app.post("/sync")
+    async def sync(request: Request):
+        return await _serve("sync", request, lambda p: {"status": "ok"})
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await _serve("llm", request, fake_chat_completion)
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": timings, "background": background}
+
+    @app.post("/stats/reset")
+    async def reset():
+        timings.clear()
+        background.clear()
+        return {"status": "ok"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "service": "load-test-stubs"}
+
+    return app
+
+
+def add_stage_arguments(parser: argparse.ArgumentParser):
+    """--<stage>-latency / --<stage>-error-rate for every stage."""
+    defaults = {
+        "nlu": "lognormal:250:0.3",
+        "brain": "normal:5:1",
+        "phraser": "lognormal:400:0.4",
+        "sync": "uniform:20:60",
+        "llm": "lognormal:800:0.3",
+    }
+    for stage in STAGES:
+        parser.add_argument(f"--{stage}-latency", default=defaults[stage])
+        parser.add_argument(f"--{stage}-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--real-strategy",
+        action="store_true",
+        help="run the real strategy_core in-process instead of the stub rules",
+    )
+
+
+def stage_args(args) -> list:
+    """Forward the stage arguments to a stubs subprocess."""
+    argv = []
+    for stage in STAGES:
+        argv += [
+            f"--{stage}-latency",
+            getattr(args, f"{stage}_latency"),
+            f"--{stage}-error-rate",
+            str(getattr(args, f"{stage}_error_rate")),
+        ]
+    if args.real_strategy:
+        argv.append("--real-strategy")
+    return argv
+
+
+def main(argv: Optional[list] = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="INA load-test stub services")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_stage_arguments(parser)
+    args = parser.parse_args(argv)
+
+    app = build_app(
+        latency={s: parse_latency(getattr(args, f"{s}_latency")) for s in STAGES},
+        error_rate={s: getattr(args, f"{s}_error_rate") for s in STAGES},
+        real_strategy=args.real_strategy,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+NLU hedging benchmark — fallback-on-failure vs hedged primary/fallback.
+
+Runs nlu-service's dspy_nlu.parse (the real compiled program) against two
+load-test stub LMs: a slow, long-tailed "primary" (--primary-latency,
+--primary-error-rate; errors answer 503 and go through LiteLLM's retries)
+and a fast "fallback" (--fallback-latency). Two configurations:
+
+    off      NLU_HEDGING=false — the fallback only starts once the
+             primary has failed
+    hedged   NLU_HEDGING=true — the fallback starts once the primary is
+             slower than the --percentile of its recent latencies
+
+Reported per configuration: latency p50 / p95 / p99 / max, and for the
+hedged run the hedge rate, the share of races each provider won and the
+extra (losing) calls with their estimated cost. A warm-up pass of
+--warmup parses fills the hedger's latency window first and is not
+counted.
+
+Usage (from project root; needs dspy, uvicorn, fastapi):
+    python -m benchmarks.nlu_hedging_bench
+    python -m benchmarks.nlu_hedging_bench --primary-latency lognormal:600:0.9 --primary-error-rate 0.05 --json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from benchmarks.load_test.driver import _summary_ms
+from benchmarks.nlu_lm_execution_bench import MESSAGES, start_stubs
+
+_NLU_SERVICE_DIR = Path(__file__).resolve().parents[1] / "microservices" / "nlu-service"
+sys.path.insert(0, str(_NLU_SERVICE_DIR))
+from app import dspy_nlu, hedging  # noqa: E402
+
+CONFIGS = ("off", "hedged")
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels or None) or 0.0
+
+
+def _hedge_counters() -> dict:
+    counters = {
+        "parses": _sample("nlu_hedge_parses_total"),
+        "fired": _sample("nlu_hedge_fired_total"),
+    }
+    for lm in hedging.PROVIDERS:
+        counters[f"wins_{lm}"] = _sample("nlu_hedge_wins_total", lm=lm)
+        counters[f"extra_{lm}"] = _sample("nlu_hedge_extra_calls_total", lm=lm)
+        counters[f"cost_{lm}"] = _sample("nlu_hedge_extra_cost_usd_total", lm=lm)
+    return counters
+
+
+def build_module(config: str, args, primary_url: str, fallback_url: str):
+    dspy_nlu.NLU_LM_EXECUTION = args.execution
+    dspy_nlu.NLU_BATCHING = False
+    dspy_nlu.NLU_OPENAI_BASE_URL = primary_url
+    dspy_nlu.NLU_GROQ_BASE_URL = fallback_url
+    module = dspy_nlu.build_nlu_module("stub-key", "stub-key")
+    module.hedger = None
+    if config == "hedged":
+        module.hedger = hedging.Hedger(
+            percentile=args.percentile,
+            min_samples=min(args.warmup, 50),
+            costs={"primary": hedging.NLU_HEDGE_COST_PRIMARY_USD,
+                   "fallback": hedging.NLU_HEDGE_COST_FALLBACK_USD},
+        )
+    return module
+
+
+async def run_parses(module, count: int, concurrency: int) -> list:
+    texts = iter([MESSAGES[i % len(MESSAGES)] for i in range(count)])
+    latencies = []
+
+    async def caller():
+        for text in texts:
+            started = time.perf_counter()
+            await dspy_nlu.parse(text, module)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return latencies
+
+
+async def run_config(config: str, module, args) -> dict:
+    await run_parses(module, args.warmup, args.concurrency)
+    before = _hedge_counters()
+    latencies = await run_parses(module, args.parses, args.concurrency)
+    after = _hedge_counters()
+    delta = {key: after[key] - before[key] for key in after}
+    row = {"config": config, "latency": _summary_ms(latencies)}
+    if config == "hedged":
+        fired = delta["fired"]
+        row.update(
+            hedge_rate=fired / delta["parses"] if delta["parses"] else 0.0,
+            win_rate={lm: delta[f"wins_{lm}"] / fired if fired else 0.0 for lm in hedging.PROVIDERS},
+            extra_calls={lm: delta[f"extra_{lm}"] for lm in hedging.PROVIDERS},
+            extra_cost_usd=sum(delta[f"cost_{lm}"] for lm in hedging.PROVIDERS),
+            hedge_delay_ms=module.hedger.delay() * 1000,
+        )
+    return row
+
+
+async def run(modules: dict, args) -> list:
+    return [await run_config(config, module, args) for config, module in modules.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--parses", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--execution", choices=("thread", "async"), default="thread")
+    parser.add_argument("--percentile", type=float, default=hedging.NLU_HEDGE_PERCENTILE)
+    parser.add_argument("--primary-latency", default="lognormal:300:0.8")
+    parser.add_argument("--primary-error-rate", type=float, default=0.02)
+    parser.add_argument("--fallback-latency", default="lognormal:250:0.2")
+    parser.add_argument("--port", type=int, default=9188, help="primary stub; fallback uses port + 1")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    primary = start_stubs(
+        args.port, args.primary_latency, "--llm-error-rate", str(args.primary_error_rate)
+    )
+    fallback = start_stubs(args.port + 1, args.fallback_latency)
+    try:
+        urls = (f"http://127.0.0.1:{args.port}/v1", f"http://127.0.0.1:{args.port + 1}/v1")
+        # dspy.configure() must run outside the event loop's tasks
+        modules = {config: build_module(config, args, *urls) for config in CONFIGS}
+        report = asyncio.run(run(modules, args))
+    finally:
+        for stubs in (primary, fallback):
+            stubs.terminate()
+            stubs.wait()
+
+    if args.json:
+        json.dump({"args": vars(args), "configs": report}, sys.stdout, indent=2)
+        print()
+        return
+    print(
+        f"primary {args.primary_latency} ({args.primary_error_rate:.0%} errors), "
+        f"fallback {args.fallback_latency}, {args.parses} parses × {args.concurrency} callers, "
+        f"{args.execution} execution"
+    )
+    header = f"{'config':<7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in report:
+        latency = row["latency"]
+        print(
+            f"{row['config']:<7} {latency['p50_ms']:>8.0f} {latency['p95_ms']:>8.0f} "
+            f"{latency['p99_ms']:>8.0f} {latency['max_ms']:>8.0f}"
+        )
+    hedged = report[-1]
+    print(
+        f"\nhedged: delay {hedged['hedge_delay_ms']:.0f} ms, hedge rate {hedged['hedge_rate']:.1%}, "
+        f"wins primary {hedged['win_rate']['primary']:.0%} / fallback {hedged['win_rate']['fallback']:.0%}, "
+        f"extra calls {hedged['extra_calls']}, extra cost ${hedged['extra_cost_usd']:.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
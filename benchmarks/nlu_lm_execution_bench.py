@@ -0,0 +1,169 @@
+"""
+NLU LM execution benchmark — thread pool vs batching vs async, 10/100/500 in flight.
+
+Runs nlu-service's dspy_nlu.parse (the real compiled program, prompt
+formatting and output parsing) against the load-test stubs' OpenAI-
+compatible /v1/chat/completions, in each execution mode:
+
+    thread        NLU_LM_EXECUTION=thread, NLU_BATCHING=false
+                  one blocking DSPy call per parse on the LM pool (--threads)
+    thread+batch  NLU_LM_EXECUTION=thread, NLU_BATCHING=true (NLUBatcher)
+    async         NLU_LM_EXECUTION=async — DSPy async path (module.acall), no
+                  threads; capped by --max-inflight slots
+
+For every --concurrency level, `concurrency × --rounds` parses are issued
+by `concurrency` concurrent callers. Reported: throughput (parses/s),
+per-parse latency p50 / p99, and parses whose intent/price differ from the
+stub's answer (must be 0).
+
+Usage (from project root; needs dspy>=3 for async, uvicorn, fastapi):
+    python -m benchmarks.nlu_lm_execution_bench
+    python -m benchmarks.nlu_lm_execution_bench --llm-latency lognormal:300:0.3 --threads 32 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.load_test.driver import _summary_ms
+from benchmarks.load_test.stubs import fake_nlu
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")  # no network at import
+
+_NLU_SERVICE_DIR = Path(__file__).resolve().parents[1] / "microservices" / "nlu-service"
+sys.path.insert(0, str(_NLU_SERVICE_DIR))
+from app import dspy_nlu, lm_pool  # noqa: E402
+
+MODES = {
+    "thread": {"execution": "thread", "batching": False},
+    "thread+batch": {"execution": "thread", "batching": True},
+    "async": {"execution": "async", "batching": False},
+}
+
+MESSAGES = [
+    "I'll give you 1500",
+    "Bhai 1200 de do",
+    "hello",
+    "what is your best price?",
+    "deal done",
+    "1,800 final",
+    "allah hafiz",
+    "can you do 2500",
+]
+
+
+def start_stubs(port: int, llm_latency: str, *extra_args: str) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.load_test.stubs", "--port", str(port),
+         "--llm-latency", llm_latency, *extra_args],
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.2)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("stubs did not start")
+
+
+def build_module(mode: str, base_url: str):
+    dspy_nlu.NLU_LM_EXECUTION = MODES[mode]["execution"]
+    dspy_nlu.NLU_BATCHING = MODES[mode]["batching"]
+    dspy_nlu.NLU_OPENAI_BASE_URL = base_url
+    dspy_nlu.NLU_GROQ_BASE_URL = base_url
+    return dspy_nlu.build_nlu_module("stub-key", "stub-key")
+
+
+async def run_level(module, concurrency: int, rounds: int) -> dict:
+    texts = [MESSAGES[i % len(MESSAGES)] for i in range(concurrency * rounds)]
+    latencies, mismatches = [], 0
+    queue = iter(texts)
+
+    async def caller():
+        nonlocal mismatches
+        for text in queue:
+            started = time.perf_counter()
+            result = await dspy_nlu.parse(text, module)
+            latencies.append(time.perf_counter() - started)
+            expected = fake_nlu(text)
+            if (result["intent"], result["price"]) != (expected["intent"], expected["entities"]["PRICE"]):
+                mismatches += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if module.batcher is not None:
+        await module.batcher.close()
+        module.batcher = dspy_nlu.NLUBatcher(
+            module, dspy_nlu.NLU_BATCH_MAX_SIZE, dspy_nlu.NLU_BATCH_MAX_WAIT_MS,
+            dspy_nlu.NLU_BATCH_MAX_INFLIGHT,
+        )
+    return {
+        "concurrency": concurrency,
+        "parses": len(texts),
+        "throughput": len(texts) / elapsed,
+        "latency": _summary_ms(latencies),
+        "mismatches": mismatches,
+    }
+
+
+async def run(modules: dict, levels: list, rounds: int) -> dict:
+    report = {}
+    for mode, module in modules.items():
+        report[mode] = [await run_level(module, c, rounds) for c in levels]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--rounds", type=int, default=3, help="parses per caller")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--threads", type=int, default=lm_pool.NLU_LM_THREADS, help="LM pool size")
+    parser.add_argument(
+        "--max-inflight", type=int, default=lm_pool.NLU_LM_MAX_INFLIGHT, help="async LM slots"
+    )
+    parser.add_argument("--llm-latency", default="fixed:200", help="stub LM latency spec")
+    parser.add_argument("--port", type=int, default=9187)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    lm_pool.pool = lm_pool.LMPool(args.threads)
+    lm_pool.slots = lm_pool.LMSlots(args.max_inflight)
+    stubs = start_stubs(args.port, args.llm_latency)
+    try:
+        base_url = f"http://127.0.0.1:{args.port}/v1"
+        modules = {mode: build_module(mode, base_url) for mode in args.modes}
+        report = asyncio.run(run(modules, args.concurrency, args.rounds))
+    finally:
+        stubs.terminate()
+        stubs.wait()
+
+    if args.json:
+        json.dump({"llm_latency": args.llm_latency, "threads": args.threads, "modes": report},
+                  sys.stdout, indent=2)
+        print()
+        return
+    print(f"stub LM latency {args.llm_latency}, LM pool {args.threads} threads")
+    header = f"{'mode':<13} {'in flight':>9} {'parses/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mismatch':>9}"
+    print(header)
+    print("-" * len(header))
+    for mode, rows in report.items():
+        for row in rows:
+            print(
+                f"{mode:<13} {row['concurrency']:>9} {row['throughput']:>9.1f} "
+                f"{row['latency']['p50_ms']:>8.0f} {row['latency']['p99_ms']:>8.0f} "
+                f"{row['mismatches']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
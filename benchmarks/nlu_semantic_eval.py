@@ -0,0 +1,129 @@
+"""
+Semantic NLU cache evaluation — LLM calls saved vs accuracy lost.
+
+Replays a labelled message stream through nlu-service's SemanticIndex
+(semantic_cache.py) for a range of similarity thresholds. Each message is
+looked up first; a hit is scored against its label, a miss stands in for
+an LLM call (assumed to return the label) and is indexed. Reported per
+threshold:
+
+    saved      share of messages answered by the index (LLM calls saved)
+    hit acc    share of those answers matching the label exactly
+               (intent, price, sentiment, language)
+    acc loss   wrong answers / all messages — the accuracy given up
+               compared with calling the LLM every time
+
+Stream: compile_nlu.RAW_EXAMPLES (parsed, dspy not needed) plus synthetic
+near-duplicates of each example — casing/"you"→"u"/punctuation changes
+and, for offers, a different price (label updated) — in --orders shuffled
+orders, averaged.
+
+Usage (from project root; needs numpy):
+    python -m benchmarks.nlu_semantic_eval
+    python -m benchmarks.nlu_semantic_eval --thresholds 0.85 0.9 0.95 --orders 20 --json
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+from benchmarks.nlu_fast_path_check import load_raw_examples
+
+_NLU_SERVICE_DIR = Path(__file__).resolve().parents[1] / "microservices" / "nlu-service"
+sys.path.insert(0, str(_NLU_SERVICE_DIR))
+from app import semantic_cache  # noqa: E402
+
+_FIRST_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?\s*(?:k\b)?", re.IGNORECASE)
+
+
+def _label(row: dict, price=None) -> tuple:
+    if price is None and row["price"] != "None":
+        price = float(row["price"])
+    return (row["intent"], price, row["sentiment"], row["language"])
+
+
+def build_stream() -> list:
+    """(message, label) pairs: every RAW_EXAMPLE plus its near-duplicates."""
+    stream = []
+    for row in load_raw_examples():
+        message = row["user_message"]
+        stream.append((message, _label(row)))
+
+        variant = re.sub(r"\byou\b", "u", message.lower()).rstrip(".!")
+        if variant != message:
+            stream.append((variant, _label(row)))
+
+        if row["intent"] == "MAKE_OFFER":
+            match = _FIRST_NUMBER_RE.search(message)
+            new_price = float(row["price"]) + 250.0
+            repriced = message[: match.start()] + f"{new_price:.0f}" + message[match.end() :]
+            stream.append((repriced, _label(row, new_price)))
+    return stream
+
+
+def evaluate(stream: list, threshold: float, orders: int, seed: int) -> dict:
+    hits = correct = total = 0
+    for order in range(orders):
+        messages = list(stream)
+        random.Random(seed + order).shuffle(messages)
+        index = semantic_cache.SemanticIndex(max_entries=len(messages), threshold=threshold)
+        for message, label in messages:
+            total += 1
+            reused = index.lookup(message, "eval")
+            if reused is None:
+                intent, price, sentiment, language = label
+                index.add(
+                    message,
+                    {"intent": intent, "price": price, "sentiment": sentiment,
+                     "language": language, "error_message": None},
+                    "eval",
+                )
+                continue
+            hits += 1
+            got = (reused["intent"], reused["price"], reused["sentiment"], reused["language"])
+            correct += got == label
+    return {
+        "threshold": threshold,
+        "messages": total,
+        "saved": hits / total if total else 0.0,
+        "hit_accuracy": correct / hits if hits else 1.0,
+        "accuracy_loss": (hits - correct) / total if total else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95],
+    )
+    parser.add_argument("--orders", type=int, default=10, help="shuffled replays per threshold")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    stream = build_stream()
+    results = [evaluate(stream, t, args.orders, args.seed) for t in args.thresholds]
+
+    if args.json:
+        json.dump({"stream": len(stream), "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    print(f"stream: {len(stream)} messages × {args.orders} orders")
+    header = f"{'threshold':>9} {'saved':>7} {'hit acc':>8} {'acc loss':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['threshold']:>9.2f} {row['saved']:>7.1%} "
+            f"{row['hit_accuracy']:>8.1%} {row['accuracy_loss']:>9.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
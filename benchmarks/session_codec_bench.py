@@ -0,0 +1,207 @@
+"""
+Session codec benchmark — encode/decode time and stored bytes vs history length.
+
+Builds synthetic negotiation histories shaped exactly like the turns the
+orchestrator stores ({"from": "user", "text", "user_offer"} /
+{"from": "ina", "text", "brain_action", "brain_key", "bot_offer"}) and,
+for every serializer/compression combination installed, measures:
+
+    - encode time for the whole history (one codec.encode per turn,
+      which is what save_and_unlock / set_session do)
+    - decode time for the whole history (what lock_and_load does)
+    - stored bytes in the history list (sum of encoded values)
+
+The legacy single-blob JSON layout is reported as the baseline.
+
+Usage (from project root):
+    python -m benchmarks.session_codec_bench
+    python -m benchmarks.session_codec_bench --lengths 10 100 1000 --sessions 50000
+    python -m benchmarks.session_codec_bench --json > codec_results.json
+
+--sessions N extrapolates the Redis memory needed for N concurrent sessions
+of each history length (payload bytes only — Redis adds per-key/per-element
+overhead on top).
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from orchestrator.lib.session_codec import (
+    COMPRESSIONS,
+    SERIALIZERS,
+    SessionCodec,
+    LZ4_AVAILABLE,
+    MSGPACK_AVAILABLE,
+    ORJSON_AVAILABLE,
+    ZSTD_AVAILABLE,
+)
+
+_USER_LINES = [
+    "Bhai {p} mein de do",
+    "I'll give you {p}",
+    "{p} final hai, is se zyada nahi",
+    "How about {p}? That's my best offer.",
+    "Itna mahnga? {p} kardo please",
+]
+_BOT_LINES = [
+    "We can't meet you there, but my best price is Rs {p:,}.",
+    "We're getting close! The best I can do for you right now is Rs {p:,}.",
+    "I've gone as low as I can. Rs {p:,} is my absolute final offer.",
+]
+
+
+def build_history(turns: int, seed: int = 7) -> list:
+    """Synthetic history with `turns` messages (alternating user / bot)."""
+    rng = random.Random(seed)
+    history = []
+    user_offer, bot_offer = 900, 2000
+    for i in range(turns):
+        if i % 2 == 0:
+            user_offer += rng.randint(10, 80)
+            history.append(
+                {
+                    "from": "user",
+                    "text": rng.choice(_USER_LINES).format(p=user_offer),
+                    "user_offer": float(user_offer),
+                }
+            )
+        else:
+            bot_offer = max(user_offer, bot_offer - rng.randint(20, 120))
+            history.append(
+                {
+                    "from": "ina",
+                    "text": rng.choice(_BOT_LINES).format(p=bot_offer),
+                    "brain_action": "COUNTER",
+                    "brain_key": "STANDARD_COUNTER",
+                    "bot_offer": float(bot_offer),
+                }
+            )
+    return history
+
+
+def _available_combinations() -> list:
+    serializers = ["json"]
+    if ORJSON_AVAILABLE:
+        serializers.append("orjson")
+    if MSGPACK_AVAILABLE:
+        serializers.append("msgpack")
+    compressions = ["none"]
+    if ZSTD_AVAILABLE:
+        compressions.append("zstd")
+    if LZ4_AVAILABLE:
+        compressions.append("lz4")
+    return [(s, c) for s in serializers for c in compressions]
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_legacy(history: list, repeat: int) -> dict:
+    """Old layout: the whole session is one JSON string rewritten every turn."""
+    session = {"mam": 1500.0, "asking_price": 2000.0, "messages": history}
+    blob = json.dumps(session)
+    return {
+        "codec": "legacy-json-blob",
+        "encode_ms": _time_per_call(lambda: json.dumps(session), repeat) * 1000,
+        "decode_ms": _time_per_call(lambda: json.loads(blob), repeat) * 1000,
+        "stored_bytes": len(blob.encode("utf-8")),
+    }
+
+
+def bench_codec(
+    history: list, serializer: str, compression: str, min_bytes: int, repeat: int
+) -> dict:
+    codec = SessionCodec(serializer, compression, min_bytes)
+    encoded = [codec.encode(turn) for turn in history]
+
+    assert [codec.decode(v) for v in encoded] == history, "round-trip mismatch"
+
+    return {
+        "codec": f"{serializer}+{compression}",
+        "encode_ms": _time_per_call(
+            lambda: [codec.encode(turn) for turn in history], repeat
+        )
+        * 1000,
+        "decode_ms": _time_per_call(lambda: [codec.decode(v) for v in encoded], repeat)
+        * 1000,
+        "stored_bytes": sum(len(v) for v in encoded),
+    }
+
+
+def run(lengths: list, repeat: int, min_bytes: int) -> list:
+    results = []
+    for length in lengths:
+        history = build_history(length)
+        rows = [bench_legacy(history, repeat)]
+        for serializer, compression in _available_combinations():
+            rows.append(
+                bench_codec(history, serializer, compression, min_bytes, repeat)
+            )
+        for row in rows:
+            row["history_turns"] = length
+        results.extend(rows)
+    return results
+
+
+def _print_table(results: list, sessions: int):
+    header = f"{'turns':>6}  {'codec':<20} {'encode ms':>10} {'decode ms':>10} {'bytes':>10}"
+    if sessions:
+        header += f" {'MiB @ ' + str(sessions):>14}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        line = (
+            f"{row['history_turns']:>6}  {row['codec']:<20} "
+            f"{row['encode_ms']:>10.3f} {row['decode_ms']:>10.3f} "
+            f"{row['stored_bytes']:>10,}"
+        )
+        if sessions:
+            line += f" {row['stored_bytes'] * sessions / 2**20:>14,.1f}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--lengths", type=int, nargs="+", default=[10, 50, 100, 500, 1000]
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--min-bytes",
+        type=int,
+        default=64,
+        help="compression threshold per turn (bytes)",
+    )
+    parser.add_argument(
+        "--sessions", type=int, default=0, help="extrapolate memory for N sessions"
+    )
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    results = run(args.lengths, args.repeat, args.min_bytes)
+
+    if args.json:
+        json.dump(
+            {
+                "serializers": list(SERIALIZERS),
+                "compressions": list(COMPRESSIONS),
+                "sessions": args.sessions,
+                "results": results,
+            },
+            sys.stdout,
+            indent=2,
+        )
+        print()
+    else:
+        _print_table(results, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Session concurrency benchmark — pessimistic lock vs optimistic CAS on one session.
+
+Many concurrent clients hammer the SAME session. Every turn reads the
+session, "runs the graph" (an asyncio.sleep standing in for the NLU /
+Strategy Engine / Phraser calls) and writes back offer_count + 1 and the
+two new history turns, exactly like chat_endpoint:
+
+    lock        lock_and_load → graph → save_and_unlock
+                (the lock is held across the graph; excess waiters get 429)
+    optimistic  get_session → graph → save_turn_optimistic
+                (no lock; conflicts retry the bookkeeping or answer 409)
+
+Reported per mode: completed turns, 409/429 rejections, CAS conflicts
+resolved by retry, throughput, p50/p95/p99 turn latency, and lost updates
+(completed turns minus the final offer_count — must be 0).
+
+Needs a running Redis (REDIS_URL or REDIS_HOST/REDIS_PORT, as for the app):
+    docker compose up -d redis
+    REDIS_HOST=localhost python -m benchmarks.session_concurrency_bench
+    python -m benchmarks.session_concurrency_bench --concurrency 20 --graph-ms 400 --json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from fastapi import HTTPException
+
+from orchestrator.lib import state_manager
+
+
+def _turns(i: int) -> list:
+    return [
+        {"from": "user", "text": f"{1000 + i} de do", "user_offer": float(1000 + i)},
+        {"from": "ina", "text": "Counter", "brain_action": "COUNTER", "bot_offer": 1500.0},
+    ]
+
+
+def _bump(current: dict) -> dict:
+    return {"offer_count": int(current.get("offer_count", 0)) + 1}
+
+
+async def _lock_turn(session_id: str, i: int, graph_s: float, acquire_timeout: float):
+    session, token = await state_manager.lock_and_load(
+        session_id, acquire_timeout=acquire_timeout, history_limit=0
+    )
+    if not token:
+        raise RuntimeError("lock_and_load returned no lock")
+    await asyncio.sleep(graph_s)
+    version = await state_manager.save_and_unlock(
+        session_id, token, fields=_bump(session), new_turns=_turns(i)
+    )
+    if version is None:
+        raise RuntimeError("save_and_unlock discarded the update")
+    return 0
+
+
+async def _optimistic_turn(
+    session_id: str, i: int, graph_s: float, policy: str, max_retries: int
+):
+    session = await state_manager.get_session_meta(session_id)
+    await asyncio.sleep(graph_s)
+    conflicts = 0
+
+    def rebase(current: dict) -> dict:
+        nonlocal conflicts
+        conflicts += 1
+        return _bump(current)
+
+    version, _ = await state_manager.save_turn_optimistic(
+        session_id,
+        int(session["version"]),
+        fields=_bump(session),
+        new_turns=_turns(i),
+        rebase=rebase,
+        policy=policy,
+        max_retries=max_retries,
+    )
+    if version is None:
+        raise RuntimeError("compare_and_save failed")
+    return conflicts
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_mode(mode: str, args) -> dict:
+    session_id = f"bench-concurrency-{mode}"
+    await state_manager.set_session(
+        session_id,
+        {
+            "mam": 1000.0,
+            "asking_price": 2000.0,
+            "offer_count": 0,
+            "status": "negotiating",
+            "messages": [],
+        },
+    )
+
+    graph_s = args.graph_ms / 1000
+    latencies, rejected, errors, retried = [], 0, 0, 0
+    counter = iter(range(args.turns))
+
+    async def client():
+        nonlocal rejected, errors, retried
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                if mode == "lock":
+                    retried += await _lock_turn(
+                        session_id, i, graph_s, args.acquire_timeout
+                    )
+                else:
+                    retried += await _optimistic_turn(
+                        session_id, i, graph_s, args.policy, args.max_retries
+                    )
+                latencies.append(time.perf_counter() - start)
+            except HTTPException:
+                rejected += 1
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    final = await state_manager.get_session_meta(session_id)
+    await state_manager.get_redis_client().delete(
+        *state_manager._session_keys(session_id)
+    )
+
+    completed = len(latencies)
+    return {
+        "mode": mode,
+        "concurrency": args.concurrency,
+        "graph_ms": args.graph_ms,
+        "completed": completed,
+        "rejected": rejected,
+        "errors": errors,
+        "conflicts_retried": retried,
+        "lost_updates": completed - int(final.get("offer_count", 0)),
+        "throughput_per_s": completed / wall if wall else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "wall_s": wall,
+    }
+
+
+async def run(args) -> list:
+    modes = ["lock", "optimistic"] if args.mode == "both" else [args.mode]
+    try:
+        if not await state_manager.ping_redis():
+            raise SystemExit("Redis is not reachable — see module docstring")
+        return [await run_mode(mode, args) for mode in modes]
+    finally:
+        await state_manager.close_redis()
+
+
+def _print_table(results: list):
+    header = (
+        f"{'mode':<11} {'done':>5} {'rej':>5} {'err':>4} {'retry':>6} {'lost':>5} "
+        f"{'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['mode']:<11} {row['completed']:>5} {row['rejected']:>5} "
+            f"{row['errors']:>4} {row['conflicts_retried']:>6} {row['lost_updates']:>5} "
+            f"{row['throughput_per_s']:>8.2f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--mode", choices=["lock", "optimistic", "both"], default="both"
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=100, help="total turns per mode")
+    parser.add_argument(
+        "--graph-ms", type=float, default=300, help="simulated graph latency per turn"
+    )
+    parser.add_argument("--acquire-timeout", type=float, default=3.0)
+    parser.add_argument(
+        "--policy",
+        choices=["retry", "reject"],
+        default=state_manager.SESSION_CONFLICT_POLICY,
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=state_manager.SESSION_CAS_MAX_RETRIES
+    )
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        json.dump({"results": results}, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(results)
+
+
+if __name__ == "__main__":
+    main()
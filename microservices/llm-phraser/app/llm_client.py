@@ -1,12 +1,35 @@
 # Purpose: Isolates all external LLM API logic.
 
+from typing import AsyncIterator
+
 from groq import AsyncGroq
 from .schemas import PhraserInput
 from .prompt_templates import get_formatted_prompt
+from . import tracing
 import logging
 
 logger = logging.getLogger(__name__)
 
+MODEL = "llama-3.3-70b-versatile"  # Fast and capable model
+MAX_TOKENS = 512
+
+EMPTY_RESPONSE = "I'm sorry, I'm not sure how to respond to that."
+ERROR_RESPONSE = "We seem to be having a technical issue. Please try again in a moment."
+
+
+def _build_messages(input_data: PhraserInput) -> list:
+    system_prompt, user_prompt = get_formatted_prompt(input_data)
+    return [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": user_prompt,
+        },
+    ]
+
 
 # This is the "Adapter" for our LLM.
 # All the logic for calling the Groq API lives here.
@@ -16,34 +39,26 @@ async def generate_llm_response(input_data: PhraserInput, client: AsyncGroq) ->
     """
 
     # 1. Get the prompt
-    system_prompt, user_prompt = get_formatted_prompt(input_data)
+    messages = _build_messages(input_data)
 
     logger.info(f"Generating phrase for key: {input_data.response_key}")
 
     # 2. Call Groq API
     try:
-        chat_completion = await client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                },
-            ],
-            model="llama-3.3-70b-versatile",  # Fast and capable model
-            temperature=1,
-            max_tokens=512,
-        )
+        with tracing.span("groq.chat_completion", **{"llm.model": MODEL}):
+            chat_completion = await client.chat.completions.create(
+                messages=messages,
+                model=MODEL,
+                temperature=1,
+                max_tokens=MAX_TOKENS,
+            )
 
         # 3. Parse and return the response
         response_text = chat_completion.choices[0].message.content
 
         if not response_text:
             logger.error("LLM returned an empty response.")
-            return "I'm sorry, I'm not sure how to respond to that."
+            return EMPTY_RESPONSE
 
         logger.info(f"Generated response: {response_text}")
         return response_text
@@ -51,4 +66,45 @@ async def generate_llm_response(input_data: PhraserInput, client: AsyncGroq) ->
     except Exception as e:
         logger.error(f"Error calling Groq API: {e}", exc_info=True)
         # Return a safe, generic fallback response
-        return "We seem to be having a technical issue. Please try again in a moment."
+        return ERROR_RESPONSE
+
+
+# Streaming variant: yields text chunks as Groq produces them, so the first
+# words reach the user before the completion is finished.
+async def stream_llm_response(
+    input_data: PhraserInput, client: AsyncGroq
+) -> AsyncIterator[str]:
+    """
+    Streams a persuasive response from the Groq API, chunk by chunk.
+
+    On failure before any chunk was produced, the same fallback text as
+    generate_llm_response() is yielded; after a partial response the
+    stream simply ends.
+    """
+    messages = _build_messages(input_data)
+    logger.info(f"Streaming phrase for key: {input_data.response_key}")
+
+    emitted = False
+    try:
+        stream = await client.chat.completions.create(
+            messages=messages,
+            model=MODEL,
+            temperature=1,
+            max_tokens=MAX_TOKENS,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                emitted = True
+                yield delta
+
+    except Exception as e:
+        logger.error(f"Error streaming from Groq API: {e}", exc_info=True)
+        if not emitted:
+            yield ERROR_RESPONSE
+        return
+
+    if not emitted:
+        logger.error("LLM returned an empty stream.")
+        yield EMPTY_RESPONSE
@@ -1,11 +1,13 @@
 # Purpose: Initializes the FastAPI application and defines API endpoints.
 
 import os
+import json
+import time
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from .schemas import PhraserInput, PhraserOutput
 from prometheus_fastapi_instrumentator import Instrumentator
 from dotenv import load_dotenv
@@ -13,7 +15,8 @@ from dotenv import load_dotenv
 # --- Load environment variables from .env file ---
 load_dotenv()
 
-from .llm_client import generate_llm_response
+from .llm_client import MODEL, generate_llm_response, stream_llm_response
+from . import tracing
 
 from groq import AsyncGroq
 
@@ -34,10 +37,12 @@ if not API_KEY:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Load the client when the app starts
+    tracing.setup_tracing()
     app.state.groq_client = AsyncGroq(api_key=API_KEY)
     logger.info("Groq client initialized.")
     yield
     logger.info("Shutting down...")
+    tracing.shutdown_tracing()
 
 
 app = FastAPI(
@@ -51,6 +56,9 @@ app = FastAPI(
 # Prometheus Instrumentation
 Instrumentator().instrument(app).expose(app)
 
+# Tracing: server span per request, joined to the orchestrator's trace
+app.middleware("http")(tracing.trace_middleware)
+
 
 # ---------------------- Auth Middleware ----------------------
 @app.middleware("http")
@@ -105,3 +113,47 @@ async def generate_phrase(
         raise HTTPException(
             status_code=500, detail="An internal server error occurred."
         )
+
+
+# --- Streaming Phrasing Endpoint (Server-Sent Events) ---
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/v1/phrase/stream")
+async def generate_phrase_stream(
+    input_data: PhraserInput, client: AsyncGroq = Depends(get_groq_client)
+):
+    """
+    Same command as /api/v1/phrase, answered as a Server-Sent Events stream:
+
+        event: token   data: {"text": "<chunk>"}      (one per LLM chunk)
+        event: done    data: {"response_text": "<full text>"}
+    """
+
+    # The body is streamed after the request span has closed — parent the
+    # LLM span on the request's context explicitly.
+    parent = tracing.current_context()
+
+    async def event_stream():
+        parts = []
+        started = time.perf_counter()
+        with tracing.span(
+            "groq.chat_completion.stream", context=parent, **{"llm.model": MODEL}
+        ) as span:
+            async for piece in stream_llm_response(input_data, client):
+                if not parts and span is not None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    span.set_attribute("llm.time_to_first_token_ms", ttft_ms)
+                    span.add_event("first_token")
+                parts.append(piece)
+                yield _sse("token", {"text": piece})
+            if span is not None:
+                span.set_attribute("llm.chunks", len(parts))
+        yield _sse("done", {"response_text": "".join(parts)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -1,27 +1,58 @@
 """
 Offline DSPy Compilation Script — run this ONCE to produce nlu_compiled.json.
 
-This is NOT part of the FastAPI service. Run it from the project root:
+This is NOT part of the FastAPI service. Run it from microservices/nlu-service:
 
-    GROQ_API_KEY=your_key python -m nlu.compile_nlu
+    OPENAI_API_KEY=your_key python -m app.compile_nlu
+    OPENAI_API_KEY=your_key python -m app.compile_nlu --frontier
 
 What it does:
-    1. Defines the full labeled training set (20 examples)
-    2. Splits into 16 train / 4 validation
+    1. Defines the full labeled training set (RAW_EXAMPLES)
+    2. Splits it into train / validation
     3. Runs BootstrapFewShot optimizer
-    4. Saves the compiled program to nlu/nlu_compiled.json
+    4. Saves the compiled program to app/nlu_compiled.json
 
 The compiled file is then loaded by build_nlu_module() at service startup.
 Re-run this script whenever you add new training examples.
+
+--frontier (latency-aware compilation):
+    Compiles every entry of CANDIDATES — ChainOfThought or Predict (no
+    reasoning field), ChatAdapter or JSONAdapter (structured JSON output),
+    different demo counts. Each candidate is scored on nlu_metric accuracy
+    and on measured prompt/completion tokens and latency (--repeats calls
+    per example), by k-fold cross-validation over RAW_EXAMPLES (--folds):
+    each fold's program is compiled without that fold's examples and
+    scored on them, so every example is scored once per repeat by a
+    program that never saw it, and every candidate uses the same folds.
+    The program saved for a tier is then compiled on all examples. The
+    candidates no other candidate beats on both
+    accuracy and p50 latency (the Pareto frontier) are saved to
+    app/nlu_programs/<name>.json. app/nlu_programs/manifest.json lists
+    them fastest first, with their scores and every candidate's report.
+    The service loads one with NLU_PROGRAM_TIER=<name>|fastest|accurate.
+
+Offline (lm_cassette.py): NLU_LM_CASSETTE=record stores every LM call of a
+run; NLU_LM_CASSETTE=replay repeats the run from the cassette with no keys
+and no network.
 """
 
 import os
+import json
+import time
 import logging
+import argparse
 
 import dspy
 from dspy.teleprompt import BootstrapFewShot
 
-from .dspy_nlu import NLUModule, COMPILED_PATH
+from . import lm_cassette
+from .dspy_nlu import (
+    COMPILED_PATH,
+    MANIFEST_PATH,
+    NLU_OPENAI_BASE_URL,
+    PROGRAMS_DIR,
+    NLUModule,
+)
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s  %(message)s")
 logger = logging.getLogger(__name__)
@@ -298,17 +329,20 @@ def nlu_metric(example: dspy.Example, prediction: dspy.Prediction, trace=None) -
 # ---------------------------------------------------------------------------
 # 3. Compile
 # ---------------------------------------------------------------------------
-def compile_nlu(openai_api_key: str, groq_api_key: str):
+def make_lm(openai_api_key: str) -> dspy.LM:
     logger.info("Configuring DSPy LM: openai/gpt-4o-mini")
-    lm = dspy.LM(
+    return lm_cassette.make_lm(
         model="openai/gpt-4o-mini",
         api_key=openai_api_key,
         temperature=0.0,
         max_tokens=400,
         cache=False,
+        **({"api_base": NLU_OPENAI_BASE_URL} if NLU_OPENAI_BASE_URL else {}),
     )
-    dspy.configure(lm=lm)
 
+
+def split_examples():
+    """→ (all examples, trainset, valset)"""
     examples = [make_example(row) for row in RAW_EXAMPLES]
 
     # 16 train / 4 validation split -> Now 18 train / 4 validation
@@ -317,6 +351,14 @@ def compile_nlu(openai_api_key: str, groq_api_key: str):
     val_indices = {3, 7, 17, 20, 22}  # indices into RAW_EXAMPLES list
     trainset = [ex for i, ex in enumerate(examples) if i not in val_indices]
     valset = [ex for i, ex in enumerate(examples) if i in val_indices]
+    return examples, trainset, valset
+
+
+def compile_nlu(openai_api_key: str, groq_api_key: str):
+    lm = make_lm(openai_api_key)
+    dspy.configure(lm=lm)
+
+    examples, trainset, valset = split_examples()
 
     logger.info("Train: %d examples | Val: %d examples", len(trainset), len(valset))
 
@@ -369,14 +411,190 @@ def compile_nlu(openai_api_key: str, groq_api_key: str):
     logger.info("Compiled program saved to %s", COMPILED_PATH)
 
 
+# ---------------------------------------------------------------------------
+# 4. Latency-aware compilation — candidates, scoring, Pareto frontier
+# Prompt tokens (signature + demos) and output tokens (reasoning) drive
+# NLU latency, so candidates trade them against accuracy.
+# ---------------------------------------------------------------------------
+CANDIDATES = [
+    # ChainOfThought + ChatAdapter with 6 + 4 demos is nlu_compiled.json
+    {"name": "cot-10", "reasoning": True, "adapter": "chat", "bootstrapped": 6, "labeled": 4},
+    {"name": "cot-4", "reasoning": True, "adapter": "chat", "bootstrapped": 2, "labeled": 2},
+    {"name": "predict-10", "reasoning": False, "adapter": "chat", "bootstrapped": 6, "labeled": 4},
+    {"name": "predict-4", "reasoning": False, "adapter": "chat", "bootstrapped": 2, "labeled": 2},
+    {"name": "predict-0", "reasoning": False, "adapter": "chat", "bootstrapped": 0, "labeled": 0},
+    {"name": "json-10", "reasoning": False, "adapter": "json", "bootstrapped": 6, "labeled": 4},
+    {"name": "json-4", "reasoning": False, "adapter": "json", "bootstrapped": 2, "labeled": 2},
+    {"name": "json-0", "reasoning": False, "adapter": "json", "bootstrapped": 0, "labeled": 0},
+]
+
+
+def compile_candidate(candidate: dict, trainset: list) -> NLUModule:
+    student = NLUModule(candidate["reasoning"], candidate["adapter"])
+    if not candidate["bootstrapped"] and not candidate["labeled"]:
+        return student  # zero-shot: signature instructions only
+    teleprompter = BootstrapFewShot(
+        metric=nlu_metric,
+        max_bootstrapped_demos=candidate["bootstrapped"],
+        max_labeled_demos=candidate["labeled"],
+        max_rounds=1,
+    )
+    teacher = NLUModule(candidate["reasoning"], candidate["adapter"])
+    with dspy.context(adapter=student.adapter):
+        return teleprompter.compile(student=student, teacher=teacher, trainset=trainset)
+
+
+def _percentile_ms(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000
+
+
+def kfold(examples: list, k: int) -> list:
+    """k (train, held-out) splits; example i is held out in fold i % k (intents interleave)."""
+    return [
+        (
+            [ex for i, ex in enumerate(examples) if i % k != fold],
+            [ex for i, ex in enumerate(examples) if i % k == fold],
+        )
+        for fold in range(k)
+    ]
+
+
+def _run(program: NLUModule, lm: dspy.LM, examples: list, repeats: int, samples: dict):
+    """Append one sample per call to `samples` (correct, latency, tokens)."""
+    for _ in range(repeats):
+        for ex in examples:
+            samples["calls"] += 1
+            seen = len(lm.history)
+            started = time.perf_counter()
+            try:
+                with dspy.context(lm=lm, adapter=program.adapter):
+                    pred = program(user_message=ex.user_message)
+            except Exception as e:
+                logger.error("  !  %r  error: %s", ex.user_message, e)
+                continue  # counts as wrong; no latency sample
+            samples["latencies"].append(time.perf_counter() - started)
+            usage = [entry.get("usage") or {} for entry in lm.history[seen:]]
+            samples["prompt_tokens"].append(sum(u.get("prompt_tokens", 0) for u in usage))
+            samples["completion_tokens"].append(sum(u.get("completion_tokens", 0) for u in usage))
+            samples["correct"] += bool(nlu_metric(ex, pred))
+
+
+def _summary(samples: dict, eval_examples: int) -> dict:
+    latencies = samples["latencies"]
+    answered = len(latencies)
+    return {
+        "accuracy": samples["correct"] / samples["calls"] if samples["calls"] else 0.0,
+        "eval_examples": eval_examples,
+        "prompt_tokens": sum(samples["prompt_tokens"]) / answered if answered else 0.0,
+        "completion_tokens": sum(samples["completion_tokens"]) / answered if answered else 0.0,
+        "latency_p50_ms": _percentile_ms(latencies, 50),
+        "latency_p95_ms": _percentile_ms(latencies, 95),
+    }
+
+
+def _new_samples() -> dict:
+    return {"calls": 0, "correct": 0, "latencies": [], "prompt_tokens": [], "completion_tokens": []}
+
+
+def cross_validate(candidate: dict, lm: dspy.LM, folds: list, repeats: int) -> dict:
+    """
+    nlu_metric accuracy, mean tokens per call and latency, pooled over
+    `folds`; each fold is scored by a program compiled without it.
+    """
+    samples = _new_samples()
+    for trainset, held_out in folds:
+        _run(compile_candidate(candidate, trainset), lm, held_out, repeats, samples)
+    return _summary(samples, sum(len(held_out) for _, held_out in folds))
+
+
+def pareto_frontier(rows: list) -> list:
+    """Rows no other row beats on both accuracy and p50 latency, fastest first."""
+    frontier, best = [], -1.0
+    for row in sorted(rows, key=lambda r: (r["latency_p50_ms"], -r["accuracy"])):
+        if row["accuracy"] > best:
+            frontier.append(row)
+            best = row["accuracy"]
+    return frontier
+
+
+def compile_frontier(openai_api_key: str, names: list = None, repeats: int = 3, n_folds: int = 5):
+    lm = make_lm(openai_api_key)
+    dspy.configure(lm=lm)
+    # The same folds for every candidate, so accuracies are comparable
+    examples = [make_example(row) for row in RAW_EXAMPLES]
+    folds = kfold(examples, n_folds)
+
+    rows, programs = [], {}
+    for candidate in CANDIDATES:
+        if names and candidate["name"] not in names:
+            continue
+        logger.info("Cross-validating candidate %s (%d folds) ...", candidate["name"], n_folds)
+        scores = cross_validate(candidate, lm, folds, repeats)
+        program = compile_candidate(candidate, examples)
+        demos = sum(len(p.demos) for p in program.predictors())
+        row = dict(candidate, demos=demos, folds=n_folds, **scores)
+        logger.info(
+            "  %s: accuracy %.0f%% | %.0f prompt + %.0f completion tokens | p50 %.0f ms",
+            row["name"], row["accuracy"] * 100, row["prompt_tokens"],
+            row["completion_tokens"], row["latency_p50_ms"],
+        )
+        rows.append(row)
+        programs[row["name"]] = program
+
+    frontier = pareto_frontier(rows)
+    PROGRAMS_DIR.mkdir(exist_ok=True)
+    for row in frontier:
+        row["file"] = f"{row['name']}.json"
+        programs[row["name"]].save(str(PROGRAMS_DIR / row["file"]))
+    for row in rows:
+        row["frontier"] = row in frontier
+
+    manifest = {
+        "compiled_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "model": lm.model,
+        "dspy": dspy.__version__,
+        "repeats": repeats,
+        "folds": n_folds,
+        "tiers": frontier,  # fastest first; last = most accurate
+        "candidates": rows,
+    }
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+    logger.info("Pareto frontier (NLU_PROGRAM_TIER):")
+    for row in frontier:
+        logger.info(
+            "  %-12s accuracy %3.0f%%  p50 %5.0f ms  p95 %5.0f ms  %4.0f+%-4.0f tokens",
+            row["name"], row["accuracy"] * 100, row["latency_p50_ms"],
+            row["latency_p95_ms"], row["prompt_tokens"], row["completion_tokens"],
+        )
+    logger.info("Tiers saved to %s", MANIFEST_PATH)
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the DSPy NLU program.")
+    parser.add_argument(
+        "--frontier",
+        action="store_true",
+        help="compile CANDIDATES and save the accuracy/latency Pareto tiers",
+    )
+    parser.add_argument("--candidates", nargs="*", help="candidate names (default: all)")
+    parser.add_argument("--repeats", type=int, default=3, help="timed calls per example")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds (--frontier)")
+    args = parser.parse_args()
+
     openai_api_key = os.getenv("OPENAI_API_KEY", "")
     groq_api_key = os.getenv("GROQ_API_KEY", "")
-    if not openai_api_key and not groq_api_key:
+    if not openai_api_key and not groq_api_key and lm_cassette.NLU_LM_CASSETTE != "replay":
         raise EnvironmentError(
             "Both OPENAI_API_KEY and GROQ_API_KEY environment variables are not set."
         )
-    compile_nlu(openai_api_key, groq_api_key)
+    if args.frontier:
+        compile_frontier(openai_api_key, args.candidates, args.repeats, args.folds)
+    else:
+        compile_nlu(openai_api_key, groq_api_key)
@@ -6,18 +6,72 @@ compiled DSPy pipeline that produces structured, validated output.
 
 Model  : llama-3.3-70b-versatile via Groq
 Compile: Run compile_nlu.py once offline → produces nlu_compiled.json
+         (--frontier: accuracy/latency Pareto tiers in nlu_programs/)
 Runtime: Loads compiled state at startup — no prompt engineering at runtime
+         (NLU_PROGRAM_TIER picks a latency tier from nlu_programs/)
+Offline: NLU_LM_CASSETTE=record|replay records / replays LM calls
+         (lm_cassette.py)
+Batching: NLUBatcher (experimental, off by default) groups concurrent
+          parses and dispatches each group's calls to the LM pool — one
+          provider request per message (NLU_BATCHING, NLU_BATCH_MAX_SIZE, NLU_BATCH_MAX_WAIT_MS,
+          NLU_BATCH_MAX_INFLIGHT; metrics nlu_batch_size,
+          nlu_batch_queue_delay_seconds, nlu_batch_queue_depth)
+Execution: NLU_LM_EXECUTION=thread → blocking DSPy calls on a dedicated,
+           instrumented thread pool; async → module.acall(), no thread per
+           parse (dspy>=3). Both bounded and instrumented by lm_pool.py.
+Hedging: NLU_HEDGING starts the fallback LM when the primary is slower
+         than its recent latency percentile; first valid answer wins
+         (hedging.py).
 """
 
+import os
+import json
+import time
+import asyncio
+import hashlib
 import logging
 from typing import Optional
 from pathlib import Path
 
 import dspy
+from prometheus_client import Gauge, Histogram
+
+from . import hedging, lm_cassette, lm_pool, tracing
 
 logger = logging.getLogger(__name__)
 
 COMPILED_PATH = Path(__file__).parent / "nlu_compiled.json"
+# Latency tiers written by `compile_nlu --frontier` (manifest + one program each)
+PROGRAMS_DIR = Path(__file__).parent / "nlu_programs"
+MANIFEST_PATH = PROGRAMS_DIR / "manifest.json"
+
+# Program to load: "" → nlu_compiled.json; a tier name from the manifest,
+# "fastest" or "accurate" → that tier from nlu_programs/
+NLU_PROGRAM_TIER = os.getenv("NLU_PROGRAM_TIER", "").strip()
+
+# Micro-batching of concurrent parses (NLUBatcher) — experimental, see its docstring
+NLU_BATCHING = os.getenv("NLU_BATCHING", "false").lower() == "true"
+NLU_BATCH_MAX_SIZE = int(os.getenv("NLU_BATCH_MAX_SIZE", 16))
+NLU_BATCH_MAX_WAIT_MS = float(os.getenv("NLU_BATCH_MAX_WAIT_MS", 5))
+NLU_BATCH_MAX_INFLIGHT = int(os.getenv("NLU_BATCH_MAX_INFLIGHT", 4))
+
+# LM execution: "thread" (LM thread pool) or "async" (DSPy async, dspy>=3)
+NLU_LM_EXECUTION = os.getenv("NLU_LM_EXECUTION", "thread").lower()
+# API roots, e.g. a local OpenAI-compatible stub (default: the public APIs)
+NLU_OPENAI_BASE_URL = os.getenv("NLU_OPENAI_BASE_URL", "")
+NLU_GROQ_BASE_URL = os.getenv("NLU_GROQ_BASE_URL", "")
+
+BATCH_SIZE = Histogram(
+    "nlu_batch_size",
+    "Messages per NLUBatcher group (one LM call each).",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+BATCH_QUEUE_DELAY = Histogram(
+    "nlu_batch_queue_delay_seconds",
+    "Time a parse waited in the batching queue before its batch was dispatched.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+BATCH_QUEUE_DEPTH = Gauge("nlu_batch_queue_depth", "Parses waiting for a batch.")
 
 
 # ---------------------------------------------------------------------------
@@ -108,6 +162,9 @@ class NLUSignature(dspy.Signature):
 # ---------------------------------------------------------------------------
 # DSPy Module
 # ---------------------------------------------------------------------------
+ADAPTERS = {"chat": dspy.ChatAdapter, "json": dspy.JSONAdapter}
+
+
 class NLUModule(dspy.Module):
     """
     Single-hop DSPy module for NLU parsing.
@@ -115,15 +172,30 @@ class NLUModule(dspy.Module):
     Uses ChainOfThought so the model reasons step-by-step before committing
     to structured output — this significantly improves INVALID detection
     accuracy on edge cases (math, barter offers, gibberish).
+
+    Args:
+        reasoning: False → dspy.Predict, no reasoning field (fewer output
+            tokens, faster; a compile_nlu --frontier candidate).
+        adapter: "chat" (DSPy's default field markers) or "json"
+            (structured JSON output).
     """
 
-    def __init__(self):
+    def __init__(self, reasoning: bool = True, adapter: str = "chat"):
         super().__init__()
-        self.predict = dspy.ChainOfThought(NLUSignature)
+        self.reasoning = reasoning
+        self.adapter_name = adapter
+        self.adapter = ADAPTERS[adapter]()
+        if reasoning:
+            self.predict = dspy.ChainOfThought(NLUSignature)
+        else:
+            self.predict = dspy.Predict(NLUSignature)
 
     def forward(self, user_message: str) -> dspy.Prediction:
         return self.predict(user_message=user_message)
 
+    async def aforward(self, user_message: str) -> dspy.Prediction:
+        return await self.predict.acall(user_message=user_message)
+
 
 # ---------------------------------------------------------------------------
 # Price parser — safely converts DSPy string output to float | None
@@ -162,6 +234,270 @@ def _sanitize_intent(raw: str) -> str:
     return "UNKNOWN"
 
 
+# ---------------------------------------------------------------------------
+# Program version — changes whenever the prompt program or its LMs change
+# ---------------------------------------------------------------------------
+def program_version(*lms, path: Path = COMPILED_PATH, adapter: str = "chat") -> str:
+    """
+    Short hash of the compiled program (nlu_compiled.json or the chosen
+    tier), the signature instructions, the adapter and the LM models.
+    Used to key the NLU result cache so results from an older program are
+    never served.
+    """
+    digest = hashlib.sha256()
+    digest.update(path.read_bytes() if path.exists() else b"uncompiled")
+    digest.update(NLUSignature.instructions.encode("utf-8"))
+    if adapter != "chat":
+        digest.update(adapter.encode("utf-8"))
+    for lm in lms:
+        digest.update(str(getattr(lm, "model", lm)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# LM execution — LM pool threads (sync DSPy) or DSPy async (no thread)
+# ---------------------------------------------------------------------------
+def _run_with_lm(module: NLUModule, text: str, lm, label: str, parent) -> dspy.Prediction:
+    with tracing.span(
+        "nlu.lm_call",
+        context=parent,
+        **{"nlu.lm": label, "llm.model": getattr(lm, "model", None)},
+    ):
+        with dspy.context(lm=lm, adapter=module.adapter):
+            return module(user_message=text)
+
+
+def _predict(module: NLUModule, text: str, submitted_ns: int, parent):
+    """One message: primary LM, then the fallback LM. → (prediction, lm label)"""
+    tracing.record_span("nlu.executor_queue", submitted_ns, context=parent)
+    try:
+        return _run_with_lm(module, text, module.primary_lm, "primary", parent), "primary"
+    except Exception as e:
+        logger.warning("[DSPy NLU] Primary LM failed (%s) — falling back to Groq.", e)
+        return _run_with_lm(module, text, module.fallback_lm, "fallback", parent), "fallback"
+
+
+async def _predict_batched(
+    module: NLUModule, text: str, submitted_ns: int, parent, batch_size: int
+):
+    """
+    One message of an NLUBatcher batch: the primary LM call on the LM pool,
+    then — as soon as that call fails — the fallback, independent of the
+    rest of the batch. → (prediction, lm label)
+    """
+    tracing.record_span("nlu.batch_queue", submitted_ns, context=parent)
+    started_ns = time.time_ns()
+    try:
+        try:
+            prediction = await lm_pool.pool.run(
+                _run_with_lm, module, text, module.primary_lm, "primary", parent
+            )
+            return prediction, "primary"
+        except Exception as e:
+            logger.warning("[DSPy NLU] Primary LM failed (%s) — falling back to Groq.", e)
+            prediction = await lm_pool.pool.run(
+                _run_with_lm, module, text, module.fallback_lm, "fallback", parent
+            )
+            return prediction, "fallback"
+    finally:
+        tracing.record_span(
+            "nlu.lm_batch",
+            started_ns,
+            context=parent,
+            **{"nlu.batch_size": batch_size, "llm.model": getattr(module.primary_lm, "model", None)},
+        )
+
+
+async def _arun_with_lm(module: NLUModule, text: str, lm, label: str) -> dspy.Prediction:
+    with tracing.span(
+        "nlu.lm_call", **{"nlu.lm": label, "llm.model": getattr(lm, "model", None)}
+    ):
+        # dspy>=3 keeps context overrides in a ContextVar: safe per coroutine
+        with dspy.context(lm=lm, adapter=module.adapter):
+            return await module.acall(user_message=text)
+
+
+def _is_valid(prediction: dspy.Prediction) -> bool:
+    """Usable NLU answer: a known intent and every output field present."""
+    fields = ("intent", "price", "sentiment", "language", "error_message")
+    if any(getattr(prediction, name, None) is None for name in fields):
+        return False
+    return prediction.intent.strip().upper() in _VALID_INTENTS - {"UNKNOWN"}
+
+
+async def _hedged_predict(module: NLUModule, text: str):
+    """Primary LM, raced by the fallback LM once it is slow. → (prediction, lm label)"""
+    parent = tracing.current_context()
+    lms = {"primary": module.primary_lm, "fallback": module.fallback_lm}
+
+    async def call(label: str):
+        if module.execution == "async":
+            async with lm_pool.slots.acquire():
+                return await _arun_with_lm(module, text, lms[label], label)
+        return await lm_pool.pool.run(_run_with_lm, module, text, lms[label], label, parent)
+
+    return await module.hedger.run(call, _is_valid)
+
+
+async def _apredict(module: NLUModule, text: str):
+    """Async path: primary LM, then the fallback LM. → (prediction, lm label)"""
+    async with lm_pool.slots.acquire():
+        try:
+            return await _arun_with_lm(module, text, module.primary_lm, "primary"), "primary"
+        except Exception as e:
+            logger.warning("[DSPy NLU] Primary LM failed (%s) — falling back to Groq.", e)
+            return await _arun_with_lm(module, text, module.fallback_lm, "fallback"), "fallback"
+
+
+# ---------------------------------------------------------------------------
+# Micro-batching scheduler
+# ---------------------------------------------------------------------------
+class NLUBatcher:
+    """
+    Groups concurrent parse() calls and dispatches each group to the LM pool.
+    Experimental and off by default (NLU_BATCHING=false).
+
+    This is a concurrency grouper, not request batching: every message is
+    still its own provider request with its own prompt (one user's text
+    never shares a prompt with another's), so per-request overhead and
+    rate-limit pressure are unchanged, and benchmarks/nlu_lm_execution_bench
+    shows no throughput gain over plain thread execution. The calls run on
+    lm_pool.pool, so NLU_LM_THREADS bounds them and the pool metrics count
+    LM calls.
+
+    Idle engine → a request is dispatched at once (no added latency).
+    Under load the batch fills from the queue: the wait window grows with
+    the share of message slots in use (0 → max_wait) and the batch takes
+    everything queued, up to max_size. At most max_size * max_inflight
+    messages run at a time; the rest waits in the queue. Each message
+    completes on its own — its fallback starts as soon as its primary
+    call fails and its slot is freed when it answers, without waiting for
+    the rest of its batch.
+
+    Args:
+        module: The NLU module (with primary_lm / fallback_lm).
+        max_size: Messages per batch.
+        max_wait_ms: Longest wait for a batch to fill (at full load).
+        max_inflight: Batches' worth of messages executing concurrently.
+    """
+
+    def __init__(
+        self,
+        module: NLUModule,
+        max_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_inflight: int = 4,
+    ):
+        self.module = module
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.capacity = max_size * max_inflight
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None  # one per message in flight
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight = 0
+        self._tasks: set = set()
+
+    async def submit(self, text: str):
+        """(prediction, lm label) for `text`, parsed as part of a batch."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.capacity)
+            self._worker = asyncio.create_task(self._dispatch_loop())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(
+            (text, future, time.monotonic(), time.time_ns(), tracing.current_context())
+        )
+        BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return await future
+
+    async def _dispatch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait * self._inflight / self.capacity
+            # Only this loop acquires slots: one left here is still there below
+            while len(batch) < self.max_size and not self._slots.locked():
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                await self._slots.acquire()
+                batch.append(item)
+            BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+
+            live = [item for item in batch if not item[1].done()]  # callers gone
+            for _ in range(len(batch) - len(live)):
+                self._slots.release()
+            if not live:
+                continue
+            dispatched = time.monotonic()
+            BATCH_SIZE.observe(len(live))
+            for item in live:
+                BATCH_QUEUE_DELAY.observe(dispatched - item[2])
+                self._inflight += 1
+                task = asyncio.create_task(self._execute(item, len(live)))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, item: tuple, batch_size: int):
+        text, future, _, submitted_ns, parent = item
+        try:
+            outcome = await _predict_batched(self.module, text, submitted_ns, parent, batch_size)
+            if not future.done():
+                future.set_result(outcome)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._inflight -= 1
+            self._slots.release()
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+
+
+# ---------------------------------------------------------------------------
+# Latency tiers (compile_nlu --frontier)
+# ---------------------------------------------------------------------------
+def select_program(tier: str) -> Optional[dict]:
+    """
+    Manifest entry for `tier` — "fastest", "accurate" or a tier name — or
+    None for the default program (nlu_compiled.json).
+    """
+    if not tier:
+        return None
+    if not MANIFEST_PATH.exists():
+        logger.warning(
+            "[DSPy NLU] NLU_PROGRAM_TIER=%s but %s is missing — using %s.",
+            tier, MANIFEST_PATH, COMPILED_PATH.name,
+        )
+        return None
+    tiers = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))["tiers"]  # fastest first
+    if tier == "fastest":
+        return tiers[0]
+    if tier == "accurate":
+        return tiers[-1]
+    for entry in tiers:
+        if entry["name"] == tier:
+            return entry
+    logger.warning(
+        "[DSPy NLU] Unknown NLU_PROGRAM_TIER=%s (tiers: %s) — using %s.",
+        tier, ", ".join(entry["name"] for entry in tiers), COMPILED_PATH.name,
+    )
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -170,37 +506,72 @@ def build_nlu_module(openai_api_key: str, groq_api_key: str) -> NLUModule:
     Configure DSPy LMs and return a ready-to-use NLUModule.
 
     Sets up OpenAI (gpt-4o-mini) as the primary LM and Groq (llama-3.1-8b-instant)
-    as the fallback. Loads compiled state if available.
+    as the fallback. Loads compiled state if available — nlu_compiled.json,
+    or the NLU_PROGRAM_TIER program from nlu_programs/.
     """
-    primary_lm = dspy.LM(
+    primary_lm = lm_cassette.make_lm(
         model="openai/gpt-4o-mini",
         api_key=openai_api_key,
         temperature=0.0,
         max_tokens=400,
         cache=False,
+        **({"api_base": NLU_OPENAI_BASE_URL} if NLU_OPENAI_BASE_URL else {}),
     )
-    fallback_lm = dspy.LM(
+    fallback_lm = lm_cassette.make_lm(
         model="groq/llama-3.1-8b-instant",
         api_key=groq_api_key,
         temperature=0.0,
         max_tokens=400,
         cache=False,
+        **({"api_base": NLU_GROQ_BASE_URL} if NLU_GROQ_BASE_URL else {}),
     )
 
     dspy.configure(lm=primary_lm)
 
-    module = NLUModule()
+    program = select_program(NLU_PROGRAM_TIER)
+    if program is None:
+        module, path = NLUModule(), COMPILED_PATH
+    else:
+        module = NLUModule(reasoning=program["reasoning"], adapter=program["adapter"])
+        path = PROGRAMS_DIR / program["file"]
+    module.tier = program["name"] if program else None
     module.primary_lm = primary_lm
     module.fallback_lm = fallback_lm
+    module.program_version = program_version(
+        primary_lm, fallback_lm, path=path, adapter=module.adapter_name
+    )
+    module.execution = NLU_LM_EXECUTION
+    if module.execution == "async" and int(dspy.__version__.split(".")[0]) < 3:
+        # dspy<3 keeps dspy.context() thread-local: concurrent coroutines
+        # on the event loop thread would see each other's LM
+        logger.warning("[DSPy NLU] NLU_LM_EXECUTION=async needs dspy>=3 — using threads.")
+        module.execution = "thread"
+    # Batching groups thread-mode calls on the LM pool; async parses skip it.
+    # Hedged parses race per message, so hedging turns batching off.
+    module.hedger = hedging.from_env()
+    module.batcher = None
+    if NLU_BATCHING and module.hedger is not None:
+        logger.info("[DSPy NLU] NLU_HEDGING is on — micro-batching off.")
+    elif NLU_BATCHING and module.execution == "thread":
+        module.batcher = NLUBatcher(
+            module, NLU_BATCH_MAX_SIZE, NLU_BATCH_MAX_WAIT_MS, NLU_BATCH_MAX_INFLIGHT
+        )
 
-    if COMPILED_PATH.exists():
-        module.load(str(COMPILED_PATH))
-        logger.info("[DSPy NLU] Loaded compiled state from %s", COMPILED_PATH)
+    if path.exists():
+        module.load(str(path))
+        if program is None:
+            logger.info("[DSPy NLU] Loaded compiled state from %s", path)
+        else:
+            logger.info(
+                "[DSPy NLU] Loaded tier %r from %s (accuracy %.0f%%, p50 %.0f ms, %d demos)",
+                program["name"], path, program["accuracy"] * 100,
+                program["latency_p50_ms"], program["demos"],
+            )
     else:
         logger.warning(
             "[DSPy NLU] No compiled state found at %s — "
             "running uncompiled. Run compile_nlu.py to optimize.",
-            COMPILED_PATH,
+            path,
         )
 
     return module
@@ -212,23 +583,25 @@ async def parse(text: str, module: NLUModule) -> dict:
 
     Drop-in async replacement for llm_nlu.parse().
     Uses primary LM first (OpenAI), then falls back to Groq if rate limits or errors occur.
+    NLU_LM_EXECUTION=async awaits DSPy's async path (no thread); otherwise
+    the call runs on the LM thread pool, grouped with concurrent calls when
+    NLU_BATCHING is on (see NLUBatcher). NLU_HEDGING races the fallback LM
+    against a slow primary instead of waiting for it to fail (hedging.py).
     """
     logger.info("[DSPy NLU] Parsing: %r", text)
 
-    import asyncio
-
-    def _run_with_lm(lm):
-        with dspy.context(lm=lm):
-            return module(user_message=text)
-
-    try:
-        result = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: _run_with_lm(module.primary_lm)
-        )
-    except Exception as e:
-        logger.warning("[DSPy NLU] Primary LM failed (%s) — falling back to Groq.", e)
-        result = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: _run_with_lm(module.fallback_lm)
+    batcher = getattr(module, "batcher", None)
+    if getattr(module, "hedger", None) is not None:
+        result, lm_used = await _hedged_predict(module, text)
+    elif getattr(module, "execution", "thread") == "async":
+        result, lm_used = await _apredict(module, text)
+    elif batcher is not None:
+        result, lm_used = await batcher.submit(text)
+    else:
+        # The DSPy call runs on the LM thread pool: hand it the request's
+        # trace context so its spans stay inside the request trace.
+        result, lm_used = await lm_pool.pool.run(
+            _predict, module, text, time.time_ns(), tracing.current_context()
         )
 
     intent = _sanitize_intent(result.intent)
@@ -264,4 +637,5 @@ async def parse(text: str, module: NLUModule) -> dict:
         "sentiment": result.sentiment.strip().lower(),
         "language": result.language.strip().lower(),
         "error_message": error_message,
+        "lm": lm_used,  # which LM answered (the result cache keeps primary only)
     }
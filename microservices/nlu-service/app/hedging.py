@@ -0,0 +1,236 @@
+"""
+Hedged primary/fallback LM requests — the fallback starts when the primary is slow.
+
+Problem (before):
+    dspy_nlu.parse only called the Groq fallback after gpt-4o-mini had
+    failed outright — after the full request timeout plus LiteLLM's
+    retries. A slow primary therefore cost its whole timeout, and a
+    failing one cost that plus the fallback call.
+
+Solution:
+    Hedger.run() starts the primary LM call. If it has not answered after
+    the hedge delay, the fallback call starts too. The first valid
+    prediction wins and the other call is cancelled. A primary that fails
+    before the delay starts the fallback at once (plain fallback, no
+    hedge).
+
+    The hedge delay is a percentile (NLU_HEDGE_PERCENTILE) of the primary's
+    recent latencies (LatencyWindow, last NLU_HEDGE_WINDOW calls). It is
+    clamped to [NLU_HEDGE_MIN_DELAY_MS, NLU_HEDGE_MAX_DELAY_MS]. Until
+    NLU_HEDGE_MIN_SAMPLES calls have been seen, NLU_HEDGE_DELAY_MS is used.
+    A cancelled call is recorded with its elapsed time, which is a lower
+    bound, so a slow provider still pushes its own percentile up.
+
+    Thread execution (lm_pool.LMPool): a cancelled call that is still
+    queued never runs. One that is already running finishes on its thread
+    and its answer is dropped. With NLU_LM_EXECUTION=async the HTTP
+    request itself is cancelled. Hedging replaces micro-batching
+    (NLUBatcher), because each message has to race on its own.
+
+Config (env):
+    NLU_HEDGING                    "true" to enable (default: false)
+    NLU_HEDGE_PERCENTILE           primary latency percentile (default: 95)
+    NLU_HEDGE_WINDOW               latencies kept per provider (default: 500)
+    NLU_HEDGE_MIN_SAMPLES          samples before the percentile is used (default: 50)
+    NLU_HEDGE_DELAY_MS             delay until then (default: 1500)
+    NLU_HEDGE_MIN_DELAY_MS         lower clamp (default: 100)
+    NLU_HEDGE_MAX_DELAY_MS         upper clamp (default: 5000)
+    NLU_HEDGE_COST_PRIMARY_USD     estimated cost of one primary call (default: 0.0003)
+    NLU_HEDGE_COST_FALLBACK_USD    estimated cost of one fallback call (default: 0.0001)
+
+Metrics:
+    nlu_hedge_parses_total                   parses run through the hedger
+    nlu_hedge_fired_total                    hedges started (hedge rate = fired / parses)
+    nlu_hedge_wins_total{lm}                 hedged races won per provider
+    nlu_hedge_extra_calls_total{lm}          losing calls still in flight when the winner answered
+    nlu_hedge_extra_cost_usd_total{lm}       their estimated cost
+    nlu_hedge_delay_seconds                  current hedge delay
+    nlu_lm_latency_seconds{lm}               successful LM call latency per provider
+"""
+
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+NLU_HEDGING = os.getenv("NLU_HEDGING", "false").lower() == "true"
+NLU_HEDGE_PERCENTILE = float(os.getenv("NLU_HEDGE_PERCENTILE", 95))
+NLU_HEDGE_WINDOW = int(os.getenv("NLU_HEDGE_WINDOW", 500))
+NLU_HEDGE_MIN_SAMPLES = int(os.getenv("NLU_HEDGE_MIN_SAMPLES", 50))
+NLU_HEDGE_DELAY_MS = float(os.getenv("NLU_HEDGE_DELAY_MS", 1500))
+NLU_HEDGE_MIN_DELAY_MS = float(os.getenv("NLU_HEDGE_MIN_DELAY_MS", 100))
+NLU_HEDGE_MAX_DELAY_MS = float(os.getenv("NLU_HEDGE_MAX_DELAY_MS", 5000))
+NLU_HEDGE_COST_PRIMARY_USD = float(os.getenv("NLU_HEDGE_COST_PRIMARY_USD", 0.0003))
+NLU_HEDGE_COST_FALLBACK_USD = float(os.getenv("NLU_HEDGE_COST_FALLBACK_USD", 0.0001))
+
+PROVIDERS = ("primary", "fallback")
+
+HEDGE_PARSES = Counter("nlu_hedge_parses_total", "Parses run through the hedged LM path.")
+HEDGE_FIRED = Counter("nlu_hedge_fired_total", "Fallback LM calls started because the primary was slow.")
+HEDGE_WINS = Counter("nlu_hedge_wins_total", "Hedged races won, per provider.", ["lm"])
+HEDGE_EXTRA_CALLS = Counter(
+    "nlu_hedge_extra_calls_total",
+    "Hedged-race calls still in flight when the other provider answered.",
+    ["lm"],
+)
+HEDGE_EXTRA_COST = Counter(
+    "nlu_hedge_extra_cost_usd_total", "Estimated cost of the losing hedged calls (USD).", ["lm"]
+)
+HEDGE_DELAY = Gauge("nlu_hedge_delay_seconds", "Current hedge delay.")
+LM_LATENCY = Histogram(
+    "nlu_lm_latency_seconds",
+    "Latency of successful NLU LM calls, per provider.",
+    ["lm"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+
+
+class LatencyWindow:
+    """
+    The most recent `size` latencies of one provider, in seconds.
+
+    Args:
+        size: Samples kept; older ones drop out.
+    """
+
+    def __init__(self, size: int = 500):
+        self._samples: deque = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        return float(np.percentile(np.fromiter(self._samples, dtype=np.float64), q))
+
+
+class Hedger:
+    """
+    Races the fallback LM against a slow primary LM call.
+
+    Args:
+        percentile: Primary latency percentile used as the hedge delay.
+        window: Latencies kept per provider.
+        min_samples: Primary samples needed before the percentile is used.
+        delay_ms: Hedge delay until then.
+        min_delay_ms: Lower clamp for the hedge delay.
+        max_delay_ms: Upper clamp for the hedge delay.
+        costs: Estimated USD per call, per provider.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        window: int = 500,
+        min_samples: int = 50,
+        delay_ms: float = 1500.0,
+        min_delay_ms: float = 100.0,
+        max_delay_ms: float = 5000.0,
+        costs: Optional[dict] = None,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = delay_ms / 1000
+        self.min_delay = min_delay_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self.costs = costs or {}
+        self.latency = {label: LatencyWindow(window) for label in PROVIDERS}
+        HEDGE_DELAY.set(self.default_delay)
+
+    def delay(self) -> float:
+        """Seconds to wait for the primary before starting the fallback."""
+        window = self.latency["primary"]
+        if len(window) < self.min_samples:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, window.percentile(self.percentile)))
+
+    async def run(self, call: Callable, valid: Callable):
+        """
+        call(label) → awaitable prediction for "primary" / "fallback";
+        valid(prediction) → bool. → (prediction, lm label)
+
+        Neither answer valid → the primary's answer is returned if there is
+        one (same as the unhedged path), else the last error is raised.
+        """
+        HEDGE_PARSES.inc()
+        loop = asyncio.get_running_loop()
+        tasks, started = {}, {}
+
+        def launch(label: str):
+            started[label] = loop.time()
+            tasks[asyncio.ensure_future(call(label))] = label
+
+        delay = self.delay()
+        HEDGE_DELAY.set(delay)
+        launch("primary")
+        hedged, answers, error, winner = False, {}, None, None
+        try:
+            while tasks:
+                timeout = None
+                if "fallback" not in started:
+                    timeout = max(0.0, started["primary"] + delay - loop.time())
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    HEDGE_FIRED.inc()
+                    logger.info("[Hedge] Primary LM slower than %.0f ms — starting fallback.", delay * 1000)
+                    launch("fallback")
+                    continue
+
+                for task in done:
+                    label = tasks.pop(task)
+                    elapsed = loop.time() - started[label]
+                    if task.exception() is not None:
+                        error = task.exception()
+                        logger.warning("[Hedge] %s LM failed (%s).", label, error)
+                    else:
+                        self.latency[label].observe(elapsed)
+                        LM_LATENCY.labels(lm=label).observe(elapsed)
+                        answers[label] = task.result()
+                        if valid(answers[label]):
+                            winner = label
+                            if hedged:
+                                HEDGE_WINS.labels(lm=label).inc()
+                            return answers[label], label
+                        logger.warning("[Hedge] %s LM returned an invalid prediction.", label)
+                    if "fallback" not in started:
+                        launch("fallback")  # primary done without a valid answer
+        finally:
+            for task, label in tasks.items():
+                task.cancel()
+                self.latency[label].observe(loop.time() - started[label])  # lower bound
+                if winner is not None:
+                    HEDGE_EXTRA_CALLS.labels(lm=label).inc()
+                    HEDGE_EXTRA_COST.labels(lm=label).inc(self.costs.get(label, 0.0))
+
+        for label in PROVIDERS:
+            if label in answers:
+                return answers[label], label
+        raise error
+
+
+def from_env() -> Optional[Hedger]:
+    """Hedger configured from NLU_HEDGE_*, or None when NLU_HEDGING is off."""
+    if not NLU_HEDGING:
+        return None
+    return Hedger(
+        percentile=NLU_HEDGE_PERCENTILE,
+        window=NLU_HEDGE_WINDOW,
+        min_samples=NLU_HEDGE_MIN_SAMPLES,
+        delay_ms=NLU_HEDGE_DELAY_MS,
+        min_delay_ms=NLU_HEDGE_MIN_DELAY_MS,
+        max_delay_ms=NLU_HEDGE_MAX_DELAY_MS,
+        costs={"primary": NLU_HEDGE_COST_PRIMARY_USD, "fallback": NLU_HEDGE_COST_FALLBACK_USD},
+    )
@@ -0,0 +1,241 @@
+"""
+Record/replay cassettes for the NLU LMs — offline compilation, evaluation and load tests.
+
+Problem (before):
+    build_nlu_module and compile_nlu create plain dspy.LM clients with
+    cache=False, so every NLU parse, compile run and validation pass needs
+    live OpenAI/Groq keys and network access. An offline machine could
+    not benchmark or regression-test anything NLU-related, and live runs
+    are not repeatable.
+
+Solution:
+    make_lm() builds the LMs. With NLU_LM_CASSETTE set it returns a
+    CassetteLM, which is a dspy.LM whose forward/aforward go through a
+    Cassette:
+
+    - record: calls the provider as usual and stores request → response
+      (plus the measured latency) in the cassette file
+    - replay: answers from the cassette only and never opens a
+      connection. A request that is not in the cassette raises
+      CassetteMiss, like a failed LM call: parse falls back, compile and
+      evaluation count it as an error.
+
+    Key = hash of the model, the prompt messages (whitespace-normalised)
+    and the request parameters that change the answer (temperature,
+    max_tokens, response_format, ...). API keys and base URLs are not part
+    of the key, so a cassette recorded against one endpoint replays
+    against any.
+
+    Store: gzip-compressed JSON lines, one per recorded call. Only what
+    DSPy reads is kept: the choices' role/content/finish_reason, usage and
+    model. The file is append-only, so a crash loses at most the last
+    line. The last line recorded for a key wins.
+
+    Replay latency (NLU_LM_CASSETTE_LATENCY): "none" answers at once,
+    "recorded" sleeps the call's recorded latency, and a number sleeps
+    that many ms. Async parses sleep without blocking the loop.
+
+Config (env):
+    NLU_LM_CASSETTE            off | record | replay (default: off)
+    NLU_LM_CASSETTE_PATH       cassette file (default: app/cassettes/nlu_lm.jsonl.gz)
+    NLU_LM_CASSETTE_LATENCY    none | recorded | <ms> (default: none)
+
+Metrics:
+    nlu_lm_cassette_events_total{event=hit|miss|record}
+
+Usage:
+    NLU_LM_CASSETTE=record OPENAI_API_KEY=... python -m app.compile_nlu --frontier
+    NLU_LM_CASSETTE=replay python -m app.compile_nlu --frontier   # offline, same result
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import dspy
+from litellm import ModelResponse
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+NLU_LM_CASSETTE = os.getenv("NLU_LM_CASSETTE", "off").lower()
+NLU_LM_CASSETTE_PATH = os.getenv(
+    "NLU_LM_CASSETTE_PATH", str(Path(__file__).parent / "cassettes" / "nlu_lm.jsonl.gz")
+)
+NLU_LM_CASSETTE_LATENCY = os.getenv("NLU_LM_CASSETTE_LATENCY", "none").lower()
+
+CASSETTE_EVENTS = Counter(
+    "nlu_lm_cassette_events_total",
+    "LM cassette events (hit = replayed, miss = not in cassette, record = stored).",
+    ["event"],
+)
+
+# Request parameters that change the answer; everything else (api_key,
+# api_base, num_retries, cache ...) is ignored for the key
+_KEY_PARAMS = ("temperature", "max_tokens", "top_p", "n", "stop", "response_format", "tools", "rollout_id")
+
+
+class CassetteMiss(LookupError):
+    """Replay mode: the request was never recorded."""
+
+
+def _schema(value):
+    """response_format may be a pydantic model class (DSPy JSONAdapter)."""
+    if hasattr(value, "model_json_schema"):
+        return value.model_json_schema()
+    return value
+
+
+def request_key(model: str, messages: list, params: dict) -> str:
+    normalized = [
+        {"role": m.get("role"), "content": " ".join(str(m.get("content", "")).split())}
+        for m in messages
+    ]
+    request = {
+        "model": model,
+        "messages": normalized,
+        **{name: _schema(params[name]) for name in _KEY_PARAMS if params.get(name) is not None},
+    }
+    blob = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def _compact(response) -> dict:
+    """The part of a LiteLLM ModelResponse DSPy reads."""
+    usage = getattr(response, "usage", None)
+    return {
+        "model": response.model,
+        "choices": [
+            {
+                "index": choice.index,
+                "finish_reason": choice.finish_reason,
+                "message": {"role": choice.message.role, "content": choice.message.content},
+            }
+            for choice in response.choices
+        ],
+        "usage": {
+            name: getattr(usage, name, 0) or 0
+            for name in ("prompt_tokens", "completion_tokens", "total_tokens")
+        },
+    }
+
+
+class Cassette:
+    """
+    On-disk request → response store (gzip JSON lines).
+
+    Args:
+        path: Cassette file; created on the first recorded call.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: dict = {}
+        if self.path.exists():
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+        logger.info("[Cassette] %s: %d recorded calls", self.path, len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __deepcopy__(self, memo):
+        return self  # shared store: DSPy deep-copies programs and their LMs
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+    def put(self, key: str, response, latency: float):
+        entry = {"key": key, "latency_ms": round(latency * 1000, 1), "response": _compact(response)}
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._entries[key] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:  # one gzip member per call
+                f.write(line)
+        CASSETTE_EVENTS.labels(event="record").inc()
+
+
+class CassetteLM(dspy.LM):
+    """
+    dspy.LM that records its calls to, or replays them from, a Cassette.
+
+    Args:
+        cassette: The store.
+        mode: "record" or "replay".
+        latency: Replay delay — "none", "recorded" or milliseconds.
+        **kwargs: dspy.LM arguments.
+    """
+
+    def __init__(self, cassette: Cassette, mode: str, latency: str = "none", **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+
+    def _key(self, prompt, messages, kwargs) -> str:
+        messages = messages or [{"role": "user", "content": prompt}]
+        return request_key(self.model, messages, {**self.kwargs, **kwargs})
+
+    def _replay(self, key: str):
+        """→ (response, seconds to wait)"""
+        entry = self.cassette.get(key)
+        if entry is None:
+            CASSETTE_EVENTS.labels(event="miss").inc()
+            raise CassetteMiss(f"{self.model}: request {key} is not in {self.cassette.path}")
+        CASSETTE_EVENTS.labels(event="hit").inc()
+        if self.latency == "recorded":
+            delay = entry["latency_ms"] / 1000
+        elif self.latency == "none":
+            delay = 0.0
+        else:
+            delay = float(self.latency) / 1000
+        return ModelResponse(**entry["response"]), delay
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        key = self._key(prompt, messages, kwargs)
+        if self.mode == "replay":
+            response, delay = self._replay(key)
+            time.sleep(delay)
+            return response
+        started = time.perf_counter()
+        response = super().forward(prompt=prompt, messages=messages, **kwargs)
+        self.cassette.put(key, response, time.perf_counter() - started)
+        return response
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        key = self._key(prompt, messages, kwargs)
+        if self.mode == "replay":
+            response, delay = self._replay(key)
+            await asyncio.sleep(delay)
+            return response
+        started = time.perf_counter()
+        response = await super().aforward(prompt=prompt, messages=messages, **kwargs)
+        self.cassette.put(key, response, time.perf_counter() - started)
+        return response
+
+
+_cassettes: dict = {}
+
+
+def make_lm(**kwargs) -> dspy.LM:
+    """dspy.LM(**kwargs), or a CassetteLM when NLU_LM_CASSETTE is record/replay."""
+    if NLU_LM_CASSETTE not in ("record", "replay"):
+        return dspy.LM(**kwargs)
+    if NLU_LM_CASSETTE_PATH not in _cassettes:
+        _cassettes[NLU_LM_CASSETTE_PATH] = Cassette(NLU_LM_CASSETTE_PATH)
+    logger.info("[Cassette] %s %s (%s)", NLU_LM_CASSETTE, kwargs.get("model"), NLU_LM_CASSETTE_PATH)
+    return CassetteLM(
+        _cassettes[NLU_LM_CASSETTE_PATH], NLU_LM_CASSETTE, NLU_LM_CASSETTE_LATENCY, **kwargs
+    )
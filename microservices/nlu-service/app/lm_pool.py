@@ -0,0 +1,141 @@
+"""
+Bounded, instrumented LM execution — a dedicated thread pool (sync DSPy)
+and an async slot limiter (DSPy async).
+
+Problem (before):
+    dspy_nlu ran every LM call in the event loop's default executor —
+    min(32, cpu+4) threads shared with anything else that uses
+    run_in_executor. Parses beyond that queued invisibly.
+
+Solution:
+    LMPool: a ThreadPoolExecutor used only for LM work, sized by
+    NLU_LM_THREADS. run(fn, *args) awaits the job and records how many
+    jobs wait, how many run and how long each waited for a thread.
+    The primary → fallback retry runs inside the same job, so a failed
+    primary call does not queue again. A job cancelled before it starts
+    never runs.
+
+    LMSlots: with NLU_LM_EXECUTION=async, parses await DSPy's async
+    path and hold no thread. The slots cap concurrent LM calls at
+    NLU_LM_MAX_INFLIGHT so a burst cannot open unbounded provider
+    connections. The slots report to the same metrics as the pool.
+
+Config (env):
+    NLU_LM_THREADS        worker threads per process (default: 64)
+    NLU_LM_MAX_INFLIGHT   concurrent async LM calls per process (default: 500)
+
+Metrics (either mode):
+    nlu_lm_pool_queue_depth    LM calls waiting for a thread / slot
+    nlu_lm_pool_active         LM calls running
+    nlu_lm_pool_wait_seconds   submit → start
+"""
+
+import os
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from prometheus_client import Gauge, Histogram
+
+NLU_LM_THREADS = int(os.getenv("NLU_LM_THREADS", 64))
+NLU_LM_MAX_INFLIGHT = int(os.getenv("NLU_LM_MAX_INFLIGHT", 500))
+
+POOL_QUEUE_DEPTH = Gauge("nlu_lm_pool_queue_depth", "LM calls waiting for a thread or slot.")
+POOL_ACTIVE = Gauge("nlu_lm_pool_active", "LM calls running.")
+POOL_WAIT = Histogram(
+    "nlu_lm_pool_wait_seconds",
+    "Time an LM call waited for a thread or slot.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class LMPool:
+    """
+    Thread pool for blocking LM calls with queue/wait instrumentation.
+
+    Args:
+        max_workers: Threads; LM calls beyond this wait in the queue.
+    """
+
+    def __init__(self, max_workers: int = 64):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="nlu-lm")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+
+    def _update(self, queued: int = 0, active: int = 0):
+        with self._lock:
+            self._queued += queued
+            self._active += active
+            POOL_QUEUE_DEPTH.set(self._queued)
+            POOL_ACTIVE.set(self._active)
+
+    async def run(self, fn, *args):
+        """fn(*args) on a pool thread."""
+        submitted = time.monotonic()
+
+        def _job():
+            POOL_WAIT.observe(time.monotonic() - submitted)
+            self._update(queued=-1, active=1)
+            try:
+                return fn(*args)
+            finally:
+                self._update(active=-1)
+
+        self._update(queued=1)
+        future = self._executor.submit(_job)
+        # Cancelled while still queued → _job never runs
+        future.add_done_callback(lambda f: f.cancelled() and self._update(queued=-1))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LMSlots:
+    """
+    Concurrency cap for async LM calls, with the pool's instrumentation.
+
+    Args:
+        max_inflight: LM calls awaited at once; more wait for a slot.
+    """
+
+    def __init__(self, max_inflight: int = 500):
+        self.max_inflight = max_inflight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._active = 0
+
+    def _publish(self):
+        POOL_QUEUE_DEPTH.set(self._waiting)
+        POOL_ACTIVE.set(self._active)
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+        submitted = time.monotonic()
+        self._waiting += 1
+        self._publish()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        POOL_WAIT.observe(time.monotonic() - submitted)
+        self._active += 1
+        self._publish()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._publish()
+            self._semaphore.release()
+
+
+# Process-wide pool and slots (one per uvicorn worker)
+pool = LMPool(NLU_LM_THREADS)
+slots = LMSlots(NLU_LM_MAX_INFLIGHT)
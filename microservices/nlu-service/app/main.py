@@ -10,16 +10,18 @@ NLU Pipeline:
 """
 
 import os
+import asyncio
 import logging
 import re
+import random
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 
-from .schemas import NLUInput, NLUOutput
-from . import dspy_nlu
+from .schemas import NLUBatchInput, NLUBatchOutput, NLUInput, NLUOutput
+from . import dspy_nlu, lm_cassette, lm_pool, nlu_cache, semantic_cache, tier0, tracing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,7 +36,9 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Build the DSPy NLU module once on startup."""
-    if not OPENAI_API_KEY and not GROQ_API_KEY:
+    tracing.setup_tracing()
+    tier0.load_model()
+    if not OPENAI_API_KEY and not GROQ_API_KEY and lm_cassette.NLU_LM_CASSETTE != "replay":
         logger.error(
             "FATAL: Neither OPENAI_API_KEY nor GROQ_API_KEY is set. "
             "NLU will always use the deterministic fallback."
@@ -45,6 +49,11 @@ async def lifespan(app: FastAPI):
         logger.info("NLU service started — DSPy module initialized.")
     yield
     logger.info("NLU service shutting down.")
+    if getattr(app.state.nlu_module, "batcher", None) is not None:
+        await app.state.nlu_module.batcher.close()
+    await nlu_cache.cache.close()
+    lm_pool.pool.shutdown()
+    tracing.shutdown_tracing()
 
 
 app = FastAPI(title="NLU Service (MS2)", lifespan=lifespan)
@@ -52,6 +61,9 @@ app = FastAPI(title="NLU Service (MS2)", lifespan=lifespan)
 # Prometheus Instrumentation
 Instrumentator().instrument(app).expose(app)
 
+# Tracing: server span per request, joined to the orchestrator's trace
+app.middleware("http")(tracing.trace_middleware)
+
 
 # ---------------------- Auth Middleware ----------------------
 @app.middleware("http")
@@ -121,27 +133,64 @@ def _deterministic_fallback(text: str) -> dict:
 
 
 # =====================================================
-# PARSE ENDPOINT  — contract unchanged
+# LLM parse behind tier 0 and the semantic cache
 # =====================================================
-@app.post("/api/v1/parse", response_model=NLUOutput)
-async def parse(input: NLUInput):
+async def _parse_uncached(text: str, module, llm_only: bool = False) -> dict:
     """
-    Parse user text into structured NLU output.
-
-    All validation (math, barter, gibberish, negative numbers, etc.)
-    is handled end-to-end by the DSPy module — no Layer 1 pre-checks.
+    Exact-cache miss: answer from the tier-0 classifier if it is confident
+    (tier0.py), else reuse a near-duplicate parse if the semantic cache
+    has one (semantic_cache.py), otherwise call the LLM. llm_only skips
+    the first two.
     """
+    prediction = None if llm_only else tier0.predict(text)
+    if tier0.serves(prediction):
+        if random.random() < tier0.NLU_TIER0_SHADOW_RATE:
+            tier0.shadow(text, prediction, dspy_nlu.parse(text, module))
+        return tier0.as_result(prediction)
+
+    version = module.program_version
+    if semantic_cache.NLU_SEMANTIC_CACHE_ENABLED and not llm_only:
+        reused = semantic_cache.index.lookup(text, version)
+        if reused is not None:
+            return {**reused, "lm": "semantic"}
+
+    result = await dspy_nlu.parse(text, module)
+    tier0.observe(text, prediction, result)
+    if semantic_cache.NLU_SEMANTIC_CACHE_ENABLED and result.get("lm") == "primary":
+        semantic_cache.index.add(text, result, version)
+    return result
+
+
+# =====================================================
+# PARSE ENDPOINTS  — /parse contract unchanged
+# =====================================================
+async def _parse_text(text: str, llm_only: bool = False) -> NLUOutput:
     module = app.state.nlu_module
 
-    if module is not None:
-        try:
-            result = await dspy_nlu.parse(input.text, module)
-        except Exception as e:
-            logger.warning("[NLU] DSPy parse failed — using fallback. Error: %s", e)
-            result = _deterministic_fallback(input.text)
-    else:
-        logger.warning("[NLU] No DSPy module available — using fallback.")
-        result = _deterministic_fallback(input.text)
+    with tracing.span("nlu.parse") as span:
+        if module is not None:
+            try:
+                result = await nlu_cache.cache.get_or_parse(
+                    text,
+                    module.program_version,
+                    lambda: _parse_uncached(text, module, llm_only),
+                    # Stored results are primary-LM answers, fine for llm_only;
+                    # an in-flight /parse may still answer from tier 0 / semantic
+                    cacheable=lambda r: r.get("lm") == "primary",
+                    flight="llm_only" if llm_only else "",
+                )
+            except Exception as e:
+                logger.warning("[NLU] DSPy parse failed — using fallback. Error: %s", e)
+                result = _deterministic_fallback(text)
+                if span is not None:
+                    span.set_attribute("nlu.fallback", True)
+        else:
+            logger.warning("[NLU] No DSPy module available — using fallback.")
+            result = _deterministic_fallback(text)
+            if span is not None:
+                span.set_attribute("nlu.fallback", True)
+        if span is not None:
+            span.set_attribute("nlu.intent", result["intent"])
 
     return NLUOutput(
         intent=result["intent"],
@@ -150,3 +199,28 @@ async def parse(input: NLUInput):
         language=result["language"],
         error_message=result.get("error_message"),
     )
+
+
+@app.post("/api/v1/parse", response_model=NLUOutput)
+async def parse(input: NLUInput):
+    """
+    Parse user text into structured NLU output.
+
+    All validation (math, barter, gibberish, negative numbers, etc.)
+    is handled end-to-end by the DSPy module — no Layer 1 pre-checks.
+    DSPy results are served from the NLU result cache when possible
+    (see nlu_cache.py).
+    """
+    return await _parse_text(input.text)
+
+
+@app.post("/api/v1/parse/batch", response_model=NLUBatchOutput)
+async def parse_batch(input: NLUBatchInput):
+    """
+    Bulk parse (e.g. offline relabelling). Every text takes the same path
+    as /api/v1/parse; LLM parses are grouped by the same batching engine
+    (dspy_nlu.NLUBatcher) as concurrent single requests. Results are in
+    input order.
+    """
+    results = await asyncio.gather(*(_parse_text(text, input.llm_only) for text in input.texts))
+    return NLUBatchOutput(results=list(results))
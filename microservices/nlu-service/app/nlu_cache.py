@@ -0,0 +1,253 @@
+"""
+NLU result cache — per-process LRU + shared Redis tier + singleflight.
+
+Problem (before):
+    Identical or trivially different messages ("500", " 500 ", "500!") were
+    re-parsed by the LLM every time, and N concurrent identical requests
+    made N LLM calls.
+
+Solution:
+    get_or_parse(text, version, producer):
+
+    1. key = <namespace>:<program version>:sha256(normalize(text))
+       normalize: NFKC, casefold, collapse whitespace, strip surrounding
+       whitespace and trailing "." / "!" ("?" is kept — it changes intent)
+    2. local LRU (bounded, TTL)            → hit_local
+    3. Redis (shared by all workers, TTL)  → hit_redis (copied into L1)
+    4. in-flight parse for the same key    → coalesced (awaits that call)
+       and the same `flight` (callers whose producers answer differently,
+       e.g. llm_only parses, pass their own)
+    5. otherwise producer() runs once; cacheable results are written to
+       both tiers                           → miss
+
+    The program version (dspy_nlu.program_version: compiled program +
+    signature instructions + LM models) is part of every key, so a new
+    nlu_compiled.json invalidates the cache automatically: old Redis keys
+    are never read again and expire by TTL; the local tier is cleared.
+
+    Only results from the primary LM are stored — a fallback-LM or
+    deterministic-fallback answer is served once, never cached. Message
+    text is hashed, never stored in keys. Redis is optional: without the
+    package, NLU_CACHE_REDIS_URL, or on any Redis error the local tier
+    still works.
+
+Config (env):
+    NLU_CACHE_ENABLED        "true" to enable (default: true)
+    NLU_CACHE_MAX_ENTRIES    local LRU bound (default: 10000)
+    NLU_CACHE_TTL_SECONDS    TTL for both tiers (default: 86400)
+    NLU_CACHE_REDIS_URL      shared tier, e.g. redis://redis:6379/1 (default: off)
+    NLU_CACHE_REDIS_TIMEOUT  seconds per Redis op before treating as miss
+                             (default: 0.1)
+
+Metrics:
+    nlu_cache_events_total{event=hit_local|hit_redis|miss|coalesced|
+                                 store|eviction|invalidation|redis_error}
+    nlu_cache_entries
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from prometheus_client import Counter, Gauge
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+NLU_CACHE_ENABLED = os.getenv("NLU_CACHE_ENABLED", "true").lower() == "true"
+NLU_CACHE_MAX_ENTRIES = int(os.getenv("NLU_CACHE_MAX_ENTRIES", 10000))
+NLU_CACHE_TTL_SECONDS = int(os.getenv("NLU_CACHE_TTL_SECONDS", 86400))
+NLU_CACHE_REDIS_URL = os.getenv("NLU_CACHE_REDIS_URL", "")
+NLU_CACHE_REDIS_TIMEOUT = float(os.getenv("NLU_CACHE_REDIS_TIMEOUT", 0.1))
+
+NAMESPACE = "nlu:result"
+
+CACHE_EVENTS = Counter(
+    "nlu_cache_events_total",
+    "NLU result cache events (hit_local, hit_redis, miss, coalesced, store, eviction, invalidation, redis_error).",
+    ["event"],
+)
+CACHE_ENTRIES = Gauge("nlu_cache_entries", "Entries in this worker's local NLU cache.")
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Cache-key form of a message: equal for '500', ' 500 ' and '500!'."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _SPACES_RE.sub(" ", text).strip()
+    return text.rstrip(".! ")
+
+
+class NLUCache:
+    """
+    Two-tier NLU result cache with in-flight request coalescing.
+
+    Args:
+        max_entries: Local entries beyond this evict the least recently used.
+        ttl_seconds: Max age of an entry in both tiers.
+        redis_url: Shared tier; empty disables it.
+        enabled: When False get_or_parse() always calls the producer.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: int = 86400,
+        redis_url: str = "",
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.version: Optional[str] = None
+        # key → (stored_at, result)
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._inflight: "dict[str, asyncio.Task]" = {}
+        self._redis = None
+        if redis_url and REDIS_AVAILABLE:
+            self._redis = aioredis.from_url(
+                redis_url,
+                socket_timeout=NLU_CACHE_REDIS_TIMEOUT,
+                socket_connect_timeout=NLU_CACHE_REDIS_TIMEOUT,
+            )
+        elif redis_url:
+            logger.warning("NLU_CACHE_REDIS_URL set but redis is not installed — local tier only")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, text: str, version: str) -> str:
+        digest = hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+        return f"{NAMESPACE}:{version}:{digest}"
+
+    def _check_version(self, version: str):
+        """A new program version makes every local entry stale."""
+        if version != self.version:
+            if self._entries:
+                CACHE_EVENTS.labels(event="invalidation").inc()
+                logger.info(
+                    "NLU program version %s → %s: local cache cleared", self.version, version
+                )
+            self._entries.clear()
+            CACHE_ENTRIES.set(0)
+            self.version = version
+
+    # ---------------------- Local tier ----------------------
+    def _get_local(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put_local(self, key: str, result: dict):
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            CACHE_EVENTS.labels(event="eviction").inc()
+        CACHE_ENTRIES.set(len(self._entries))
+
+    # ---------------------- Redis tier ----------------------
+    async def _get_redis(self, key: str) -> Optional[dict]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(key)
+        except Exception as exc:
+            CACHE_EVENTS.labels(event="redis_error").inc()
+            logger.warning("NLU cache Redis GET failed: %s", exc)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _put_redis(self, key: str, result: dict):
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(key, json.dumps(result), ex=self.ttl_seconds)
+        except Exception as exc:
+            CACHE_EVENTS.labels(event="redis_error").inc()
+            logger.warning("NLU cache Redis SET failed: %s", exc)
+
+    # ---------------------- Public API ----------------------
+    async def get_or_parse(
+        self,
+        text: str,
+        version: str,
+        producer: Callable[[], Awaitable[dict]],
+        cacheable: Callable[[dict], bool] = lambda result: True,
+        flight: str = "",
+    ) -> dict:
+        """
+        Cached result for `text` under program `version`, or producer()'s
+        result (run once per key and `flight` across concurrent callers).
+        """
+        if not self.enabled:
+            return await producer()
+
+        self._check_version(version)
+        key = self.key(text, version)
+
+        result = self._get_local(key)
+        if result is not None:
+            CACHE_EVENTS.labels(event="hit_local").inc()
+            return dict(result)
+
+        inflight_key = f"{key}:{flight}" if flight else key
+        task = self._inflight.get(inflight_key)
+        if task is not None:
+            CACHE_EVENTS.labels(event="coalesced").inc()
+            # shield: one caller going away must not cancel the shared parse
+            return dict(await asyncio.shield(task))
+
+        task = asyncio.create_task(self._load(key, version, producer, cacheable))
+        self._inflight[inflight_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        return dict(await asyncio.shield(task))
+
+    async def _load(self, key: str, version: str, producer, cacheable) -> dict:
+        result = await self._get_redis(key)
+        if result is not None:
+            CACHE_EVENTS.labels(event="hit_redis").inc()
+            self._put_local(key, result)
+            return result
+
+        CACHE_EVENTS.labels(event="miss").inc()
+        result = await producer()
+        # Skip the store if the program changed while this parse was running
+        if cacheable(result) and version == self.version:
+            CACHE_EVENTS.labels(event="store").inc()
+            self._put_local(key, result)
+            await self._put_redis(key, result)
+        return result
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+# Process-wide cache (one per uvicorn worker)
+cache = NLUCache(
+    max_entries=NLU_CACHE_MAX_ENTRIES,
+    ttl_seconds=NLU_CACHE_TTL_SECONDS,
+    redis_url=NLU_CACHE_REDIS_URL,
+    enabled=NLU_CACHE_ENABLED,
+)
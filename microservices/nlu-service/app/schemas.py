@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class NLUInput(BaseModel):
@@ -13,3 +13,15 @@ class NLUOutput(BaseModel):
     sentiment: str
     language: str  # e.g. "english", "roman_urdu", "urdu", "other"
     error_message: Optional[str] = None
+
+
+class NLUBatchInput(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+    session_id: str
+    # Skip tier 0 and the semantic cache: LLM (or exact-cache) labels only,
+    # e.g. for relabelling training data
+    llm_only: bool = False
+
+
+class NLUBatchOutput(BaseModel):
+    results: List[NLUOutput]
@@ -0,0 +1,222 @@
+"""
+Semantic near-duplicate NLU cache — hashed char n-gram vectors + NumPy index.
+
+Problem (before):
+    The exact-match cache (nlu_cache.py) misses paraphrases and price
+    changes: "can you do 500?" / "could u do 700?" each cost an LLM call
+    although intent, sentiment and language are the same.
+
+Solution:
+    - mask_numbers(): prices (1,200 / 1.5k / 2 lakh ...) become "<num>"
+    - embed(): signed feature hashing of character 3–5-grams of the masked
+      text into NLU_SEMANTIC_DIM dims, L2-normalised (deterministic, no
+      model download, ~50 us per message)
+    - SemanticIndex: preallocated float32 matrix (max_entries × dim); a
+      lookup is one matrix-vector product. Full index → least recently
+      used row is overwritten.
+
+    A neighbour is reused only if ALL of these hold:
+    - cosine similarity ≥ NLU_SEMANTIC_THRESHOLD
+    - same program version (dspy_nlu.program_version)
+    - same set of symbols (- + / * = $ ? ...) — keeps "-$500", "500/4",
+      "600 + 400" from matching plain offers
+    - same number of prices; MAKE_OFFER reuses the intent/sentiment/
+      language and takes the price freshly extracted from the new message
+
+    Only primary-LM parses are indexed. Off by default — it trades some
+    accuracy for LLM calls; benchmarks/nlu_semantic_eval.py measures
+    both over compile_nlu.RAW_EXAMPLES for a range of thresholds.
+
+Config (env):
+    NLU_SEMANTIC_CACHE_ENABLED   "true" to enable (default: false)
+    NLU_SEMANTIC_THRESHOLD       min cosine similarity (default: 0.9)
+    NLU_SEMANTIC_MAX_ENTRIES     index rows, LRU eviction (default: 5000)
+    NLU_SEMANTIC_DIM             vector size (default: 1024)
+
+Metrics:
+    nlu_semantic_cache_events_total{event=hit|miss|rejected|insert|eviction}
+    nlu_semantic_cache_similarity (best similarity per lookup)
+"""
+
+import os
+import re
+import zlib
+import logging
+from typing import List, Optional
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+NLU_SEMANTIC_CACHE_ENABLED = (
+    os.getenv("NLU_SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+)
+NLU_SEMANTIC_THRESHOLD = float(os.getenv("NLU_SEMANTIC_THRESHOLD", 0.9))
+NLU_SEMANTIC_MAX_ENTRIES = int(os.getenv("NLU_SEMANTIC_MAX_ENTRIES", 5000))
+NLU_SEMANTIC_DIM = int(os.getenv("NLU_SEMANTIC_DIM", 1024))
+
+SEMANTIC_EVENTS = Counter(
+    "nlu_semantic_cache_events_total",
+    "Semantic NLU cache events (hit, miss, rejected = similar but failed a guard, insert, eviction).",
+    ["event"],
+)
+SEMANTIC_SIMILARITY = Histogram(
+    "nlu_semantic_cache_similarity",
+    "Best cosine similarity found per semantic cache lookup.",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.93, 0.95, 0.97, 0.99, 1.0),
+)
+
+# ---------------------- Text features ----------------------
+_NUMBER_RE = re.compile(
+    r"(?<![\w.])(\d{1,3}(?:,\d{2,3})+|\d+(?:\.\d+)?)\s*(k|lakh|lakhs|lac|lacs)?\b",
+    re.IGNORECASE,
+)
+_UNITS = {"k": 1_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000}
+_SPACES_RE = re.compile(r"\s+")
+_SYMBOLS_RE = re.compile(r"[^\w\s]")
+
+
+def extract_prices(text: str) -> List[float]:
+    """Every number in the message, with k / lakh units applied."""
+    prices = []
+    for number, unit in _NUMBER_RE.findall(text or ""):
+        value = float(number.replace(",", ""))
+        if unit:
+            value *= _UNITS[unit.lower()]
+        prices.append(value)
+    return prices
+
+
+def mask_numbers(text: str) -> str:
+    """Lowercased text with every price replaced by <num>."""
+    masked = _NUMBER_RE.sub(" <num> ", (text or "").lower())
+    return _SPACES_RE.sub(" ", masked).strip()
+
+
+def symbols(text: str) -> frozenset:
+    """Punctuation/operator characters — a cheap structural fingerprint."""
+    return frozenset(_SYMBOLS_RE.findall(mask_numbers(text).replace("<num>", "")))
+
+
+def embed(text: str, dim: int = NLU_SEMANTIC_DIM) -> np.ndarray:
+    """L2-normalised signed hashing vector of character 3–5-grams."""
+    padded = f" {mask_numbers(text)} "
+    vector = np.zeros(dim, dtype=np.float32)
+    for n in (3, 4, 5):
+        for i in range(len(padded) - n + 1):
+            h = zlib.crc32(padded[i : i + n].encode("utf-8"))
+            vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ---------------------- Index ----------------------
+class SemanticIndex:
+    """
+    Bounded in-memory vector index of parsed NLU results.
+
+    Args:
+        max_entries: Rows in the index; beyond this the least recently used
+            row is overwritten.
+        dim: Vector size (must match embed()).
+        threshold: Minimum cosine similarity for a reuse.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        dim: int = 1024,
+        threshold: float = 0.9,
+    ):
+        self.max_entries = max_entries
+        self.dim = dim
+        self.threshold = threshold
+        self.version: Optional[str] = None
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._entries: List[Optional[dict]] = [None] * max_entries
+        self._size = 0
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        self._vectors[:] = 0
+        self._last_used[:] = 0
+        self._entries = [None] * self.max_entries
+        self._size = 0
+
+    def _check_version(self, version: str):
+        if version != self.version:
+            if self._size:
+                logger.info("NLU program version changed — semantic index cleared")
+            self.clear()
+            self.version = version
+
+    def _tick(self, row: int):
+        self._clock += 1
+        self._last_used[row] = self._clock
+
+    def lookup(self, text: str, version: str) -> Optional[dict]:
+        """Parse result reused from the nearest neighbour, or None."""
+        self._check_version(version)
+        if not self._size:
+            SEMANTIC_EVENTS.labels(event="miss").inc()
+            return None
+
+        sims = self._vectors[: self._size] @ embed(text, self.dim)
+        row = int(np.argmax(sims))
+        similarity = float(sims[row])
+        SEMANTIC_SIMILARITY.observe(max(0.0, similarity))
+        if similarity < self.threshold:
+            SEMANTIC_EVENTS.labels(event="miss").inc()
+            return None
+
+        entry = self._entries[row]
+        prices = extract_prices(text)
+        if entry["symbols"] != symbols(text) or entry["price_count"] != len(prices):
+            SEMANTIC_EVENTS.labels(event="rejected").inc()
+            return None
+
+        result = dict(entry["result"])
+        if result["intent"] == "MAKE_OFFER":
+            result["price"] = prices[0]
+        self._tick(row)
+        SEMANTIC_EVENTS.labels(event="hit").inc()
+        return {**result, "similarity": similarity}
+
+    def add(self, text: str, result: dict, version: str):
+        """Index a parse. MAKE_OFFER needs exactly one number in the text."""
+        self._check_version(version)
+        prices = extract_prices(text)
+        if result["intent"] == "MAKE_OFFER" and len(prices) != 1:
+            return
+
+        if self._size < self.max_entries:
+            row = self._size
+            self._size += 1
+        else:
+            row = int(np.argmin(self._last_used))
+            SEMANTIC_EVENTS.labels(event="eviction").inc()
+
+        self._vectors[row] = embed(text, self.dim)
+        self._entries[row] = {
+            "result": {
+                k: result.get(k)
+                for k in ("intent", "price", "sentiment", "language", "error_message")
+            },
+            "symbols": symbols(text),
+            "price_count": len(prices),
+        }
+        self._tick(row)
+        SEMANTIC_EVENTS.labels(event="insert").inc()
+
+
+# Process-wide index (one per uvicorn worker)
+index = SemanticIndex(
+    max_entries=NLU_SEMANTIC_MAX_ENTRIES,
+    dim=NLU_SEMANTIC_DIM,
+    threshold=NLU_SEMANTIC_THRESHOLD,
+)
@@ -0,0 +1,347 @@
+"""
+Tier-0 NLU — local hashed n-gram features + linear classifiers before the LLM.
+
+Problem (before):
+    Every exact-cache miss ran the ChainOfThought program on gpt-4o-mini
+    (fallback groq llama-3.1-8b): 1–3 s and a paid call, even for inputs
+    a bag of character n-grams classifies reliably.
+
+Solution:
+    - features(): semantic_cache.embed() (signed hashed char 3–5-grams,
+      numbers masked) + structural flags (price count, "?", operators)
+    - three softmax-regression heads (intent, sentiment, language), each
+      temperature-calibrated on cross-validated predictions
+    - confidence = p(intent) · p(sentiment) · p(language); an answer is
+      served only if it reaches the per-intent threshold chosen by
+      train_tier0.py, otherwise the LLM tier runs as before
+    - never answers INVALID (it needs an LLM-written error_message);
+      MAKE_OFFER only with exactly one price in (0, NLU_TIER0_MAX_PRICE)
+      and no operators or magnitude words — the price is extracted,
+      not predicted
+    - artifact: tier0_model.npz (weights + JSON metadata with a version),
+      loaded once at startup; missing or unreadable → tier 0 is off
+
+    The model also runs when serving is disabled: every LLM parse is
+    compared with the tier-0 prediction, so coverage and agreement are
+    measured before NLU_TIER0_ENABLED is switched on.
+
+Training data:
+    train_tier0.py trains on compile_nlu.RAW_EXAMPLES plus LLM-labelled
+    production messages. With NLU_TIER0_LABEL_LOG set, every primary-LM
+    parse is appended there as JSONL. NLU_TIER0_SHADOW_RATE re-checks a
+    share of served tier-0 answers with the LLM in the background.
+
+Config (env):
+    NLU_TIER0_ENABLED        "true" to serve confident answers (default: false)
+    NLU_TIER0_MODEL_PATH     artifact (default: app/tier0_model.npz)
+    NLU_TIER0_LABEL_LOG      JSONL file for LLM-labelled messages (default: off)
+    NLU_TIER0_SHADOW_RATE    share of served answers re-checked by the LLM
+                             (default: 0.05)
+    NLU_TIER0_MAX_PRICE      exclusive upper bound for offers (default: 10000000)
+
+Metrics:
+    nlu_tier0_predictions_total{decision=confident|deferred, intent}
+        coverage = confident / all
+    nlu_tier0_agreement_total{decision, field=intent|sentiment|language|all, agreed}
+    nlu_tier0_confidence
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from . import semantic_cache
+
+logger = logging.getLogger(__name__)
+
+NLU_TIER0_ENABLED = os.getenv("NLU_TIER0_ENABLED", "false").lower() == "true"
+NLU_TIER0_MODEL_PATH = os.getenv(
+    "NLU_TIER0_MODEL_PATH", str(Path(__file__).parent / "tier0_model.npz")
+)
+NLU_TIER0_LABEL_LOG = os.getenv("NLU_TIER0_LABEL_LOG", "")
+NLU_TIER0_SHADOW_RATE = float(os.getenv("NLU_TIER0_SHADOW_RATE", 0.05))
+NLU_TIER0_MAX_PRICE = float(os.getenv("NLU_TIER0_MAX_PRICE", 10_000_000))
+
+FORMAT = 1
+HEADS = ("intent", "sentiment", "language")
+# Intents tier 0 may never serve, whatever the confidence
+NEVER_SERVED = {"INVALID", "UNKNOWN"}
+
+TIER0_PREDICTIONS = Counter(
+    "nlu_tier0_predictions_total",
+    "Tier-0 predictions by decision (confident = at/above the intent threshold).",
+    ["decision", "intent"],
+)
+TIER0_AGREEMENT = Counter(
+    "nlu_tier0_agreement_total",
+    "Tier-0 prediction vs LLM parse of the same message, per field.",
+    ["decision", "field", "agreed"],
+)
+TIER0_CONFIDENCE = Histogram(
+    "nlu_tier0_confidence",
+    "Joint tier-0 confidence per prediction.",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0),
+)
+
+# ---------------------- Features ----------------------
+_OPERATORS_RE = re.compile(r"[-+*/=%]")
+# Magnitude words extract_prices() does not apply ("10 million" is not 10)
+_MAGNITUDE_RE = re.compile(
+    r"\b(?:million|billion|mn|bn|crore|arab|thousand|hazar|hazaar)\b", re.IGNORECASE
+)
+
+
+def has_operator(text: str) -> bool:
+    return bool(_OPERATORS_RE.search(semantic_cache.mask_numbers(text).replace("<num>", "")))
+
+
+def features(text: str, dim: int) -> np.ndarray:
+    """Hashed n-gram vector followed by structural flags."""
+    prices = semantic_cache.extract_prices(text)
+    flags = np.array(
+        [
+            len(prices) == 0,
+            len(prices) == 1,
+            len(prices) >= 2,
+            "?" in text,
+            has_operator(text),
+            len(text) > 60,
+        ],
+        dtype=np.float32,
+    )
+    return np.concatenate([semantic_cache.embed(text, dim), flags])
+
+
+def offer_price(text: str) -> Optional[float]:
+    """The single price tier 0 may answer MAKE_OFFER with, else None."""
+    prices = semantic_cache.extract_prices(text)
+    if len(prices) != 1 or has_operator(text) or _MAGNITUDE_RE.search(text):
+        return None
+    if not 0 < prices[0] < NLU_TIER0_MAX_PRICE:
+        return None
+    return prices[0]
+
+
+# ---------------------- Linear heads ----------------------
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class LinearHead:
+    """Softmax regression over `classes` with a calibration temperature."""
+
+    def __init__(self, classes: List[str], weights: np.ndarray, bias: np.ndarray, temperature=1.0):
+        self.classes = list(classes)
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.temperature = float(temperature)
+
+    @classmethod
+    def fit(
+        cls,
+        X: np.ndarray,
+        labels: List[str],
+        classes: List[str],
+        l2: float = 1e-3,
+        epochs: int = 400,
+        lr: float = 0.5,
+    ) -> "LinearHead":
+        """Full-batch gradient descent on L2-regularised cross-entropy."""
+        index = {c: i for i, c in enumerate(classes)}
+        Y = np.eye(len(classes), dtype=np.float32)[[index[label] for label in labels]]
+        W = np.zeros((X.shape[1], len(classes)), dtype=np.float32)
+        b = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(epochs):
+            G = (softmax(X @ W + b) - Y) / len(X)
+            W -= lr * (X.T @ G + l2 * W)
+            b -= lr * G.sum(axis=0)
+        return cls(classes, W, b)
+
+    def logits(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.weights + self.bias
+
+    def proba(self, X: np.ndarray) -> np.ndarray:
+        return softmax(self.logits(X) / self.temperature)
+
+
+# ---------------------- Model ----------------------
+class Tier0Model:
+    """
+    Intent/sentiment/language heads plus per-intent confidence thresholds.
+
+    Args:
+        heads: "intent" / "sentiment" / "language" → LinearHead.
+        thresholds: intent → minimum joint confidence; None = never served.
+        dim: Hashed n-gram size used at training time.
+        metadata: Training info stored in the artifact (includes "version").
+    """
+
+    def __init__(self, heads: Dict[str, LinearHead], thresholds: dict, dim: int, metadata: dict):
+        self.heads = heads
+        self.thresholds = thresholds
+        self.dim = dim
+        self.metadata = metadata
+        self.version = metadata.get("version", "unversioned")
+
+    def predict(self, text: str) -> dict:
+        """Best label per head, joint confidence and whether it may be served."""
+        x = features(text, self.dim)[None, :]
+        labels, confidence = {}, 1.0
+        for name in HEADS:
+            head = self.heads[name]
+            probs = head.proba(x)[0]
+            best = int(np.argmax(probs))
+            labels[name] = head.classes[best]
+            confidence *= float(probs[best])
+
+        intent = labels["intent"]
+        price = offer_price(text) if intent == "MAKE_OFFER" else None
+        threshold = self.thresholds.get(intent)
+        confident = (
+            intent not in NEVER_SERVED
+            and threshold is not None
+            and confidence >= threshold
+            and (intent != "MAKE_OFFER" or price is not None)
+        )
+        return {
+            "intent": intent,
+            "price": price,
+            "sentiment": labels["sentiment"],
+            "language": labels["language"],
+            "error_message": None,
+            "confidence": confidence,
+            "confident": confident,
+        }
+
+    def save(self, path) -> None:
+        arrays = {}
+        meta = dict(self.metadata, format=FORMAT, dim=self.dim, thresholds=self.thresholds)
+        meta["heads"] = {}
+        for name, head in self.heads.items():
+            arrays[f"{name}_weights"] = head.weights
+            arrays[f"{name}_bias"] = head.bias
+            meta["heads"][name] = {"classes": head.classes, "temperature": head.temperature}
+        arrays["metadata"] = np.array(json.dumps(meta, sort_keys=True))
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path) -> "Tier0Model":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["metadata"]))
+            if meta.get("format") != FORMAT:
+                raise ValueError(f"unsupported tier-0 artifact format {meta.get('format')!r}")
+            heads = {
+                name: LinearHead(
+                    spec["classes"],
+                    data[f"{name}_weights"],
+                    data[f"{name}_bias"],
+                    spec["temperature"],
+                )
+                for name, spec in meta["heads"].items()
+            }
+        return cls(heads, meta["thresholds"], meta["dim"], meta)
+
+
+# Loaded by load_model() at startup; None = tier 0 off
+model: Optional[Tier0Model] = None
+_shadow_tasks: set = set()
+
+
+def load_model(path: str = NLU_TIER0_MODEL_PATH) -> Optional[Tier0Model]:
+    global model
+    try:
+        model = Tier0Model.load(path)
+    except FileNotFoundError:
+        logger.warning("[Tier0] No model at %s — tier 0 disabled. Run train_tier0.py.", path)
+        model = None
+    except Exception as exc:
+        logger.error("[Tier0] Could not load %s (%s) — tier 0 disabled.", path, exc)
+        model = None
+    else:
+        logger.info(
+            "[Tier0] Loaded model %s (%s examples) — serving %s",
+            model.version,
+            model.metadata.get("examples"),
+            "on" if NLU_TIER0_ENABLED else "off (measuring only)",
+        )
+    return model
+
+
+def predict(text: str) -> Optional[dict]:
+    """Tier-0 prediction (recorded in metrics), or None without a model."""
+    if model is None:
+        return None
+    prediction = model.predict(text)
+    decision = "confident" if prediction["confident"] else "deferred"
+    TIER0_PREDICTIONS.labels(decision=decision, intent=prediction["intent"]).inc()
+    TIER0_CONFIDENCE.observe(prediction["confidence"])
+    return prediction
+
+
+def serves(prediction: Optional[dict]) -> bool:
+    return NLU_TIER0_ENABLED and prediction is not None and prediction["confident"]
+
+
+def as_result(prediction: dict) -> dict:
+    """Parse-shaped result for a served prediction."""
+    result = {k: prediction[k] for k in ("intent", "price", "sentiment", "language", "error_message")}
+    result["lm"] = "tier0"
+    return result
+
+
+# ---------------------- LLM comparison ----------------------
+def observe(text: str, prediction: Optional[dict], llm_result: dict) -> None:
+    """
+    Compare a tier-0 prediction with the LLM's parse of the same message
+    and log the LLM label for retraining. Only primary-LM parses count.
+    """
+    if llm_result.get("lm") != "primary":
+        return
+    if prediction is not None:
+        decision = "confident" if prediction["confident"] else "deferred"
+        agreed_all = True
+        for field in HEADS:
+            agreed = prediction[field] == llm_result.get(field)
+            agreed_all = agreed_all and agreed
+            TIER0_AGREEMENT.labels(decision=decision, field=field, agreed=str(agreed).lower()).inc()
+        if prediction["intent"] == "MAKE_OFFER":
+            agreed_all = agreed_all and prediction["price"] == llm_result.get("price")
+        TIER0_AGREEMENT.labels(decision=decision, field="all", agreed=str(agreed_all).lower()).inc()
+    _log_label(text, llm_result)
+
+
+def shadow(text: str, prediction: dict, parse) -> None:
+    """Run the LLM parse for a served answer in the background and compare."""
+    task = asyncio.create_task(parse)
+    _shadow_tasks.add(task)
+
+    def _done(t: asyncio.Task):
+        _shadow_tasks.discard(t)
+        if t.cancelled() or t.exception() is not None:
+            return
+        observe(text, prediction, t.result())
+
+    task.add_done_callback(_done)
+
+
+def _log_label(text: str, result: dict) -> None:
+    if not NLU_TIER0_LABEL_LOG:
+        return
+    row = {k: result.get(k) for k in ("intent", "price", "sentiment", "language")}
+    row.update(text=text, ts=time.time())
+    try:
+        with open(NLU_TIER0_LABEL_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    except OSError as exc:
+        logger.warning("[Tier0] Could not append to %s: %s", NLU_TIER0_LABEL_LOG, exc)
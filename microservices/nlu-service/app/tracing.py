@@ -0,0 +1,155 @@
+"""
+OpenTelemetry tracing for the nlu-service (optional).
+
+Continues the orchestrator's W3C trace context (`traceparent` header), so
+this service's spans appear inside the same trace as the chat turn that
+called it. Sampling is ParentBased: a request is traced only if the
+orchestrator sampled its turn (TRACING_SAMPLE_RATIO applies to calls that
+arrive without a trace context).
+
+Without opentelemetry-sdk installed, or with TRACING_ENABLED=false (the
+default), every helper is a no-op.
+
+Config (env):
+    TRACING_ENABLED        "true" to enable (default: false)
+    TRACING_EXPORTER       otlp (default) | file | console
+    TRACING_SAMPLE_RATIO   for requests without a parent (default: 0.05)
+    TRACING_FILE           JSON-lines output for the file exporter
+    OTEL_SERVICE_NAME      (default: nlu-service)
+    OTEL_EXPORTER_OTLP_ENDPOINT  collector URL (default: http://localhost:4318)
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "otlp").lower()
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", 0.05))
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "nlu-service")
+
+_tracer = None
+_provider = None
+
+
+def setup_tracing() -> bool:
+    """Install the tracer provider (app startup). Returns True if tracing is on."""
+    global _tracer, _provider
+    if _tracer is not None or not TRACING_ENABLED:
+        return _tracer is not None
+    if not OTEL_AVAILABLE:
+        logger.warning("TRACING_ENABLED=true but opentelemetry-sdk is not installed")
+        return False
+
+    if TRACING_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            logger.warning("OTLP exporter not installed — tracing disabled")
+            return False
+        exporter = OTLPSpanExporter()
+    elif TRACING_EXPORTER == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        exporter = ConsoleSpanExporter()
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer(SERVICE_NAME)
+    logger.info("Tracing enabled: exporter=%s", TRACING_EXPORTER)
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans (app shutdown)."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+def current_context():
+    """The active trace context, to hand to work that runs elsewhere
+    (executor threads, response generators). None when tracing is off."""
+    return otel_context.get_current() if _tracer is not None else None
+
+
+@contextmanager
+def span(name: str, context=None, **attributes):
+    """Child span of the current one (or of `context`). Yields None when off."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(
+        name,
+        context=context,
+        attributes={k: v for k, v in attributes.items() if v is not None},
+    ) as current:
+        yield current
+
+
+def record_span(name: str, start_ns: int, context=None, **attributes):
+    """Record an already-finished interval (e.g. time spent queued) as a span."""
+    if _tracer is None:
+        return
+    finished = _tracer.start_span(
+        name,
+        context=context,
+        start_time=start_ns,
+        attributes={k: v for k, v in attributes.items() if v is not None},
+    )
+    finished.end(end_time=time.time_ns())
+
+
+async def trace_middleware(request, call_next):
+    """Server span per request, continuing the caller's trace."""
+    if _tracer is None:
+        return await call_next(request)
+
+    token = otel_context.attach(propagate.extract(request.headers))
+    try:
+        with _tracer.start_as_current_span(
+            f"{request.method} {request.url.path}",
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": request.method,
+                "url.path": request.url.path,
+                "ina.request_id": request.headers.get("X-Request-ID", ""),
+            },
+        ) as current:
+            response = await call_next(request)
+            current.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                current.set_status(Status(StatusCode.ERROR))
+            return response
+    finally:
+        otel_context.detach(token)
@@ -0,0 +1,226 @@
+"""
+Offline tier-0 training script — produces tier0_model.npz.
+
+This is NOT part of the FastAPI service. Run it from microservices/nlu-service:
+
+    python -m app.train_tier0
+    python -m app.train_tier0 --labels /var/log/nlu/tier0_labels.jsonl --precision 0.98
+
+What it does:
+    1. Loads compile_nlu.RAW_EXAMPLES (hand-labelled) and any JSONL label
+       logs written by the service (NLU_TIER0_LABEL_LOG, LLM-labelled);
+       duplicates are dropped, hand labels win
+    2. K-fold cross-validation → out-of-fold predictions for every example
+    3. Fits a temperature per head on those predictions (calibration)
+    4. Per intent, picks the lowest joint-confidence threshold whose
+       out-of-fold answers are all-fields correct at least --precision of
+       the time (and at least --min-support of them); otherwise the intent
+       is never served
+    5. Trains the final heads on everything and saves the artifact with a
+       version hash and the cross-validated coverage/agreement report
+
+No LLM calls and no dspy import (RAW_EXAMPLES is parsed, not imported).
+The service loads the artifact at startup (tier0.load_model()).
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from . import tier0
+from .nlu_cache import normalize
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s  %(message)s")
+logger = logging.getLogger(__name__)
+
+COMPILE_NLU = Path(__file__).parent / "compile_nlu.py"
+
+
+# ---------------------------------------------------------------------------
+# 1. Data
+# ---------------------------------------------------------------------------
+def raw_examples() -> list:
+    tree = ast.parse(COMPILE_NLU.read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "RAW_EXAMPLES" for t in node.targets
+        ):
+            rows = ast.literal_eval(node.value)
+            return [
+                {
+                    "text": row["user_message"],
+                    "intent": row["intent"],
+                    "price": None if row["price"] == "None" else float(row["price"]),
+                    "sentiment": row["sentiment"],
+                    "language": row["language"],
+                }
+                for row in rows
+            ]
+    raise SystemExit(f"RAW_EXAMPLES not found in {COMPILE_NLU}")
+
+
+def logged_examples(paths: list) -> list:
+    rows = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    rows.append(json.loads(line))
+    return rows
+
+
+def dedupe(hand: list, logged: list) -> list:
+    seen, rows = set(), []
+    for row in hand + logged:  # hand labels first → they win
+        key = normalize(row["text"])
+        if key not in seen:
+            seen.add(key)
+            rows.append(row)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# 2–4. Cross-validation, calibration, thresholds
+# ---------------------------------------------------------------------------
+def fit_heads(X: np.ndarray, rows: list, classes: dict) -> dict:
+    return {
+        name: tier0.LinearHead.fit(X, [r[name] for r in rows], classes[name])
+        for name in tier0.HEADS
+    }
+
+
+def out_of_fold_logits(X: np.ndarray, rows: list, classes: dict, folds: int, seed: int) -> dict:
+    order = np.random.default_rng(seed).permutation(len(rows))
+    logits = {name: np.zeros((len(rows), len(classes[name])), dtype=np.float32) for name in tier0.HEADS}
+    for fold in range(folds):
+        test = order[fold::folds]
+        train = np.setdiff1d(order, test)
+        heads = fit_heads(X[train], [rows[i] for i in train], classes)
+        for name, head in heads.items():
+            logits[name][test] = head.logits(X[test])
+    return logits
+
+
+def fit_temperature(logits: np.ndarray, targets: np.ndarray) -> float:
+    """Temperature minimising out-of-fold negative log-likelihood."""
+    best, best_nll = 1.0, float("inf")
+    for temperature in np.geomspace(0.05, 20.0, 60):
+        probs = tier0.softmax(logits / temperature)
+        nll = -np.mean(np.log(probs[np.arange(len(targets)), targets] + 1e-12))
+        if nll < best_nll:
+            best, best_nll = float(temperature), nll
+    return best
+
+
+def choose_thresholds(oof: list, precision: float, min_support: int) -> dict:
+    """
+    intent → lowest threshold meeting `precision` over out-of-fold answers
+    at or above it, or None. `oof` rows: (intent, confidence, correct, eligible).
+    """
+    thresholds = {}
+    for intent in sorted({row[0] for row in oof}):
+        if intent in tier0.NEVER_SERVED:
+            thresholds[intent] = None
+            continue
+        ranked = sorted(
+            (row for row in oof if row[0] == intent and row[3]), key=lambda row: -row[1]
+        )
+        threshold, correct = None, 0
+        for n, (_, confidence, ok, _) in enumerate(ranked, start=1):
+            correct += ok
+            if n >= min_support and correct / n >= precision:
+                threshold = confidence
+        thresholds[intent] = threshold
+    return thresholds
+
+
+def report(oof: list, thresholds: dict) -> dict:
+    served = [
+        row for row in oof if thresholds.get(row[0]) is not None and row[3] and row[1] >= thresholds[row[0]]
+    ]
+    return {
+        "coverage": len(served) / len(oof) if oof else 0.0,
+        "agreement": sum(row[2] for row in served) / len(served) if served else 1.0,
+        "served": len(served),
+    }
+
+
+# ---------------------------------------------------------------------------
+# 5. Train + save
+# ---------------------------------------------------------------------------
+def train(rows: list, dim: int, folds: int, precision: float, min_support: int, seed: int):
+    X = np.stack([tier0.features(r["text"], dim) for r in rows])
+    classes = {name: sorted({r[name] for r in rows}) for name in tier0.HEADS}
+
+    logits = out_of_fold_logits(X, rows, classes, folds, seed)
+    temperatures, probs = {}, {}
+    for name in tier0.HEADS:
+        targets = np.array([classes[name].index(r[name]) for r in rows])
+        temperatures[name] = fit_temperature(logits[name], targets)
+        probs[name] = tier0.softmax(logits[name] / temperatures[name])
+
+    oof = []
+    for i, row in enumerate(rows):
+        predicted = {name: classes[name][int(np.argmax(probs[name][i]))] for name in tier0.HEADS}
+        confidence = float(np.prod([probs[name][i].max() for name in tier0.HEADS]))
+        price = tier0.offer_price(row["text"]) if predicted["intent"] == "MAKE_OFFER" else None
+        eligible = predicted["intent"] != "MAKE_OFFER" or price is not None
+        correct = all(predicted[name] == row[name] for name in tier0.HEADS) and price == row["price"]
+        oof.append((predicted["intent"], confidence, correct, eligible))
+
+    thresholds = choose_thresholds(oof, precision, min_support)
+    heads = fit_heads(X, rows, classes)
+    for name, head in heads.items():
+        head.temperature = temperatures[name]
+
+    digest = hashlib.sha256()
+    for name in tier0.HEADS:
+        digest.update(heads[name].weights.tobytes())
+        digest.update(heads[name].bias.tobytes())
+    digest.update(json.dumps([thresholds, temperatures], sort_keys=True).encode("utf-8"))
+    metadata = {
+        "version": digest.hexdigest()[:16],
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "examples": len(rows),
+        "precision_target": precision,
+        "cv": dict(report(oof, thresholds), folds=folds),
+    }
+    return tier0.Tier0Model(heads, thresholds, dim, metadata)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the tier-0 NLU classifier.")
+    parser.add_argument("--labels", nargs="*", default=[], help="JSONL label logs (NLU_TIER0_LABEL_LOG)")
+    parser.add_argument("--out", default=tier0.NLU_TIER0_MODEL_PATH)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--precision", type=float, default=0.97, help="per-intent agreement target")
+    parser.add_argument("--min-support", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    hand, logged = raw_examples(), logged_examples(args.labels)
+    rows = dedupe(hand, logged)
+    logger.info("Examples: %d hand-labelled + %d logged → %d unique", len(hand), len(logged), len(rows))
+
+    model = train(rows, args.dim, args.folds, args.precision, args.min_support, args.seed)
+    model.save(args.out)
+
+    cv = model.metadata["cv"]
+    logger.info("Thresholds: %s", model.thresholds)
+    logger.info(
+        "Cross-validated coverage %.0f%% at %.0f%% agreement (%d/%d served)",
+        cv["coverage"] * 100, cv["agreement"] * 100, cv["served"], len(rows),
+    )
+    logger.info("Saved tier-0 model %s to %s", model.version, args.out)
+
+
+if __name__ == "__main__":
+    main()
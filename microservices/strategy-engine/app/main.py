@@ -6,6 +6,7 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 from .schemas import StrategyInput, StrategyOutput
 from .strategy_core import make_decision
+from . import tracing
 from prometheus_fastapi_instrumentator import Instrumentator
 
 # Configure basic logging
@@ -26,6 +27,10 @@ app = FastAPI(
 # Prometheus Instrumentation
 Instrumentator().instrument(app).expose(app)
 
+# Tracing: server span per request, joined to the orchestrator's trace
+tracing.setup_tracing()
+app.middleware("http")(tracing.trace_middleware)
+
 
 # ---------------------- Auth Middleware ----------------------
 @app.middleware("http")
@@ -68,7 +73,12 @@ async def decide_strategy(input_data: StrategyInput):
     try:
         logger.info(f"Received request for session: {input_data.session_id}")
 
-        decision = make_decision(input_data)
+        with tracing.span(
+            "strategy.make_decision", **{"ina.intent": input_data.user_intent}
+        ) as span:
+            decision = make_decision(input_data)
+            if span is not None:
+                span.set_attribute("strategy.action", decision.action)
 
         logger.info(f"Decision for {input_data.session_id}: {decision.action}")
         return decision
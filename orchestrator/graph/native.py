@@ -0,0 +1,80 @@
+"""
+Native executor for the fixed NLU → (brain | fast_track) → mouth graph.
+
+Problem (before):
+    The turn graph is a 4-node DAG with one conditional edge, but running it
+    through a compiled LangGraph StateGraph costs per-turn channel
+    bookkeeping, state merging and callback plumbing, and importing
+    langgraph adds to worker startup.
+
+Solution:
+    NativeGraph runs the same node functions and route_after_nlu with plain
+    awaits over the AgentState dict. It mirrors the LangGraph semantics the
+    nodes rely on, so both executors return identical results:
+
+    - input and node updates are filtered to AgentState keys
+      (unknown keys are dropped, as LangGraph does)
+    - each node gets a fresh shallow copy of the current state;
+      its returned dict (or None) is merged into the state
+    - route_after_nlu picks the next node; "__end__" stops after NLU
+    - exceptions propagate to the caller unchanged
+
+    Both executors are built from the same NODES / ENTRY / EDGES tables in
+    workflow.py, so the topology is defined once.
+    benchmarks/graph_executor_bench.py checks that they produce the same
+    output.
+
+Config (env):
+    GRAPH_EXECUTOR   langgraph (default) | native   (read by workflow.py)
+
+Usage:
+    from orchestrator.graph.workflow import build_workflow
+
+    graph_app = build_workflow()          # honours GRAPH_EXECUTOR
+    result = await graph_app.ainvoke(state)
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from orchestrator.graph.state import AgentState
+
+END = "__end__"
+
+_STATE_KEYS = frozenset(AgentState.__annotations__)
+
+Node = Callable[[AgentState], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def _merge(state: Dict[str, Any], update: Optional[Dict[str, Any]]):
+    if update:
+        for key, value in update.items():
+            if key in _STATE_KEYS:
+                state[key] = value
+
+
+class NativeGraph:
+    """Drop-in replacement for the compiled graph (only ainvoke is used)."""
+
+    def __init__(
+        self,
+        nodes: Dict[str, Node],
+        entry: str,
+        edges: Dict[str, Any],
+    ):
+        """
+        nodes: name → async node function
+        entry: first node
+        edges: name → next node name, or a router(state) → next node name
+        """
+        self.nodes = nodes
+        self.entry = entry
+        self.edges = edges
+
+    async def ainvoke(self, input_state: Dict[str, Any]) -> Dict[str, Any]:
+        state = {k: v for k, v in input_state.items() if k in _STATE_KEYS}
+        current = self.entry
+        while current != END:
+            _merge(state, await self.nodes[current](dict(state)))
+            edge = self.edges.get(current, END)
+            current = edge(dict(state)) if callable(edge) else edge
+        return state
@@ -1,16 +1,35 @@
 from orchestrator.graph.state import AgentState
 from orchestrator.lib.nlu_client import call_nlu
 from orchestrator.lib.brain_client import call_brain
-from orchestrator.lib.phraser_client import call_phraser
+from orchestrator.lib.phraser_client import call_phraser, stream_phraser
 from orchestrator.lib.intents import Intent
+from orchestrator.lib import instrumentation, speculation
 import logging
 
 logger = logging.getLogger("orchestrator_nodes")
 
 
+async def _emit(state: AgentState, event: str, data: dict):
+    """
+    Forward a progress event to the streaming chat endpoint.
+    No-op unless this turn is streamed (state["_events"] is set).
+    """
+    sink = state.get("_events")
+    if sink is None:
+        return
+    try:
+        await sink(event, data)
+    except Exception as e:
+        logger.warning("Dropping stream event %s: %s", event, e)
+
+
 # ---------- NLU NODE ----------
+@instrumentation.node("nlu_node")
 async def nlu_node(state: AgentState):
 
+    # ⚡ Bare numeric offer ("1500 final") → start the Brain call alongside NLU
+    spec = speculation.start(state)
+
     try:
         nlu = await call_nlu(
             state["user_input"],
@@ -34,6 +53,9 @@ async def nlu_node(state: AgentState):
     state["error_message"] = nlu.get("error_message")
     state["is_fallback"] = nlu.get("is_fallback", False)
 
+    # Keep the speculative decision only if NLU produced the same Brain inputs
+    state["_speculation"] = speculation.resolve(spec, state)
+
     if state["intent"] == Intent.INVALID:
         state["final_response"] = (
             state["error_message"] or "I cannot process that input, please try again."
@@ -41,23 +63,42 @@ async def nlu_node(state: AgentState):
 
     logger.info("NLU RAW: %s", nlu)
 
+    # ⭐ Streaming: early "thinking" event as soon as NLU is done
+    await _emit(
+        state,
+        "thinking",
+        {
+            "intent": state["intent"],
+            "language": state["language"],
+            "user_offer": state["user_offer"],
+        },
+    )
+
     return state
 
 
 # ---------- BRAIN NODE ----------
+@instrumentation.node("brain_node")
 async def brain_node(state: AgentState):
 
+    spec = state.get("_speculation")
+    state["_speculation"] = None
+
     try:
-        brain = await call_brain(
-            mam=state["mam"],
-            asking_price=state["asking_price"],
-            user_offer=state.get("user_offer", 0),
-            user_intent=state.get("intent", Intent.UNKNOWN),
-            user_sentiment=state.get("sentiment", "neutral"),
-            session_id=state["session_id"],
-            history=state.get("history", []),
-            request_id=state.get("request_id", ""),
-        )
+        if spec is not None:
+            # ⚡ Confirmed speculation — already running since before NLU returned
+            brain = await speculation.take(spec)
+        else:
+            brain = await call_brain(
+                mam=state["mam"],
+                asking_price=state["asking_price"],
+                user_offer=state.get("user_offer", 0),
+                user_intent=state.get("intent", Intent.UNKNOWN),
+                user_sentiment=state.get("sentiment", "neutral"),
+                session_id=state["session_id"],
+                history=state.get("history", []),
+                request_id=state.get("request_id", ""),
+            )
 
     except Exception:
         # Safe fallback if Brain fails
@@ -98,12 +139,19 @@ async def brain_node(state: AgentState):
     state["_brain_raw"] = brain
     logger.info("BRAIN RAW: %s", brain)
 
+    await _emit(
+        state,
+        "decision",
+        {"action": state["brain_action"], "counter_price": state["counter_price"]},
+    )
+
     return state
 
 
 # ----------- MOUTH NODE ----------
 
 
+@instrumentation.node("mouth_node")
 async def mouth_node(state: AgentState):
 
     brain = state.get("_brain_raw")
@@ -113,11 +161,22 @@ async def mouth_node(state: AgentState):
         return state
 
     try:
-        ms5 = await call_phraser(
-            brain,
-            language=state.get("language", "english"),
-            request_id=state.get("request_id", ""),
-        )
+        if state.get("_events") is not None:
+            # Streaming turn: forward phraser chunks as they arrive
+            ms5 = await stream_phraser(
+                brain,
+                on_token=lambda text: _emit(state, "token", {"text": text}),
+                language=state.get("language", "english"),
+                request_id=state.get("request_id", ""),
+                intent=state.get("intent", Intent.UNKNOWN),
+            )
+        else:
+            ms5 = await call_phraser(
+                brain,
+                language=state.get("language", "english"),
+                request_id=state.get("request_id", ""),
+                intent=state.get("intent", Intent.UNKNOWN),
+            )
 
         logger.info("PHRASER RAW RESPONSE: %s", ms5)
 
@@ -154,6 +213,7 @@ async def mouth_node(state: AgentState):
 
 
 # ---------- FAST TRACK NODE ----------
+@instrumentation.node("fast_track_node")
 async def fast_track_node(state: AgentState):
     """
     Handles conversational intents that do NOT need the Strategy Engine.
@@ -225,4 +285,6 @@ async def fast_track_node(state: AgentState):
     logger.info(
         "FAST TRACK: intent=%s → action=%s, key=%s", intent, action, response_key
     )
+
+    await _emit(state, "decision", {"action": action, "counter_price": None})
     return state
@@ -1,8 +1,9 @@
-from typing import TypedDict, List, Dict, Any
+from typing import TypedDict, List, Dict, Any, Callable, Awaitable
 
 
 class AgentState(TypedDict, total=False):
     session_id: str
+    request_id: str  # forwarded to services as X-Request-ID
     mam: float
     asking_price: float
     user_input: str
@@ -27,3 +28,7 @@ class AgentState(TypedDict, total=False):
 
     # Internal
     _brain_raw: Dict[str, Any]
+    # Confirmed speculative Brain call (lib/speculation.py), consumed by brain_node
+    _speculation: Dict[str, Any]
+    # Streaming turns only: async sink(event, data) for progress events
+    _events: Callable[[str, Dict[str, Any]], Awaitable[None]]
@@ -1,8 +1,16 @@
-from langgraph.graph import StateGraph
+import os
+import logging
+
 from orchestrator.graph.state import AgentState
 from orchestrator.graph.nodes import nlu_node, brain_node, mouth_node, fast_track_node
+from orchestrator.graph.native import NativeGraph
 from orchestrator.lib.intents import Intent
 
+logger = logging.getLogger("workflow")
+
+# langgraph (default) | native — see orchestrator/graph/native.py
+GRAPH_EXECUTOR = os.getenv("GRAPH_EXECUTOR", "langgraph").lower()
+
 
 # Intents that bypass the Strategy Engine and go directly to the Phraser
 FAST_TRACK_INTENTS = {
@@ -36,21 +44,54 @@ def route_after_nlu(state: AgentState) -> str:
     return "brain"
 
 
-def build_workflow():
-    graph = StateGraph(AgentState)
+# Graph topology — shared by both executors
+NODES = {
+    "nlu": nlu_node,
+    "brain": brain_node,
+    "fast_track": fast_track_node,
+    "mouth": mouth_node,
+}
+ENTRY = "nlu"
+EDGES = {
+    # Intent-based conditional routing after NLU
+    "nlu": route_after_nlu,
+    # Both paths converge at the Phraser
+    "brain": "mouth",
+    "fast_track": "mouth",
+}
 
-    graph.add_node("nlu", nlu_node)
-    graph.add_node("brain", brain_node)
-    graph.add_node("fast_track", fast_track_node)
-    graph.add_node("mouth", mouth_node)
 
-    graph.set_entry_point("nlu")
+def build_langgraph_workflow(nodes: dict | None = None):
+    """Compiled LangGraph StateGraph. `nodes` overrides NODES (benchmarks)."""
+    from langgraph.graph import StateGraph
 
-    # Intent-based conditional routing after NLU
-    graph.add_conditional_edges("nlu", route_after_nlu)
+    graph = StateGraph(AgentState)
 
-    # Both paths converge at the Phraser
-    graph.add_edge("brain", "mouth")
-    graph.add_edge("fast_track", "mouth")
+    for name, node in (nodes or NODES).items():
+        graph.add_node(name, node)
+
+    graph.set_entry_point(ENTRY)
+
+    for source, target in EDGES.items():
+        if callable(target):
+            graph.add_conditional_edges(source, target)
+        else:
+            graph.add_edge(source, target)
 
     return graph.compile()
+
+
+def build_native_workflow(nodes: dict | None = None) -> NativeGraph:
+    """Plain-async executor over the same topology (orchestrator/graph/native.py)."""
+    return NativeGraph(nodes or NODES, ENTRY, EDGES)
+
+
+def build_workflow(executor: str | None = None):
+    """Build the turn graph with the configured executor (GRAPH_EXECUTOR)."""
+    executor = (executor or GRAPH_EXECUTOR).lower()
+    if executor == "native":
+        logger.info("Graph executor: native")
+        return build_native_workflow()
+    if executor != "langgraph":
+        logger.warning("Unknown GRAPH_EXECUTOR=%r — using langgraph", executor)
+    return build_langgraph_workflow()
@@ -1,15 +1,20 @@
 import os
+import sys
+import time
 import httpx
 import logging
+import importlib
+import importlib.util
+from pathlib import Path
 
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
     retry_if_exception_type,
-    before_sleep_log,
 )
 
+from orchestrator.lib import instrumentation, tracing
 from orchestrator.lib.http_pool import get_http_client
 from orchestrator.lib.circuit_breaker import CircuitBreaker, CircuitOpenError
 
@@ -17,9 +22,20 @@ logger = logging.getLogger("brain_client")
 
 STRATEGY_ENGINE_URL = os.getenv("STRATEGY_ENGINE_URL", "http://strategy-engine:8000")
 
+# remote (default): HTTP call to the strategy-engine service — keeps the MAM
+#   logic isolated in its own container.
+# embedded: import microservices/strategy-engine/app in-process and call
+#   make_decision directly — no network hop, JSON, retries or breaker.
+STRATEGY_ENGINE_MODE = os.getenv("STRATEGY_ENGINE_MODE", "remote").lower()
+STRATEGY_ENGINE_PATH = os.getenv(
+    "STRATEGY_ENGINE_PATH",
+    str(Path(__file__).resolve().parents[2] / "microservices" / "strategy-engine"),
+)
+
+SERVICE = "strategy-engine"
 
 # Circuit breaker: opens after 5 failures, recovers after 30s
-_breaker = CircuitBreaker("strategy-engine", failure_threshold=5, recovery_timeout=30)
+_breaker = CircuitBreaker(SERVICE, failure_threshold=5, recovery_timeout=30)
 
 
 def _build_fallback(asking_price: float) -> dict:
@@ -35,21 +51,84 @@ def _build_fallback(asking_price: float) -> dict:
     }
 
 
+# ---------------------- Embedded mode ----------------------
+_ENGINE_PACKAGE = "ina_strategy_engine"
+_engine = None  # (StrategyInput, make_decision) once loaded
+_engine_failed = False
+
+
+def load_strategy_engine():
+    """
+    Import the strategy-engine `app` package under its own name
+    (ina_strategy_engine) so it cannot clash with another top-level `app`.
+    Returns (StrategyInput, make_decision), or None if it cannot be imported.
+    """
+    global _engine, _engine_failed
+    if _engine is not None or _engine_failed:
+        return _engine
+
+    package_dir = Path(STRATEGY_ENGINE_PATH) / "app"
+    try:
+        spec = importlib.util.spec_from_file_location(
+            _ENGINE_PACKAGE,
+            package_dir / "__init__.py",
+            submodule_search_locations=[str(package_dir)],
+        )
+        if spec is None:
+            raise ImportError(f"no strategy-engine package at {package_dir}")
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[_ENGINE_PACKAGE] = package
+        spec.loader.exec_module(package)
+        schemas = importlib.import_module(f"{_ENGINE_PACKAGE}.schemas")
+        core = importlib.import_module(f"{_ENGINE_PACKAGE}.strategy_core")
+    except Exception:
+        logger.exception(
+            "Embedded strategy engine not importable from %s — using remote mode",
+            package_dir,
+        )
+        sys.modules.pop(_ENGINE_PACKAGE, None)
+        _engine_failed = True
+        return None
+
+    _engine = (schemas.StrategyInput, core.make_decision)
+    logger.info("Strategy engine embedded (policy %s)", core.POLICY_VERSION)
+    return _engine
+
+
+def _decide_embedded(engine, payload: dict) -> dict:
+    """
+    make_decision on the event loop (pure, microsecond-scale). The output is
+    dumped in JSON mode, i.e. exactly what /api/v1/decide would return.
+    Validation errors and engine exceptions propagate like a 422/500 would.
+    """
+    strategy_input, make_decision = engine
+    with tracing.span(
+        "strategy.make_decision", **{"ina.intent": payload["user_intent"]}
+    ) as current:
+        decision = make_decision(strategy_input(**payload))
+        tracing.set_attributes(current, **{"strategy.action": decision.action})
+    data = decision.model_dump(mode="json")
+    data["is_fallback"] = False
+    return data
+
+
+# ---------------------- Remote mode ----------------------
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, max=4),
     retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-    before_sleep=before_sleep_log(logger, logging.WARNING),
+    before_sleep=instrumentation.retry_hook(SERVICE, logger),
     reraise=True,
 )
 async def _call_brain_with_retry(payload: dict, request_id: str = "") -> dict:
     """Raw HTTP call to Strategy Engine with retry logic."""
     client = get_http_client()
     headers = {"X-Request-ID": request_id} if request_id else {}
-    resp = await client.post(
-        f"{STRATEGY_ENGINE_URL}/api/v1/decide", json=payload, headers=headers
-    )
-    resp.raise_for_status()
+    async with instrumentation.attempt(SERVICE):
+        resp = await client.post(
+            f"{STRATEGY_ENGINE_URL}/api/v1/decide", json=payload, headers=headers
+        )
+        resp.raise_for_status()
     data = resp.json()
     data["is_fallback"] = False
     return data
@@ -71,6 +150,9 @@ async def call_brain(
     - Retry with exponential backoff (3 attempts)
     - Circuit breaker (stops calling after 5 consecutive failures)
     - Safe fallback on any failure
+
+    With STRATEGY_ENGINE_MODE=embedded make_decision runs in-process
+    instead (same output, same fallback on any error).
     """
     if user_offer is None:
         user_offer = 0.0
@@ -94,17 +176,35 @@ async def call_brain(
         user_offer,
     )
 
+    started = time.perf_counter()
+
+    engine = load_strategy_engine() if STRATEGY_ENGINE_MODE == "embedded" else None
+    if engine is not None:
+        try:
+            data = _decide_embedded(engine, payload)
+            instrumentation.record_call(SERVICE, user_intent, "ok", started)
+            return data
+        except Exception as e:
+            logger.exception(f"[MS4] Embedded Brain failed: {e}")
+            instrumentation.record_call(SERVICE, user_intent, "fallback", started)
+            return _build_fallback(asking_price)
+
     try:
-        return await _breaker.call(_call_brain_with_retry, payload, request_id)
+        data = await _breaker.call(_call_brain_with_retry, payload, request_id)
+        instrumentation.record_call(SERVICE, user_intent, "ok", started)
+        return data
 
     except CircuitOpenError:
         logger.warning("Brain circuit OPEN — using fallback")
+        instrumentation.record_call(SERVICE, user_intent, "circuit_open", started)
         return _build_fallback(asking_price)
 
     except httpx.HTTPStatusError as e:
         logger.error(f"[MS4] Brain HTTP error {e.response.status_code}: {e}")
+        instrumentation.record_call(SERVICE, user_intent, "fallback", started)
         return _build_fallback(asking_price)
 
     except Exception as e:
         logger.exception(f"[MS4] Brain failed after retries: {e}")
+        instrumentation.record_call(SERVICE, user_intent, "fallback", started)
         return _build_fallback(asking_price)
@@ -16,6 +16,9 @@ Usage:
     except CircuitOpenError:
         # Service is down, use fallback
         result = fallback_value
+
+Metrics: ina_circuit_breaker_state{service} (0 CLOSED, 1 HALF_OPEN, 2 OPEN)
+and ina_circuit_breaker_transitions_total{service, from_state, to_state}.
 """
 
 import time
@@ -23,6 +26,8 @@ import logging
 from enum import Enum
 from typing import Any
 
+from orchestrator.lib import metrics
+
 logger = logging.getLogger("circuit_breaker")
 
 
@@ -32,6 +37,10 @@ class CircuitState(str, Enum):
     HALF_OPEN = "HALF_OPEN"
 
 
+# Gauge value per state
+_STATE_VALUE = {"CLOSED": 0, "HALF_OPEN": 1, "OPEN": 2}
+
+
 class CircuitOpenError(Exception):
     """Raised when the circuit is open and calls are being blocked."""
 
@@ -66,6 +75,21 @@ class CircuitBreaker:
         self._state = CircuitState.CLOSED
         self._failure_count = 0
         self._last_failure_time: float = 0.0
+        metrics.CIRCUIT_BREAKER_STATE.labels(service=name).set(0)
+
+    def _set_state(self, new_state: CircuitState):
+        """Change state, exporting the gauge and counting real transitions."""
+        if new_state == self._state:
+            return
+        metrics.CIRCUIT_BREAKER_TRANSITIONS.labels(
+            service=self.name,
+            from_state=self._state.value,
+            to_state=new_state.value,
+        ).inc()
+        metrics.CIRCUIT_BREAKER_STATE.labels(service=self.name).set(
+            _STATE_VALUE[new_state.value]
+        )
+        self._state = new_state
 
     @property
     def state(self) -> CircuitState:
@@ -78,7 +102,7 @@ class CircuitBreaker:
                     self.name,
                     elapsed,
                 )
-                self._state = CircuitState.HALF_OPEN
+                self._set_state(CircuitState.HALF_OPEN)
         return self._state
 
     async def call(self, func, *args, **kwargs) -> Any:
@@ -108,12 +132,28 @@ class CircuitBreaker:
             self._on_failure()
             raise
 
+    def check(self):
+        """
+        Raise CircuitOpenError if calls are currently blocked.
+
+        For calls that cannot be wrapped by call() (e.g. a streamed response
+        consumed incrementally) — pair with record_success()/record_failure().
+        """
+        if self.state == CircuitState.OPEN:
+            raise CircuitOpenError(self.name)
+
+    def record_success(self):
+        self._on_success()
+
+    def record_failure(self):
+        self._on_failure()
+
     def _on_success(self):
         """Reset on success. If HALF_OPEN → close the circuit."""
         if self._state == CircuitState.HALF_OPEN:
             logger.info("[%s] HALF_OPEN test succeeded — circuit CLOSED", self.name)
         self._failure_count = 0
-        self._state = CircuitState.CLOSED
+        self._set_state(CircuitState.CLOSED)
 
     def _on_failure(self):
         """Increment failure count. Open circuit if threshold reached."""
@@ -121,7 +161,7 @@ class CircuitBreaker:
         self._last_failure_time = time.monotonic()
 
         if self._failure_count >= self.failure_threshold:
-            self._state = CircuitState.OPEN
+            self._set_state(CircuitState.OPEN)
             logger.error(
                 "[%s] %d consecutive failures — circuit OPEN (blocking for %.0fs)",
                 self.name,
@@ -138,6 +178,6 @@ class CircuitBreaker:
 
     def reset(self):
         """Manually reset the circuit breaker (for testing)."""
-        self._state = CircuitState.CLOSED
+        self._set_state(CircuitState.CLOSED)
         self._failure_count = 0
         self._last_failure_time = 0.0
@@ -24,6 +24,8 @@ import os
 import logging
 import httpx
 
+from orchestrator.lib import tracing
+
 logger = logging.getLogger("http_pool")
 
 INTERNAL_KEY = os.getenv("INTERNAL_SERVICE_KEY", "")
@@ -54,6 +56,8 @@ def get_http_client() -> httpx.AsyncClient:
                 keepalive_expiry=30,  # seconds before idle connection is closed
             ),
             headers={"X-Internal-Key": INTERNAL_KEY},
+            # W3C traceparent on every inter-service call (no-op if tracing is off)
+            event_hooks={"request": [tracing.inject_request_hook]},
         )
         logger.info("HTTP connection pool created (max_conn=100, keepalive=20)")
     return _client
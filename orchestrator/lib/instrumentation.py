@@ -0,0 +1,135 @@
+"""
+Per-stage latency instrumentation (graph nodes, downstream calls).
+
+Problem (before):
+    Only prometheus_fastapi_instrumentator's HTTP-level metrics existed. A
+    slow /ina/v1/chat could not be attributed to NLU, the Strategy Engine,
+    the Phraser, lock waiting or Redis.
+
+Solution:
+    Small helpers that every stage uses to record into lib/metrics.py:
+
+    node(name)           decorator for LangGraph nodes
+                         → ina_graph_node_seconds{node, intent, outcome}
+    attempt(service)     one HTTP attempt inside a tenacity retry loop
+                         → ina_downstream_attempt_seconds{service, outcome}
+    retry_hook(...)      tenacity before_sleep: logs + counts the retry
+                         → ina_downstream_retries_total{service}
+    record_call(...)     the whole client call (retries + fallback)
+                         → ina_downstream_call_seconds{service, intent, outcome}
+
+    Redis operations are timed in state_manager._script() (one label per
+    Lua script), lock waits by the existing ina_session_lock_* metrics and
+    circuit breakers export their own state (circuit_breaker.py).
+
+    node() and attempt() also open a tracing span (graph.<node>,
+    http <service>) when tracing is enabled (lib/tracing.py).
+
+Outcomes:
+    node     ok | fallback (node switched the turn to a fallback) | error
+    call     ok | fallback (failed after retries) | circuit_open
+    attempt  ok | http_error | timeout | connect_error | error
+
+Usage:
+    from orchestrator.lib import instrumentation
+
+    @instrumentation.node("nlu_node")
+    async def nlu_node(state): ...
+
+    async with instrumentation.attempt("nlu-service"):
+        resp = await client.post(...)
+"""
+
+import time
+import logging
+from contextlib import asynccontextmanager
+from functools import wraps
+
+import httpx
+from tenacity import before_sleep_log
+
+from orchestrator.lib import metrics, tracing
+
+
+def intent_label(intent) -> str:
+    """Normalise an intent for use as a label ("unknown", None → UNKNOWN)."""
+    return str(intent or "UNKNOWN").upper()
+
+
+def node(name: str):
+    """Time a LangGraph node; intent is read from the state after the node ran."""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(state, *args, **kwargs):
+            started = time.perf_counter()
+            was_fallback = bool(state.get("is_fallback"))
+            outcome = "error"
+            with tracing.span(f"graph.{name}") as current:
+                try:
+                    result = await func(state, *args, **kwargs)
+                    became_fallback = (
+                        bool(result.get("is_fallback")) and not was_fallback
+                    )
+                    outcome = "fallback" if became_fallback else "ok"
+                    return result
+                finally:
+                    intent = intent_label(state.get("intent"))
+                    tracing.set_attributes(
+                        current, **{"ina.intent": intent, "ina.outcome": outcome}
+                    )
+                    metrics.GRAPH_NODE_SECONDS.labels(
+                        node=name, intent=intent, outcome=outcome
+                    ).observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def _attempt_outcome(exc: BaseException) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return "http_error"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.ConnectError):
+        return "connect_error"
+    return "error"
+
+
+@asynccontextmanager
+async def attempt(service: str):
+    """Time one HTTP attempt against `service` (client span while it runs)."""
+    started = time.perf_counter()
+    outcome = "ok"
+    with tracing.span(
+        f"http {service}", kind="client", **{"peer.service": service}
+    ) as current:
+        try:
+            yield
+        except BaseException as exc:
+            outcome = _attempt_outcome(exc)
+            raise
+        finally:
+            tracing.set_attributes(current, **{"ina.outcome": outcome})
+            metrics.DOWNSTREAM_ATTEMPT_SECONDS.labels(
+                service=service, outcome=outcome
+            ).observe(time.perf_counter() - started)
+
+
+def retry_hook(service: str, logger: logging.Logger):
+    """tenacity before_sleep callback: the usual warning log plus a retry count."""
+    log = before_sleep_log(logger, logging.WARNING)
+
+    def hook(retry_state):
+        metrics.DOWNSTREAM_RETRIES.labels(service=service).inc()
+        log(retry_state)
+
+    return hook
+
+
+def record_call(service: str, intent, outcome: str, started: float):
+    """Record a finished client call started at time.perf_counter() `started`."""
+    metrics.DOWNSTREAM_CALL_SECONDS.labels(
+        service=service, intent=intent_label(intent), outcome=outcome
+    ).observe(time.perf_counter() - started)
@@ -0,0 +1,193 @@
+"""
+Prometheus metrics for orchestrator internals.
+
+The HTTP layer is already covered by prometheus_fastapi_instrumentator;
+metrics defined here are served from the same /metrics endpoint (default
+prometheus_client registry).
+
+prometheus_client ships with prometheus_fastapi_instrumentator. If it is not
+installed, every metric below is a no-op so callers never need to check.
+
+Usage:
+    from orchestrator.lib import metrics
+
+    metrics.SESSION_CACHE_EVENTS.labels(event="hit").inc()
+"""
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+class _NoopMetric:
+    """Stand-in for Counter/Gauge/Histogram when prometheus_client is missing."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def dec(self, *args, **kwargs):
+        pass
+
+    def set(self, *args, **kwargs):
+        pass
+
+    def observe(self, *args, **kwargs):
+        pass
+
+
+if not PROMETHEUS_AVAILABLE:
+    Counter = Gauge = Histogram = _NoopMetric  # type: ignore
+
+
+# ---------------------- L1 Session Cache ----------------------
+SESSION_CACHE_EVENTS = Counter(
+    "ina_session_cache_events_total",
+    "Per-worker session cache events (hit, miss, put, invalidation, eviction, expired).",
+    ["event"],
+)
+SESSION_CACHE_ENTRIES = Gauge(
+    "ina_session_cache_entries",
+    "Number of sessions currently held in this worker's L1 cache.",
+)
+
+# ---------------------- Session Lock ----------------------
+SESSION_LOCK_WAIT_SECONDS = Histogram(
+    "ina_session_lock_wait_seconds",
+    "Time from requesting a session lock until it was acquired or the wait timed out.",
+    ["outcome"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0),
+)
+SESSION_LOCK_CONTENTION = Counter(
+    "ina_session_lock_contention_total",
+    "Lock requests that found the session lock held and had to queue.",
+)
+SESSION_LOCK_TIMEOUTS = Counter(
+    "ina_session_lock_timeouts_total",
+    "Lock requests that gave up after acquire_timeout (answered with 429).",
+)
+
+# ---------------------- Optimistic Concurrency ----------------------
+SESSION_CAS_CONFLICTS = Counter(
+    "ina_session_cas_conflicts_total",
+    "Turns whose compare-and-set save hit a version conflict (retried, rejected, exhausted, finalized).",
+    ["outcome"],
+)
+
+# ---------------------- Rate Limiter ----------------------
+RATE_LIMIT_DECISIONS = Counter(
+    "ina_rate_limit_decisions_total",
+    "Distributed rate limiter decisions (allowed, limited, error = Redis unavailable, failed open).",
+    ["decision"],
+)
+
+# ---------------------- Outcome Outbox ----------------------
+OUTBOX_EVENTS = Counter(
+    "ina_outbox_events_total",
+    "Negotiation outcome outbox events (enqueued, enqueue_error, delivered, failed, retried, dead_lettered).",
+    ["event"],
+)
+OUTBOX_LAG_SECONDS = Gauge(
+    "ina_outbox_lag_seconds",
+    "Age of the oldest negotiation outcome still waiting for delivery.",
+)
+OUTBOX_BACKLOG = Gauge(
+    "ina_outbox_backlog",
+    "Negotiation outcomes currently in the outbox stream (undelivered).",
+)
+
+# ---------------------- WebSocket Channel ----------------------
+WS_ACTIVE_CONNECTIONS = Gauge(
+    "ina_ws_active_connections",
+    "WebSocket chat connections currently open on this worker.",
+)
+WS_CONNECTIONS = Counter(
+    "ina_ws_connections_total",
+    "WebSocket connection attempts (accepted, auth_failed, rejected_cap).",
+    ["outcome"],
+)
+WS_DISCONNECTS = Counter(
+    "ina_ws_disconnects_total",
+    "Closed WebSocket chat connections by reason (client, idle, expired, error).",
+    ["reason"],
+)
+WS_MESSAGE_SECONDS = Histogram(
+    "ina_ws_message_seconds",
+    "Per-message latency on the WebSocket channel, frame received to response sent.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0),
+)
+
+# ---------------------- Per-Stage Latency ----------------------
+# Shared buckets: from sub-ms Redis ops up to slow LLM calls
+_STAGE_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+GRAPH_NODE_SECONDS = Histogram(
+    "ina_graph_node_seconds",
+    "LangGraph node duration (nlu_node, brain_node, fast_track_node, mouth_node).",
+    ["node", "intent", "outcome"],
+    buckets=_STAGE_BUCKETS,
+)
+DOWNSTREAM_CALL_SECONDS = Histogram(
+    "ina_downstream_call_seconds",
+    "Client call to a downstream service including retries (outcome: ok, fallback, circuit_open).",
+    ["service", "intent", "outcome"],
+    buckets=_STAGE_BUCKETS,
+)
+DOWNSTREAM_ATTEMPT_SECONDS = Histogram(
+    "ina_downstream_attempt_seconds",
+    "Single HTTP attempt to a downstream service (outcome: ok, http_error, timeout, connect_error, error).",
+    ["service", "outcome"],
+    buckets=_STAGE_BUCKETS,
+)
+DOWNSTREAM_RETRIES = Counter(
+    "ina_downstream_retries_total",
+    "Downstream HTTP attempts that failed and were retried.",
+    ["service"],
+)
+STATE_OP_SECONDS = Histogram(
+    "ina_state_op_seconds",
+    "Redis session-state operation duration, one op per Lua script (plus ping).",
+    ["op", "outcome"],
+    buckets=_STAGE_BUCKETS,
+)
+
+# ---------------------- Circuit Breakers ----------------------
+CIRCUIT_BREAKER_STATE = Gauge(
+    "ina_circuit_breaker_state",
+    "Circuit breaker state per downstream service (0 = CLOSED, 1 = HALF_OPEN, 2 = OPEN).",
+    ["service"],
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "ina_circuit_breaker_transitions_total",
+    "Circuit breaker state transitions.",
+    ["service", "from_state", "to_state"],
+)
+
+# ---------------------- Brain Speculation ----------------------
+BRAIN_SPECULATION = Counter(
+    "ina_brain_speculation_total",
+    "Speculative Strategy Engine calls started alongside NLU (outcome: hit, intent_mismatch, price_mismatch, sentiment_mismatch, nlu_fallback).",
+    ["outcome"],
+)
+BRAIN_SPECULATION_SAVED_SECONDS = Histogram(
+    "ina_brain_speculation_saved_seconds",
+    "Brain latency hidden behind the NLU call, per speculation hit.",
+    buckets=_STAGE_BUCKETS,
+)
+
+# ---------------------- NLU Fast Path ----------------------
+NLU_FAST_PATH = Counter(
+    "ina_nlu_fast_path_total",
+    "Messages checked by the local fast-path NLU tier (result: matched intent, or miss → nlu-service).",
+    ["result"],
+)
@@ -1,4 +1,5 @@
 import os
+import time
 import httpx
 import logging
 
@@ -7,9 +8,9 @@ from tenacity import (
     stop_after_attempt,
     wait_exponential,
     retry_if_exception_type,
-    before_sleep_log,
 )
 
+from orchestrator.lib import instrumentation, metrics, nlu_fast_path
 from orchestrator.lib.http_pool import get_http_client
 from orchestrator.lib.circuit_breaker import CircuitBreaker, CircuitOpenError
 
@@ -17,8 +18,10 @@ logger = logging.getLogger("nlu_client")
 
 NLU_URL = os.getenv("NLU_URL", "http://nlu-service:8000")
 
+SERVICE = "nlu-service"
+
 # Circuit breaker: opens after 5 failures, recovers after 30s
-_breaker = CircuitBreaker("nlu-service", failure_threshold=5, recovery_timeout=30)
+_breaker = CircuitBreaker(SERVICE, failure_threshold=5, recovery_timeout=30)
 
 # Fallback response when NLU is unavailable
 _FALLBACK = {
@@ -33,15 +36,18 @@ _FALLBACK = {
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, max=4),
     retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-    before_sleep=before_sleep_log(logger, logging.WARNING),
+    before_sleep=instrumentation.retry_hook(SERVICE, logger),
     reraise=True,
 )
 async def _call_nlu_with_retry(payload: dict, request_id: str = "") -> dict:
     """Raw HTTP call to NLU with retry logic. Raises on failure."""
     client = get_http_client()
     headers = {"X-Request-ID": request_id} if request_id else {}
-    resp = await client.post(f"{NLU_URL}/api/v1/parse", json=payload, headers=headers)
-    resp.raise_for_status()
+    async with instrumentation.attempt(SERVICE):
+        resp = await client.post(
+            f"{NLU_URL}/api/v1/parse", json=payload, headers=headers
+        )
+        resp.raise_for_status()
     data = resp.json()
     data["is_fallback"] = False
     return data
@@ -54,16 +60,31 @@ async def call_nlu(text: str, session_id: str, request_id: str = "") -> dict:
     - Retry with exponential backoff (3 attempts)
     - Circuit breaker (stops calling after 5 consecutive failures)
     - Safe fallback on any failure
+
+    Trivial messages (bare prices, greetings, farewells, deal words) are
+    answered locally by the fast-path tier (lib/nlu_fast_path.py) first.
     """
+    if nlu_fast_path.NLU_FAST_PATH:
+        local = nlu_fast_path.classify(text)
+        metrics.NLU_FAST_PATH.labels(result=local["intent"] if local else "miss").inc()
+        if local is not None:
+            logger.info("[rid=%s] NLU fast path: %s", request_id, local["intent"])
+            return local
+
     payload = {"text": text, "session_id": session_id}
+    started = time.perf_counter()
 
     try:
-        return await _breaker.call(_call_nlu_with_retry, payload, request_id)
+        data = await _breaker.call(_call_nlu_with_retry, payload, request_id)
+        instrumentation.record_call(SERVICE, data.get("intent"), "ok", started)
+        return data
 
     except CircuitOpenError:
         logger.warning("[rid=%s] NLU circuit OPEN — using fallback", request_id)
+        instrumentation.record_call(SERVICE, None, "circuit_open", started)
         return _FALLBACK
 
     except Exception as e:
         logger.exception("[rid=%s] NLU failed after retries: %s", request_id, e)
+        instrumentation.record_call(SERVICE, None, "fallback", started)
         return _FALLBACK
@@ -0,0 +1,440 @@
+"""
+Durable outbox for negotiation outcome sync (Redis Stream).
+
+Problem (before):
+    Every closed deal spawned a BackgroundTask that built a brand-new
+    httpx.AsyncClient (new TLS handshake, 60 s timeout) inside the request
+    worker. Any failure was logged and the outcome was lost.
+
+Solution:
+    - At turn commit the outcome is XADDed to OUTBOX_STREAM (durable in
+      Redis, survives worker restarts).
+    - A flusher task per worker reads the stream through a consumer group
+      (OUTBOX_GROUP) in batches and POSTs each outcome to
+      NEGOTIATION_SYNC_URL over one pooled keep-alive client, at most
+      OUTBOX_CONCURRENCY at a time. Delivered entries are XACKed + XDELed.
+    - Failed deliveries stay in the group's pending list and get a retry
+      record (<stream>:retry hash, entry id → "<retry at ms>:<attempts>")
+      with exponential backoff from the failure time
+      (OUTBOX_BACKOFF_BASE * 2^(attempt-1), capped at OUTBOX_BACKOFF_MAX).
+      A flusher re-claims a due entry by deleting its record in the same
+      Lua script, so only one flusher retries it. After
+      OUTBOX_MAX_ATTEMPTS — or immediately on a non-retryable 4xx — they
+      are moved to OUTBOX_DEAD_LETTER_STREAM.
+    - Entries without a retry record are still being delivered, or their
+      flusher died. Those are only re-claimed once idle for longer than a
+      POST can take (OUTBOX_HTTP_TIMEOUT + _CLAIM_MARGIN). While a flusher
+      still holds entries of a batch it keeps restarting their idle time,
+      so a delivery still queued or in flight on another worker is never
+      sent twice. Every POST also carries the
+      stream entry id as an Idempotency-Key header for the backend to
+      deduplicate on.
+
+Config (env):
+    NEGOTIATION_SYNC_URL        remote endpoint (point at a local stub in tests)
+    OUTBOX_FLUSHER_ENABLED      "false" to not run the flusher in this process
+    OUTBOX_STREAM               default "negotiation-outbox"
+    OUTBOX_DEAD_LETTER_STREAM   default "negotiation-outbox:dead"
+    OUTBOX_GROUP                default "outcome-sync"
+    OUTBOX_BATCH_SIZE           entries per read (default 50)
+    OUTBOX_CONCURRENCY          parallel POSTs (default 4)
+    OUTBOX_MAX_ATTEMPTS         deliveries before dead-lettering (default 5)
+    OUTBOX_BACKOFF_BASE / OUTBOX_BACKOFF_MAX   retry delay after a failure,
+                                seconds (default 2 / 300)
+    OUTBOX_HTTP_TIMEOUT         per POST (whole request), seconds (default 60);
+                                +10 s is when an orphaned entry is re-claimed
+
+Metrics: ina_outbox_events_total{event}, ina_outbox_lag_seconds (age of
+the oldest undelivered outcome), ina_outbox_backlog (see lib/metrics.py).
+
+Usage:
+    from orchestrator.lib import outcome_outbox
+
+    await outcome_outbox.enqueue(payload)           # at turn commit
+    asyncio.create_task(outcome_outbox.run_flusher())  # app startup
+"""
+
+import os
+import json
+import time
+import socket
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+import httpx
+
+from orchestrator.lib import metrics, state_manager
+
+logger = logging.getLogger("outcome_outbox")
+
+NEGOTIATION_SYNC_URL = os.getenv(
+    "NEGOTIATION_SYNC_URL", "https://ina-backend-fyp.onrender.com/api/negotiations/"
+)
+OUTBOX_FLUSHER_ENABLED = os.getenv("OUTBOX_FLUSHER_ENABLED", "true").lower() == "true"
+OUTBOX_STREAM = os.getenv("OUTBOX_STREAM", "negotiation-outbox")
+OUTBOX_DEAD_LETTER_STREAM = os.getenv(
+    "OUTBOX_DEAD_LETTER_STREAM", "negotiation-outbox:dead"
+)
+OUTBOX_GROUP = os.getenv("OUTBOX_GROUP", "outcome-sync")
+OUTBOX_MAX_LEN = int(os.getenv("OUTBOX_MAX_LEN", 100000))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", 4))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", 2.0))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", 300.0))
+OUTBOX_HTTP_TIMEOUT = float(os.getenv("OUTBOX_HTTP_TIMEOUT", 60.0))
+
+# How long a flusher blocks on XREADGROUP waiting for new outcomes
+_BLOCK_MS = 2000
+
+# Idle time past OUTBOX_HTTP_TIMEOUT before another flusher may re-claim
+# an entry (its POST has then certainly finished or timed out)
+_CLAIM_MARGIN = 10.0
+
+# Retry records of failed deliveries: entry id → "<retry at ms>:<attempts>"
+_RETRY_KEY = f"{OUTBOX_STREAM}:retry"
+
+# KEYS[1] = stream, KEYS[2] = retry hash; ARGV[1] = group, ARGV[2] = consumer,
+# ARGV[3..] = due entry ids. Only the flusher whose HDEL removes the record
+# claims the entry. Returns the claimed entries.
+_CLAIM_DUE_LUA = """
+local claimed = {}
+for i = 3, #ARGV do
+    if redis.call("HDEL", KEYS[2], ARGV[i]) == 1 then
+        for _, entry in ipairs(redis.call("XCLAIM", KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i])) do
+            table.insert(claimed, entry)
+        end
+    end
+end
+return claimed
+"""
+
+# KEYS/ARGV[1..2] as above, ARGV[3] = min idle ms, ARGV[4..] = entry ids.
+# Claims entries that have no retry record (their flusher died mid-delivery).
+_CLAIM_ORPHANS_LUA = """
+local claimed = {}
+for i = 4, #ARGV do
+    if redis.call("HEXISTS", KEYS[2], ARGV[i]) == 0 then
+        for _, entry in ipairs(redis.call("XCLAIM", KEYS[1], ARGV[1], ARGV[2], ARGV[3], ARGV[i])) do
+            table.insert(claimed, entry)
+        end
+    end
+end
+return claimed
+"""
+
+# Unique per worker process — pending entries are tracked per consumer
+_CONSUMER = f"{socket.gethostname()}-{os.getpid()}"
+
+_client: httpx.AsyncClient | None = None
+
+
+class _PermanentFailure(Exception):
+    """Remote rejected the outcome (4xx) — retrying will not help."""
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Pooled keep-alive client for the remote DB backend.
+
+    Separate from http_pool: the backend is an external service (no
+    X-Internal-Key header) and can take far longer than internal calls.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OUTBOX_HTTP_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=OUTBOX_CONCURRENCY,
+                max_keepalive_connections=OUTBOX_CONCURRENCY,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    """Close the outbox HTTP client. Call on app shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# ---------------------- Producer ----------------------
+async def enqueue(payload: dict) -> bool:
+    """
+    Append an outcome to the outbox. Returns False if Redis is unavailable
+    (the caller can fall back to send_outcome()).
+    """
+    try:
+        await state_manager.get_redis_client().xadd(
+            OUTBOX_STREAM,
+            {"payload": json.dumps(payload)},
+            maxlen=OUTBOX_MAX_LEN,
+            approximate=True,
+        )
+        metrics.OUTBOX_EVENTS.labels(event="enqueued").inc()
+        return True
+    except Exception as exc:
+        logger.error(
+            "Failed to enqueue outcome for session %s: %s",
+            payload.get("session_id"),
+            exc,
+        )
+        metrics.OUTBOX_EVENTS.labels(event="enqueue_error").inc()
+        return False
+
+
+async def send_outcome(payload: dict, idempotency_key: Optional[str] = None):
+    """
+    POST one outcome to NEGOTIATION_SYNC_URL. Raises on failure, including
+    when the whole request takes longer than OUTBOX_HTTP_TIMEOUT.
+    """
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+    resp = await asyncio.wait_for(
+        _get_client().post(NEGOTIATION_SYNC_URL, json=payload, headers=headers),
+        OUTBOX_HTTP_TIMEOUT,
+    )
+    if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+        raise _PermanentFailure(f"HTTP {resp.status_code}: {resp.text[:500]}")
+    resp.raise_for_status()
+
+
+# ---------------------- Flusher ----------------------
+def _backoff_seconds(attempts: int) -> float:
+    return min(OUTBOX_BACKOFF_BASE * 2 ** max(attempts - 1, 0), OUTBOX_BACKOFF_MAX)
+
+
+def _claim_idle_ms() -> int:
+    """Idle time after which an entry without a retry record is orphaned."""
+    return int((OUTBOX_HTTP_TIMEOUT + _CLAIM_MARGIN) * 1000)
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+async def _ensure_group():
+    try:
+        await state_manager.get_redis_client().xgroup_create(
+            OUTBOX_STREAM, OUTBOX_GROUP, id="0", mkstream=True
+        )
+        logger.info("Created outbox consumer group %s", OUTBOX_GROUP)
+    except Exception as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def _dead_letter(entry_id, fields: dict, attempts: int, error: str):
+    client = state_manager.get_redis_client()
+    payload = fields.get(b"payload") or fields.get("payload") or b"{}"
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.xadd(
+            OUTBOX_DEAD_LETTER_STREAM,
+            {
+                "payload": payload,
+                "attempts": attempts,
+                "error": error[:1000],
+                "source_id": _decode(entry_id),
+            },
+        )
+        pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, entry_id)
+        pipe.xdel(OUTBOX_STREAM, entry_id)
+        pipe.hdel(_RETRY_KEY, entry_id)
+        await pipe.execute()
+    metrics.OUTBOX_EVENTS.labels(event="dead_lettered").inc()
+    logger.error(
+        "Outcome %s dead-lettered after %s attempt(s): %s",
+        _decode(entry_id),
+        attempts,
+        error,
+    )
+
+
+async def _deliver(entries: List[Tuple], attempts: dict):
+    """POST a batch with bounded concurrency; ack successes, dead-letter permanent failures."""
+    semaphore = asyncio.Semaphore(OUTBOX_CONCURRENCY)
+    held = {entry_id for entry_id, _ in entries}  # not yet failed or dead-lettered
+
+    async def keep_claimed():
+        # Restart the idle time of held entries well before _claim_idle_ms()
+        # so no other flusher re-claims them while they queue or POST here
+        client = state_manager.get_redis_client()
+        while True:
+            await asyncio.sleep(OUTBOX_HTTP_TIMEOUT / 2)
+            if not held:
+                continue
+            try:
+                await client.xclaim(
+                    OUTBOX_STREAM,
+                    OUTBOX_GROUP,
+                    _CONSUMER,
+                    min_idle_time=0,
+                    message_ids=list(held),
+                    justid=True,  # not counted as a delivery attempt
+                )
+            except Exception as exc:
+                logger.warning("Outbox claim refresh failed: %s", exc)
+
+    async def deliver_one(entry_id, fields) -> Optional[str]:
+        async with semaphore:
+            raw = fields.get(b"payload") or fields.get("payload")
+            try:
+                await send_outcome(json.loads(raw), idempotency_key=_decode(entry_id))
+                return None
+            except _PermanentFailure as exc:
+                held.discard(entry_id)
+                await _dead_letter(
+                    entry_id, fields, attempts.get(_decode(entry_id), 1), str(exc)
+                )
+                return "dead"
+            except Exception as exc:
+                held.discard(entry_id)
+                n = attempts.get(_decode(entry_id), 1)
+                if n >= OUTBOX_MAX_ATTEMPTS:
+                    await _dead_letter(entry_id, fields, n, f"{type(exc).__name__}: {exc}")
+                    return "dead"
+                # Backoff runs from now; without the record (Redis error) the
+                # entry is re-claimed as an orphan after _claim_idle_ms()
+                retry_at = int((time.time() + _backoff_seconds(n)) * 1000)
+                try:
+                    await state_manager.get_redis_client().hset(
+                        _RETRY_KEY, _decode(entry_id), f"{retry_at}:{n}"
+                    )
+                except Exception as redis_exc:
+                    logger.warning("Outbox retry record failed: %s", redis_exc)
+                metrics.OUTBOX_EVENTS.labels(event="failed").inc()
+                logger.warning(
+                    "Outcome %s delivery attempt %s failed (%s: %s) — retry in %.0fs",
+                    _decode(entry_id),
+                    n,
+                    type(exc).__name__,
+                    exc,
+                    _backoff_seconds(n),
+                )
+                return "failed"
+
+    refresher = asyncio.create_task(keep_claimed())
+    try:
+        results = await asyncio.gather(*(deliver_one(eid, f) for eid, f in entries))
+        delivered = [eid for (eid, _), res in zip(entries, results) if res is None]
+        if delivered:
+            client = state_manager.get_redis_client()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, *delivered)
+                pipe.xdel(OUTBOX_STREAM, *delivered)
+                pipe.hdel(_RETRY_KEY, *delivered)
+                await pipe.execute()
+            metrics.OUTBOX_EVENTS.labels(event="delivered").inc(len(delivered))
+    finally:
+        refresher.cancel()
+
+
+def _entries(claimed: list) -> List[Tuple]:
+    """XCLAIM replies from Lua ([id, [field, value, ...]]) → (id, fields dict)."""
+    return [
+        (entry_id, dict(zip(flat[::2], flat[1::2])))
+        for entry_id, flat in claimed
+        if flat
+    ]
+
+
+async def _retry_pending():
+    """
+    Re-claim failed deliveries whose backoff has elapsed, and entries
+    orphaned by a flusher that stopped mid-delivery.
+    """
+    client = state_manager.get_redis_client()
+    keys = [OUTBOX_STREAM, _RETRY_KEY]
+    now_ms = time.time() * 1000
+    attempts, due = {}, []
+    scheduled = {_decode(k): _decode(v) for k, v in (await client.hgetall(_RETRY_KEY)).items()}
+    for entry_id, record in scheduled.items():
+        retry_at, _, n = record.partition(":")
+        if int(retry_at) <= now_ms and len(due) < OUTBOX_BATCH_SIZE:
+            due.append(entry_id)
+            attempts[entry_id] = int(n) + 1
+
+    entries = []
+    if due:
+        claim_due = client.register_script(_CLAIM_DUE_LUA)
+        entries += _entries(await claim_due(keys=keys, args=[OUTBOX_GROUP, _CONSUMER, *due]))
+
+    pending = await client.xpending_range(
+        OUTBOX_STREAM,
+        OUTBOX_GROUP,
+        min="-",
+        max="+",
+        count=OUTBOX_BATCH_SIZE,
+        idle=_claim_idle_ms(),
+    )
+    orphans = [p for p in pending if _decode(p["message_id"]) not in scheduled]
+    if orphans:
+        for p in orphans:
+            # XCLAIM counts as a new delivery attempt
+            attempts[_decode(p["message_id"])] = p["times_delivered"] + 1
+        claim_orphans = client.register_script(_CLAIM_ORPHANS_LUA)
+        entries += _entries(
+            await claim_orphans(
+                keys=keys,
+                args=[
+                    OUTBOX_GROUP,
+                    _CONSUMER,
+                    _claim_idle_ms(),
+                    *(p["message_id"] for p in orphans),
+                ],
+            )
+        )
+
+    if entries:
+        metrics.OUTBOX_EVENTS.labels(event="retried").inc(len(entries))
+        await _deliver(entries, attempts)
+
+
+async def _update_lag():
+    """Outbox lag = age of the oldest outcome not yet delivered."""
+    client = state_manager.get_redis_client()
+    metrics.OUTBOX_BACKLOG.set(await client.xlen(OUTBOX_STREAM))
+    oldest = await client.xrange(OUTBOX_STREAM, count=1)
+    if not oldest:
+        metrics.OUTBOX_LAG_SECONDS.set(0)
+        return
+    entry_ms = int(_decode(oldest[0][0]).split("-")[0])
+    metrics.OUTBOX_LAG_SECONDS.set(max(time.time() - entry_ms / 1000, 0.0))
+
+
+async def run_flusher():
+    """
+    Drain the outbox for the lifetime of the worker. Every worker runs one
+    consumer in the same group, so entries are spread across workers and a
+    crashed worker's pending entries are re-claimed by the others.
+    """
+    logger.info(
+        "Outbox flusher %s draining %s → %s", _CONSUMER, OUTBOX_STREAM, NEGOTIATION_SYNC_URL
+    )
+    group_ready = False
+    while True:
+        try:
+            if not group_ready:
+                await _ensure_group()
+                group_ready = True
+            await _retry_pending()
+            resp = await state_manager.get_redis_client().xreadgroup(
+                OUTBOX_GROUP,
+                _CONSUMER,
+                {OUTBOX_STREAM: ">"},
+                count=OUTBOX_BATCH_SIZE,
+                block=_BLOCK_MS,
+            )
+            for _stream, entries in resp or []:
+                if entries:
+                    await _deliver(entries, {})
+            await _update_lag()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Outbox flusher error: %s — retrying", exc)
+            group_ready = False  # e.g. NOGROUP after the stream was deleted
+            await asyncio.sleep(1.0)
@@ -1,15 +1,18 @@
 import os
+import json
+import time
 import httpx
 import logging
+from typing import AsyncIterator, Awaitable, Callable, Tuple
 
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
     retry_if_exception_type,
-    before_sleep_log,
 )
 
+from orchestrator.lib import instrumentation
 from orchestrator.lib.http_pool import get_http_client
 from orchestrator.lib.circuit_breaker import CircuitBreaker, CircuitOpenError
 
@@ -17,8 +20,10 @@ logger = logging.getLogger("phraser_client")
 
 LLM_PHRASER_URL = os.getenv("LLM_PHRASER_URL", "http://llm-phraser:8000")
 
+SERVICE = "llm-phraser"
+
 # Circuit breaker: opens after 5 failures, recovers after 30s
-_breaker = CircuitBreaker("llm-phraser", failure_threshold=5, recovery_timeout=30)
+_breaker = CircuitBreaker(SERVICE, failure_threshold=5, recovery_timeout=30)
 
 # Fallback when LLM Phraser is down
 _FALLBACK = {
@@ -31,24 +36,40 @@ _FALLBACK = {
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, max=4),
     retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-    before_sleep=before_sleep_log(logger, logging.WARNING),
+    before_sleep=instrumentation.retry_hook(SERVICE, logger),
     reraise=True,
 )
 async def _call_phraser_with_retry(payload: dict, request_id: str = "") -> dict:
     """Raw HTTP call to LLM Phraser with retry logic."""
     client = get_http_client()
     headers = {"X-Request-ID": request_id} if request_id else {}
-    resp = await client.post(
-        f"{LLM_PHRASER_URL}/api/v1/phrase", json=payload, headers=headers
-    )
-    resp.raise_for_status()
+    async with instrumentation.attempt(SERVICE):
+        resp = await client.post(
+            f"{LLM_PHRASER_URL}/api/v1/phrase", json=payload, headers=headers
+        )
+        resp.raise_for_status()
     data = resp.json()
     data["is_fallback"] = False
     return data
 
 
+def _build_payload(brain_output: dict, language: str) -> dict:
+    return {
+        "action": brain_output.get("action"),
+        "response_key": brain_output.get("response_key"),
+        "counter_price": brain_output.get("counter_price") or 0,
+        "policy_type": brain_output.get("policy_type", "rule-based"),
+        "policy_version": brain_output.get("policy_version", "v1"),
+        "decision_metadata": brain_output.get("decision_metadata", {}),
+        "language": language,
+    }
+
+
 async def call_phraser(
-    brain_output: dict, language: str = "english", request_id: str = ""
+    brain_output: dict,
+    language: str = "english",
+    request_id: str = "",
+    intent: str = "",
 ) -> dict:
     """
     Call the LLM Phraser with:
@@ -56,16 +77,10 @@ async def call_phraser(
     - Retry with exponential backoff (3 attempts)
     - Circuit breaker (stops calling after 5 consecutive failures)
     - Safe fallback on any failure
+
+    intent: the user's NLU intent, used only as a metrics label.
     """
-    phraser_payload = {
-        "action": brain_output.get("action"),
-        "response_key": brain_output.get("response_key"),
-        "counter_price": brain_output.get("counter_price") or 0,
-        "policy_type": brain_output.get("policy_type", "rule-based"),
-        "policy_version": brain_output.get("policy_version", "v1"),
-        "decision_metadata": brain_output.get("decision_metadata", {}),
-        "language": language,
-    }
+    phraser_payload = _build_payload(brain_output, language)
 
     logger.info(
         "[rid=%s][Phraser] Sending: action=%s key=%s",
@@ -74,17 +89,101 @@ async def call_phraser(
         phraser_payload.get("response_key"),
     )
 
+    started = time.perf_counter()
     try:
         data = await _breaker.call(
             _call_phraser_with_retry, phraser_payload, request_id
         )
         logger.info(f"[Phraser] RAW RESPONSE ← {data}")
+        instrumentation.record_call(SERVICE, intent, "ok", started)
         return data
 
     except CircuitOpenError:
         logger.warning("Mouth circuit OPEN — using fallback")
+        instrumentation.record_call(SERVICE, intent, "circuit_open", started)
         return _FALLBACK
 
     except Exception as e:
         logger.exception(f"Phraser failed after retries: {e}")
+        instrumentation.record_call(SERVICE, intent, "fallback", started)
         return _FALLBACK
+
+
+# ---------------------- Streaming ----------------------
+async def _iter_sse(resp: httpx.Response) -> AsyncIterator[Tuple[str, dict]]:
+    """Parse a Server-Sent Events body into (event, data) pairs."""
+    event, data_lines = "message", []
+    async for line in resp.aiter_lines():
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:") :].strip())
+
+
+async def stream_phraser(
+    brain_output: dict,
+    on_token: Callable[[str], Awaitable[None]],
+    language: str = "english",
+    request_id: str = "",
+    intent: str = "",
+) -> dict:
+    """
+    Streaming variant of call_phraser(): calls /api/v1/phrase/stream and
+    awaits on_token(text) for every chunk as it arrives.
+
+    Returns the same shape as call_phraser() once the stream completes.
+    - Circuit open, or failure before the first chunk → falls back to
+      call_phraser() (retries + fallback) and emits its text as one chunk.
+    - Failure mid-stream → returns what was already streamed, flagged as
+      fallback (the user has seen those words; no retry).
+    """
+    payload = _build_payload(brain_output, language)
+    parts = []
+    started = time.perf_counter()
+    try:
+        _breaker.check()
+        client = get_http_client()
+        headers = {"X-Request-ID": request_id} if request_id else {}
+        response_text = None
+        async with instrumentation.attempt(SERVICE):
+            async with client.stream(
+                "POST",
+                f"{LLM_PHRASER_URL}/api/v1/phrase/stream",
+                json=payload,
+                headers=headers,
+            ) as resp:
+                resp.raise_for_status()
+                async for event, data in _iter_sse(resp):
+                    if event == "token" and data.get("text"):
+                        parts.append(data["text"])
+                        await on_token(data["text"])
+                    elif event == "done":
+                        response_text = data.get("response_text")
+        _breaker.record_success()
+        instrumentation.record_call(SERVICE, intent, "ok", started)
+        return {
+            "response_text": response_text or "".join(parts),
+            "is_fallback": False,
+        }
+
+    except CircuitOpenError:
+        logger.warning("Mouth circuit OPEN — using fallback")
+        instrumentation.record_call(SERVICE, intent, "circuit_open", started)
+        await on_token(_FALLBACK["response_text"])
+        return _FALLBACK
+
+    except Exception as e:
+        _breaker.record_failure()
+        if parts:
+            logger.warning(f"Phraser stream broke after {len(parts)} chunks: {e}")
+            instrumentation.record_call(SERVICE, intent, "fallback", started)
+            return {"response_text": "".join(parts), "is_fallback": True}
+
+        logger.warning(f"Phraser stream failed ({e}) — falling back to /phrase")
+        data = await call_phraser(brain_output, language, request_id, intent)
+        await on_token(data.get("response_text") or "")
+        return data
@@ -0,0 +1,170 @@
+"""
+Distributed per-session rate limiter (Redis sliding window).
+
+Problem (before):
+    slowapi keyed on request.client.host — behind nginx that is always the
+    nginx container — and kept its counters in memory per gunicorn worker.
+    Every user shared one "10/minute" bucket per worker.
+
+Solution:
+    A sliding-window log per key in a Redis sorted set, checked and updated
+    by one atomic Lua script (shared by every worker):
+
+        ratelimit:{key}   ZSET  one member per accepted request, scored by
+                                Redis TIME in microseconds
+
+    The key is the session (user_id from the parsed body), or the real
+    client IP (X-Real-IP set by nginx) when there is no session.
+
+    Per-tenant limits: the script reads `tenant_id` from the session's meta
+    hash and applies the tenant's override if one is configured, so the
+    tenant lookup costs no extra round trip. (A session still in the legacy
+    single-key layout uses the default limit until its first read migrates it.)
+
+    A rejected request gets the exact wait until the oldest counted request
+    leaves the window (Retry-After).
+
+Config (env):
+    RATE_LIMIT_ENABLED   "false" to disable (default: true)
+    RATE_LIMIT_DEFAULT   e.g. "10/minute" (default)
+    RATE_LIMIT_TENANTS   per-tenant overrides, e.g. "acme=60/minute,demo=5/minute"
+
+Limits are "<count>/<second|minute|hour|day>". If Redis is unreachable the
+limiter fails open (request allowed, logged, counted as decision="error").
+
+Usage:
+    from orchestrator.lib import rate_limiter
+
+    decision = await rate_limiter.hit("session:abc", session_id="abc")
+    if not decision.allowed:
+        ...  # 429 with Retry-After: decision.retry_after
+"""
+
+import os
+import math
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from orchestrator.lib import metrics, state_manager
+
+logger = logging.getLogger("rate_limiter")
+
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(spec: str) -> Tuple[int, int]:
+    """'10/minute' → (10, 60000): request count and window in milliseconds."""
+    count, _, unit = spec.strip().partition("/")
+    unit = unit.strip().lower().rstrip("s")
+    if unit not in _UNITS:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    return int(count), _UNITS[unit] * 1000
+
+
+def parse_tenant_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """'acme=60/minute,demo=5/minute' → {"acme": (60, 60000), ...}."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        tenant, _, limit = item.partition("=")
+        limits[tenant.strip()] = parse_limit(limit)
+    return limits
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_DEFAULT = parse_limit(os.getenv("RATE_LIMIT_DEFAULT", "10/minute"))
+RATE_LIMIT_TENANTS = parse_tenant_limits(os.getenv("RATE_LIMIT_TENANTS", ""))
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds; 0 when allowed
+
+
+# KEYS[1] = ratelimit key, KEYS[2] = session meta hash (tenant lookup)
+# ARGV[1] = default limit, ARGV[2] = default window ms,
+# ARGV[3..] = tenant, limit, window ms triples
+# Returns {allowed 1|0, limit, remaining, retry after ms}
+_RATE_LIMIT_LUA = """
+local limit, window = tonumber(ARGV[1]), tonumber(ARGV[2])
+if #ARGV > 2 then
+    local raw = redis.call("HGET", KEYS[2], "tenant_id")
+    if raw then
+        local ok, tenant = pcall(cjson.decode, raw)
+        if ok and type(tenant) == "string" then
+            for i = 3, #ARGV, 3 do
+                if ARGV[i] == tenant then
+                    limit, window = tonumber(ARGV[i + 1]), tonumber(ARGV[i + 2])
+                    break
+                end
+            end
+        end
+    end
+end
+
+-- Microsecond timestamps exceed Lua's default %.14g number formatting,
+-- so scores are always passed to Redis as explicit integer strings.
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local window_us = window * 1000
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", string.format("%.0f", now - window_us))
+local count = redis.call("ZCARD", KEYS[1])
+if count < limit then
+    local score = string.format("%.0f", now)
+    redis.call("ZADD", KEYS[1], score, score .. ":" .. count)
+    redis.call("PEXPIRE", KEYS[1], window)
+    return {1, limit, limit - count - 1, 0}
+end
+-- Allowed again once enough of the oldest requests have left the window
+local oldest = redis.call("ZRANGE", KEYS[1], count - limit, count - limit, "WITHSCORES")
+local retry_us = tonumber(oldest[2]) + window_us - now
+return {0, limit, 0, math.max(1, math.ceil(retry_us / 1000))}
+"""
+
+
+def _tenant_args() -> list:
+    return [
+        item
+        for tenant, (count, window_ms) in RATE_LIMIT_TENANTS.items()
+        for item in (tenant, count, window_ms)
+    ]
+
+
+async def hit(key: str, session_id: Optional[str] = None) -> Decision:
+    """
+    Count one request against `key` and decide whether it is allowed.
+
+    session_id: if given, the session's tenant_id selects a per-tenant limit.
+    """
+    default_count, default_window_ms = RATE_LIMIT_DEFAULT
+    if not RATE_LIMIT_ENABLED:
+        return Decision(True, default_count, default_count, 0.0)
+
+    script = state_manager._script("rate_limit", _RATE_LIMIT_LUA)
+    limit_key = f"ratelimit:{key}"
+    if session_id:
+        keys = [limit_key, state_manager._meta_key(session_id)]
+        args = [default_count, default_window_ms, *_tenant_args()]
+    else:
+        keys = [limit_key, limit_key]  # no session → no tenant lookup
+        args = [default_count, default_window_ms]
+    try:
+        res = await script(keys=keys, args=args)
+    except Exception as exc:
+        logger.warning("Rate limiter unavailable, allowing request: %s", exc)
+        metrics.RATE_LIMIT_DECISIONS.labels(decision="error").inc()
+        return Decision(True, default_count, default_count, 0.0)
+
+    allowed, limit, remaining, retry_ms = (int(v) for v in res)
+    metrics.RATE_LIMIT_DECISIONS.labels(
+        decision="allowed" if allowed else "limited"
+    ).inc()
+    return Decision(bool(allowed), limit, remaining, retry_ms / 1000)
+
+
+def retry_after_header(decision: Decision) -> str:
+    """Retry-After is whole seconds — round up so clients never retry early."""
+    return str(max(1, math.ceil(decision.retry_after)))
@@ -0,0 +1,205 @@
+"""
+Per-worker L1 cache of validated SessionData objects.
+
+Problem (before):
+    Every request re-fetched the session from Redis and re-ran Pydantic
+    validation, even when the same gunicorn worker handled that session's
+    previous turn milliseconds earlier.
+
+Solution:
+    A small in-process LRU + TTL cache keyed by session_id. Every entry is
+    tagged with the session's `version` (incremented by Redis on every write).
+
+    - Chat turns (lock path): the cached version is sent to lock_and_load().
+      If Redis still has the same version it skips the payload entirely and
+      the cached object is reused — strongly consistent, since the version
+      check happens under the lock.
+    - Read-only lookups (get_session below, e.g. WebSocket auth): served
+      straight from the cache.
+      Freshness relies on invalidations: every write publishes
+      "<version>:<session_id>" on SESSION_INVALIDATION_CHANNEL and each
+      worker's listener drops older entries. The TTL bounds staleness if a
+      message is ever missed.
+
+Config (env):
+    SESSION_CACHE_ENABLED      "true" to enable (default: false)
+    SESSION_CACHE_MAX_ENTRIES  memory bound, LRU eviction (default: 10000)
+    SESSION_CACHE_TTL_SECONDS  max age of an entry (default: 30)
+
+Metrics: ina_session_cache_events_total{event=hit|miss|put|invalidation|
+eviction|expired} and ina_session_cache_entries (see lib/metrics.py).
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from pydantic import ValidationError
+
+from orchestrator.lib import metrics, state_manager
+from orchestrator.session_schemas import SessionData
+
+logger = logging.getLogger("session_cache")
+
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "false").lower() == "true"
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", 10000))
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", 30))
+
+
+class SessionCache:
+    """
+    LRU + TTL cache of SessionData, bounded by entry count.
+
+    Args:
+        max_entries: Entries beyond this evict the least recently used.
+        ttl_seconds: Entries older than this are treated as misses.
+        enabled: When False every get() misses and put() is a no-op.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 30.0,
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        # session_id → (stored_at, SessionData)
+        self._entries: "OrderedDict[str, tuple[float, SessionData]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, session_id: str, event: str):
+        self._entries.pop(session_id, None)
+        metrics.SESSION_CACHE_EVENTS.labels(event=event).inc()
+        metrics.SESSION_CACHE_ENTRIES.set(len(self._entries))
+
+    def get(self, session_id: str) -> Optional[SessionData]:
+        """Return the cached session, or None on miss/expiry."""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(session_id)
+        if entry is None:
+            metrics.SESSION_CACHE_EVENTS.labels(event="miss").inc()
+            return None
+
+        stored_at, session = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._drop(session_id, "expired")
+            metrics.SESSION_CACHE_EVENTS.labels(event="miss").inc()
+            return None
+
+        self._entries.move_to_end(session_id)
+        metrics.SESSION_CACHE_EVENTS.labels(event="hit").inc()
+        return session
+
+    def put(self, session_id: str, session: SessionData):
+        """Cache a validated session unless a newer version is already cached."""
+        if not self.enabled:
+            return
+
+        current = self._entries.get(session_id)
+        if current is not None and current[1].version > session.version:
+            return
+
+        self._entries[session_id] = (time.monotonic(), session)
+        self._entries.move_to_end(session_id)
+        metrics.SESSION_CACHE_EVENTS.labels(event="put").inc()
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.SESSION_CACHE_EVENTS.labels(event="eviction").inc()
+        metrics.SESSION_CACHE_ENTRIES.set(len(self._entries))
+
+    def invalidate(self, session_id: str, version: Optional[int] = None):
+        """
+        Drop a cached session. With `version`, only drop it if the cached
+        copy is older (a worker ignores the echo of its own write).
+        """
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        if version is not None and entry[1].version >= version:
+            return
+        self._drop(session_id, "invalidation")
+
+    def clear(self):
+        self._entries.clear()
+        metrics.SESSION_CACHE_ENTRIES.set(0)
+
+
+# Process-wide cache (one per gunicorn worker)
+cache = SessionCache(
+    max_entries=SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=SESSION_CACHE_TTL_SECONDS,
+    enabled=SESSION_CACHE_ENABLED,
+)
+
+
+async def get_session(session_id: str, fresh: bool = False) -> Optional[SessionData]:
+    """
+    Cached, validated equivalent of state_manager.get_session().
+
+    fresh=True skips the cache lookup (e.g. after a version conflict) but
+    still caches what Redis returned. Returns None if the session is
+    missing or fails validation.
+    """
+    if not fresh:
+        session = cache.get(session_id)
+        if session is not None:
+            return session
+
+    raw = await state_manager.get_session(
+        session_id, history_limit=state_manager.SESSION_HISTORY_WINDOW
+    )
+    if raw is None:
+        return None
+    try:
+        session = SessionData(**raw)
+    except ValidationError:
+        return None
+
+    cache.put(session_id, session)
+    return session
+
+
+async def run_invalidation_listener():
+    """
+    Subscribe to session invalidations published by every write and drop
+    stale entries. Runs for the lifetime of the worker; reconnects on error.
+    """
+    channel = state_manager.SESSION_INVALIDATION_CHANNEL
+    while True:
+        pubsub = state_manager.get_redis_client().pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            # Anything cached before (re)subscribing may have missed messages
+            cache.clear()
+            logger.info("Session cache listening for invalidations on %s", channel)
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                version, _, session_id = data.partition(":")
+                cache.invalidate(session_id, int(version))
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Session cache listener error: %s — reconnecting", exc)
+            cache.clear()
+            await asyncio.sleep(1.0)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
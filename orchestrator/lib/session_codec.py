@@ -0,0 +1,202 @@
+"""
+Pluggable codec for stored session history turns.
+
+Problem (before):
+    Every turn was stored as verbose JSON text via stdlib `json` on a
+    decode_responses=True client — long histories cost Redis memory and
+    parse time on every load.
+
+Solution:
+    Each stored value starts with one version byte describing how the rest
+    of the value was written:
+
+        version byte = (serializer_id << 4) | compression_id
+
+        serializer_id : 1 = json (stdlib), 2 = orjson, 3 = msgpack
+        compression_id: 0 = none, 1 = zstd, 2 = lz4
+
+    Values written before this codec existed (plain JSON text, and turns
+    migrated from the legacy blob by Lua) start with "{" and carry no
+    version byte — they are still decoded as JSON, so old and new formats
+    live side by side in the same history list.
+
+    Compression only kicks in for payloads of at least
+    SESSION_COMPRESS_MIN_BYTES; small turns stay uncompressed.
+
+Config (env):
+    SESSION_CODEC              json | orjson | msgpack   (default: json)
+    SESSION_COMPRESSION        none | zstd | lz4         (default: none)
+    SESSION_COMPRESS_MIN_BYTES minimum payload size to compress (default: 512)
+
+orjson / msgpack / zstandard / lz4 are optional. If the configured one is
+not installed, the codec logs a warning and falls back to stdlib json /
+no compression. Readers only need the library for the formats actually
+present in Redis (json and orjson output decode with either library).
+
+Usage:
+    from orchestrator.lib.session_codec import codec
+
+    blob = codec.encode({"from": "user", "text": "500"})
+    turn = codec.decode(blob)
+"""
+
+import os
+import json
+import logging
+from typing import Any
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+logger = logging.getLogger("session_codec")
+
+SESSION_CODEC = os.getenv("SESSION_CODEC", "json")
+SESSION_COMPRESSION = os.getenv("SESSION_COMPRESSION", "none")
+SESSION_COMPRESS_MIN_BYTES = int(os.getenv("SESSION_COMPRESS_MIN_BYTES", 512))
+
+SERIALIZERS = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSIONS = {"none": 0, "zstd": 1, "lz4": 2}
+
+_LEGACY_JSON_PREFIX = ord("{")
+
+
+class CodecError(Exception):
+    """Raised when a stored value uses a format this process cannot decode."""
+
+
+def _available_serializer(name: str) -> str:
+    if name not in SERIALIZERS:
+        logger.warning("Unknown session codec %r — using json", name)
+        return "json"
+    if name == "orjson" and not ORJSON_AVAILABLE:
+        logger.warning("orjson not installed — session codec falls back to json")
+        return "json"
+    if name == "msgpack" and not MSGPACK_AVAILABLE:
+        logger.warning("msgpack not installed — session codec falls back to json")
+        return "json"
+    return name
+
+
+def _available_compression(name: str) -> str:
+    if name not in COMPRESSIONS:
+        logger.warning("Unknown session compression %r — disabled", name)
+        return "none"
+    if name == "zstd" and not ZSTD_AVAILABLE:
+        logger.warning("zstandard not installed — session compression disabled")
+        return "none"
+    if name == "lz4" and not LZ4_AVAILABLE:
+        logger.warning("lz4 not installed — session compression disabled")
+        return "none"
+    return name
+
+
+def _json_loads(data: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class SessionCodec:
+    """
+    Encoder/decoder for one stored value (a history turn).
+
+    Args:
+        serializer: "json", "orjson" or "msgpack" — used for writing.
+        compression: "none", "zstd" or "lz4" — used for writing.
+        compress_min_bytes: payloads smaller than this are not compressed.
+
+    decode() accepts every supported format regardless of the writer config.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "none",
+        compress_min_bytes: int = 512,
+    ):
+        self.serializer = _available_serializer(serializer)
+        self.compression = _available_compression(compression)
+        self.compress_min_bytes = compress_min_bytes
+
+        self._zstd_c = zstandard.ZstdCompressor(level=3) if ZSTD_AVAILABLE else None
+        self._zstd_d = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+    # ---------------------- Encode ----------------------
+    def _serialize(self, obj: Any) -> bytes:
+        if self.serializer == "msgpack":
+            return msgpack.packb(obj, use_bin_type=True)
+        if self.serializer == "orjson":
+            return orjson.dumps(obj)
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def _compress(self, payload: bytes) -> tuple[int, bytes]:
+        if self.compression == "none" or len(payload) < self.compress_min_bytes:
+            return COMPRESSIONS["none"], payload
+        if self.compression == "zstd":
+            return COMPRESSIONS["zstd"], self._zstd_c.compress(payload)
+        return COMPRESSIONS["lz4"], lz4.frame.compress(payload)
+
+    def encode(self, obj: Any) -> bytes:
+        compression_id, payload = self._compress(self._serialize(obj))
+        header = (SERIALIZERS[self.serializer] << 4) | compression_id
+        return bytes((header,)) + payload
+
+    # ---------------------- Decode ----------------------
+    def _decompress(self, compression_id: int, payload: bytes) -> bytes:
+        if compression_id == COMPRESSIONS["none"]:
+            return payload
+        if compression_id == COMPRESSIONS["zstd"]:
+            if not ZSTD_AVAILABLE:
+                raise CodecError("zstd-compressed value but zstandard not installed")
+            return self._zstd_d.decompress(payload)
+        if compression_id == COMPRESSIONS["lz4"]:
+            if not LZ4_AVAILABLE:
+                raise CodecError("lz4-compressed value but lz4 not installed")
+            return lz4.frame.decompress(payload)
+        raise CodecError(f"Unknown compression id {compression_id}")
+
+    def decode(self, data: bytes | str) -> Any:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data or data[0] == _LEGACY_JSON_PREFIX:
+            return json.loads(data)  # unversioned legacy JSON
+
+        serializer_id, compression_id = data[0] >> 4, data[0] & 0x0F
+        payload = self._decompress(compression_id, data[1:])
+
+        if serializer_id in (SERIALIZERS["json"], SERIALIZERS["orjson"]):
+            return _json_loads(payload)
+        if serializer_id == SERIALIZERS["msgpack"]:
+            if not MSGPACK_AVAILABLE:
+                raise CodecError("msgpack-encoded value but msgpack not installed")
+            return msgpack.unpackb(payload, raw=False)
+        raise CodecError(f"Unknown serializer id {serializer_id}")
+
+
+# Process-wide codec used by state_manager
+codec = SessionCodec(SESSION_CODEC, SESSION_COMPRESSION, SESSION_COMPRESS_MIN_BYTES)
@@ -0,0 +1,154 @@
+"""
+Speculative Strategy Engine call for plain numeric offers.
+
+Problem (before):
+    For messages like "500", "1500 final" or "Rs 1,200" the price is known
+    locally, yet brain_node only starts once the LLM NLU parse (1–3 s) has
+    returned MAKE_OFFER with that price. Brain latency is added serially.
+
+Solution:
+    nlu_node runs extract_offer() on user_input. When it fires, call_brain
+    is started as a task alongside call_nlu with the inputs the NLU is
+    expected to produce (intent MAKE_OFFER, that price, neutral sentiment).
+    After NLU:
+
+    - NLU agrees (MAKE_OFFER, same price, same sentiment, not a fallback)
+        → brain_node awaits the already running task (hit)
+    - anything else → the task is cancelled and the decision discarded
+        (miss; brain_node / fast_track run as usual)
+
+    The decision is only committed when every Strategy Engine input matches,
+    so speculation never changes an outcome, only its latency.
+    make_decision is stateless, so a discarded call has no side effects.
+    Skipped in embedded Strategy Engine mode and for messages the NLU fast
+    path answers locally (nothing to overlap in either case).
+
+Metrics:
+    ina_brain_speculation_total{outcome}
+        hit | intent_mismatch | price_mismatch | sentiment_mismatch |
+        nlu_fallback
+    ina_brain_speculation_saved_seconds
+        brain latency hidden behind NLU, per hit
+
+Config (env):
+    SPECULATIVE_BRAIN   "true" to enable (default: true)
+
+Usage (see graph/nodes.py):
+    spec = speculation.start(state)              # before call_nlu
+    ... nlu ...
+    state["_speculation"] = speculation.resolve(spec, state)
+    brain = await speculation.take(state["_speculation"])   # brain_node
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Optional
+
+from orchestrator.lib import brain_client, metrics, nlu_fast_path
+from orchestrator.lib.brain_client import call_brain
+from orchestrator.lib.intents import Intent
+
+logger = logging.getLogger("speculation")
+
+SPECULATIVE_BRAIN = os.getenv("SPECULATIVE_BRAIN", "true").lower() == "true"
+
+# Sentiment assumed for a bare number (what the NLU returns for "500")
+ASSUMED_SENTIMENT = "neutral"
+
+# Whole message is one price: optional currency, number (1,200 / 1200.50 / 5k),
+# optional closing word. Anything else waits for the NLU.
+_OFFER_RE = re.compile(
+    r"^\s*(?:rs\.?|pkr|\$)?\s*"
+    r"(?P<number>\d{1,3}(?:,\d{3})+|\d+)(?P<fraction>\.\d+)?\s*(?P<k>k)?"
+    r"\s*(?:rs\.?|pkr|rupees?)?"
+    r"\s*(?:final|last|only|max|bas)?"
+    r"\s*[.!]*\s*$",
+    re.IGNORECASE,
+)
+
+
+def extract_offer(text: str) -> Optional[float]:
+    """Price if `text` is obviously a bare numeric offer, else None."""
+    match = _OFFER_RE.match(text or "")
+    if not match:
+        return None
+    value = float(match.group("number").replace(",", "") + (match.group("fraction") or ""))
+    if match.group("k"):
+        value *= 1000
+    return value if value > 0 else None
+
+
+def start(state) -> Optional[dict]:
+    """Start the speculative call_brain task if the message is a bare offer."""
+    if not SPECULATIVE_BRAIN or brain_client.STRATEGY_ENGINE_MODE == "embedded":
+        return None
+    text = state.get("user_input", "")
+    price = extract_offer(text)
+    if price is None:
+        return None
+    if nlu_fast_path.NLU_FAST_PATH and nlu_fast_path.classify(text) is not None:
+        return None
+
+    spec = {"price": price, "started": time.perf_counter(), "finished": None}
+
+    async def _run():
+        try:
+            return await call_brain(
+                mam=state["mam"],
+                asking_price=state["asking_price"],
+                user_offer=price,
+                user_intent=Intent.MAKE_OFFER,
+                user_sentiment=ASSUMED_SENTIMENT,
+                session_id=state["session_id"],
+                history=state.get("history", []),
+                request_id=state.get("request_id", ""),
+            )
+        finally:
+            spec["finished"] = time.perf_counter()
+
+    spec["task"] = asyncio.create_task(_run())
+    return spec
+
+
+def discard(spec: dict, outcome: str):
+    """Cancel a speculative call whose decision will not be used."""
+    spec["task"].cancel()
+    metrics.BRAIN_SPECULATION.labels(outcome=outcome).inc()
+    logger.info("Brain speculation discarded (%s)", outcome)
+
+
+def resolve(spec: Optional[dict], state) -> Optional[dict]:
+    """
+    Compare the speculation with the NLU result in `state`.
+    Returns the spec to commit in brain_node, or None (spec discarded).
+    """
+    if spec is None:
+        return None
+    offer = state.get("user_offer")
+    if state.get("is_fallback"):
+        outcome = "nlu_fallback"
+    elif state.get("intent") != Intent.MAKE_OFFER:
+        outcome = "intent_mismatch"
+    elif offer is None or float(offer) != spec["price"]:
+        outcome = "price_mismatch"
+    elif state.get("sentiment", "neutral") != ASSUMED_SENTIMENT:
+        outcome = "sentiment_mismatch"
+    else:
+        return spec
+    discard(spec, outcome)
+    return None
+
+
+async def take(spec: dict) -> dict:
+    """Await the confirmed speculative decision and record the latency saved."""
+    awaited_at = time.perf_counter()
+    brain = await spec["task"]
+    overlap_end = min(spec["finished"] or awaited_at, awaited_at)
+    metrics.BRAIN_SPECULATION.labels(outcome="hit").inc()
+    metrics.BRAIN_SPECULATION_SAVED_SECONDS.observe(
+        max(0.0, overlap_end - spec["started"])
+    )
+    return brain
@@ -1,11 +1,45 @@
 # src/orchestrator/lib/state_manager.py
+"""
+Redis session storage.
+
+Session layout (per session_id):
+    {session_id}:meta     HASH  scalar fields (mam, asking_price, offer_count,
+                                status, last_bot_offer, tenant_id, ...),
+                                each value JSON-encoded, plus `version`
+                                (incremented on every write)
+    {session_id}:history  LIST  one turn per element (RPUSH), encoded with
+                                the versioned binary codec (session_codec.py)
+    lock:{session_id}     STR   per-session lock token
+    lockq:{session_id}    LIST  FIFO queue of requests waiting for the lock
+    lockwake:{session_id}:{token}
+                          LIST  handoff signal a queued waiter BLPOPs on
+
+A turn only appends its new messages and updates a few hash fields, so the
+per-turn Redis cost no longer grows with the length of the conversation.
+
+Every write publishes "<version>:<session_id>" on
+SESSION_INVALIDATION_CHANNEL so per-worker caches (session_cache.py) can
+drop stale copies.
+
+Every Lua script call is timed as ina_state_op_seconds{op=<script name>,
+outcome} (see _script()); lock waits are in ina_session_lock_*.
+
+Legacy layout: the monolith writes the whole session as one JSON string at
+`{session_id}`. Every read path migrates that key lazily (inside the same
+Lua script) into the hash + list layout and deletes it, so sessions created
+the old way keep working.
+"""
 import os
 import json
 import logging
 import asyncio
+import time
 from uuid import uuid4
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
+
+from orchestrator.lib import metrics, tracing
+from orchestrator.lib.session_codec import codec
 
 # Use redis.asyncio client (redis-py supports asyncio)
 try:
@@ -24,38 +58,276 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_EXPIRE_SECONDS = int(os.getenv("REDIS_EXPIRE_SECONDS", 60 * 60))  # default 1 hour
 
+# How many trailing history turns a chat turn loads (-1 = full history).
+# Note: the Strategy Engine and DB sync only see the loaded window.
+SESSION_HISTORY_WINDOW = int(os.getenv("SESSION_HISTORY_WINDOW", -1))
+
+# Pub/sub channel carrying "<version>:<session_id>" after every session write
+SESSION_INVALIDATION_CHANNEL = os.getenv(
+    "SESSION_INVALIDATION_CHANNEL", "session-invalidate"
+)
+
+# "lock"       → a per-session lock is held for the whole turn (default)
+# "optimistic" → no lock; the final write is a version compare-and-set
+#                (save_turn_optimistic)
+SESSION_CONCURRENCY_MODE = os.getenv("SESSION_CONCURRENCY_MODE", "lock").lower()
+
+# Optimistic mode, on version conflict: "retry" re-applies the turn's
+# bookkeeping on the current session, "reject" answers 409.
+SESSION_CONFLICT_POLICY = os.getenv("SESSION_CONFLICT_POLICY", "retry").lower()
+SESSION_CAS_MAX_RETRIES = int(os.getenv("SESSION_CAS_MAX_RETRIES", 3))
+
+# Returned by lock_and_load() when the caller's known_version is current
+NOT_MODIFIED = object()
+
 # Create the redis client (connection pool)
 _redis_client: Optional[redis.Redis] = None
 
+# Registered Lua scripts (EVALSHA), bound to the current client
+_scripts: dict = {}
+
 
 def get_redis_client() -> redis.Redis:
     """Return a singleton redis client instance (async)."""
     global _redis_client
     if _redis_client is None:
         if REDIS_URL:
-            _redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+            _redis_client = redis.from_url(REDIS_URL, decode_responses=False)
         else:
             _redis_client = redis.Redis(
                 host=REDIS_HOST,
                 port=REDIS_PORT,
                 db=REDIS_DB,
-                decode_responses=True,  # returns strings not bytes
+                decode_responses=False,  # raw bytes — history turns are binary
             )
     return _redis_client
 
 
+# ---------------------- Keys ----------------------
+def _meta_key(session_id: str) -> str:
+    return f"{session_id}:meta"
+
+
+def _history_key(session_id: str) -> str:
+    return f"{session_id}:history"
+
+
+def _lock_key(session_id: str) -> str:
+    return f"lock:{session_id}"
+
+
+def _lock_queue_key(session_id: str) -> str:
+    return f"lockq:{session_id}"
+
+
+def _wake_prefix(session_id: str) -> str:
+    return f"lockwake:{session_id}:"
+
+
+def _wake_key(session_id: str, token: str) -> str:
+    return _wake_prefix(session_id) + token
+
+
+def _session_keys(session_id: str) -> List[str]:
+    """KEYS layout shared by every session script: legacy, meta, history."""
+    return [session_id, _meta_key(session_id), _history_key(session_id)]
+
+
+class _TimedScript:
+    """
+    Registered Lua script that records ina_state_op_seconds{op=name}
+    (and a "redis <name>" span when tracing is on).
+    """
+
+    def __init__(self, name: str, script):
+        self.name = name
+        self._script = script
+
+    async def __call__(self, keys=None, args=None):
+        started = time.perf_counter()
+        outcome = "error"
+        with tracing.span(
+            f"redis {self.name}", kind="client", **{"db.system": "redis"}
+        ):
+            try:
+                res = await self._script(keys=keys, args=args)
+                outcome = "ok"
+                return res
+            finally:
+                metrics.STATE_OP_SECONDS.labels(
+                    op=self.name, outcome=outcome
+                ).observe(time.perf_counter() - started)
+
+
+def _script(name: str, source: str):
+    """Register a Lua script once per client and reuse it (EVALSHA)."""
+    script = _scripts.get(name)
+    if script is None:
+        script = _TimedScript(name, get_redis_client().register_script(source))
+        _scripts[name] = script
+    return script
+
+
+# ---------------------- Encoding ----------------------
+def _encode_fields(data: dict) -> dict:
+    """
+    JSON-encode every scalar field (history is stored separately).
+    Scalars stay JSON text so Lua can read them (e.g. the "locked" check).
+    """
+    return {
+        field: json.dumps(value) for field, value in data.items() if field != "messages"
+    }
+
+
+def _decode_meta(flat: list) -> dict:
+    """Decode an HGETALL reply ([field, json, ...]) into a dict."""
+    return {
+        flat[i].decode("utf-8"): json.loads(flat[i + 1])
+        for i in range(0, len(flat), 2)
+    }
+
+
+def _decode_history(items: list) -> List[dict]:
+    return [codec.decode(item) for item in items]
+
+
+# ---------------------- Lua ----------------------
+# Lazy migration of the legacy single-key JSON session. Prepended to every
+# script that reads a session. KEYS[1] = legacy, KEYS[2] = meta, KEYS[3] = history.
+# Returns false if the legacy blob is not valid JSON.
+_MIGRATE_LUA = """
+local function migrate_legacy()
+    if redis.call("TYPE", KEYS[1]).ok ~= "string" then
+        return true
+    end
+    local raw = redis.call("GET", KEYS[1])
+    local ok, doc = pcall(cjson.decode, raw)
+    if not ok or type(doc) ~= "table" then
+        return false
+    end
+    local ttl = redis.call("TTL", KEYS[1])
+    local version = tonumber(redis.call("HGET", KEYS[2], "version")) or 0
+    redis.call("DEL", KEYS[2], KEYS[3])
+    for field, value in pairs(doc) do
+        if field ~= "messages" and field ~= "version" then
+            redis.call("HSET", KEYS[2], field, cjson.encode(value))
+        end
+    end
+    redis.call("HSET", KEYS[2], "version", version + 1)
+    if type(doc["messages"]) == "table" then
+        for _, turn in ipairs(doc["messages"]) do
+            redis.call("RPUSH", KEYS[3], cjson.encode(turn))
+        end
+    end
+    if ttl > 0 then
+        redis.call("EXPIRE", KEYS[2], ttl)
+        redis.call("EXPIRE", KEYS[3], ttl)
+    end
+    redis.call("DEL", KEYS[1])
+    return true
+end
+
+local function read_history(limit)
+    if limit < 0 then
+        return redis.call("LRANGE", KEYS[3], 0, -1)
+    elseif limit > 0 then
+        return redis.call("LRANGE", KEYS[3], -limit, -1)
+    end
+    return {}
+end
+"""
+
+# ARGV[1] = history limit (-1 all, 0 none, N last N turns)
+# Returns {0} missing | {1, meta, history} found | {4} corrupt legacy blob
+_LOAD_LUA = (
+    _MIGRATE_LUA
+    + """
+if not migrate_legacy() then
+    return {4}
+end
+if redis.call("EXISTS", KEYS[2]) == 0 then
+    return {0}
+end
+return {1, redis.call("HGETALL", KEYS[2]), read_history(tonumber(ARGV[1]))}
+"""
+)
+
+_LOAD_MISSING = 0
+_LOAD_ACQUIRED = 1
+_LOAD_STATUS_LOCKED = 2
+_LOAD_BUSY = 3
+_LOAD_CORRUPT = 4
+_LOAD_NOT_MODIFIED = 5
+
+
+async def _load(session_id: str, history_limit: int) -> Optional[dict]:
+    script = _script("load", _LOAD_LUA)
+    res = await script(keys=_session_keys(session_id), args=[history_limit])
+    code = int(res[0])
+    if code == _LOAD_MISSING:
+        logger.debug("Session %s not found", session_id)
+        return None
+    if code == _LOAD_CORRUPT:
+        logger.warning("Corrupt legacy session JSON for %s", session_id)
+        return {}
+    session = _decode_meta(res[1])
+    session["messages"] = _decode_history(res[2])
+    return session
+
+
+# KEYS[1..3] = legacy, meta, history
+# ARGV[1] = session ttl, ARGV[2] = invalidation channel, ARGV[3] = session id,
+# ARGV[4] = number of field/value items N, ARGV[5 .. 4+N] = field/value pairs,
+# ARGV[5+N ..] = encoded turns. Returns the new version.
+_SET_LUA = """
+local version = (tonumber(redis.call("HGET", KEYS[2], "version")) or 0) + 1
+redis.call("DEL", KEYS[1], KEYS[2], KEYS[3])
+local nfields = tonumber(ARGV[4])
+if nfields > 0 then
+    redis.call("HSET", KEYS[2], unpack(ARGV, 5, 4 + nfields))
+end
+redis.call("HSET", KEYS[2], "version", version)
+if #ARGV > 4 + nfields then
+    redis.call("RPUSH", KEYS[3], unpack(ARGV, 5 + nfields, #ARGV))
+end
+redis.call("EXPIRE", KEYS[2], ARGV[1])
+redis.call("EXPIRE", KEYS[3], ARGV[1])
+redis.call("PUBLISH", ARGV[2], version .. ":" .. ARGV[3])
+return version
+"""
+
+
+def _flatten_fields(data: dict) -> list:
+    """[field, json, field, json, ...] for HSET via Lua (version excluded)."""
+    return [
+        item
+        for field, value in _encode_fields(data).items()
+        if field != "version"
+        for item in (field, value)
+    ]
+
+
 async def set_session(
     session_id: str, data: dict, expire: int = REDIS_EXPIRE_SECONDS
 ) -> bool:
     """
-    Save a session dict to Redis (JSON serialized).
+    Replace a whole session (scalar fields + full history).
     Returns True on success, False on failure.
     """
-    client = get_redis_client()
+    script = _script("set", _SET_LUA)
     logger.info(f"Setting session: {session_id}")
     try:
-        payload = json.dumps(data)
-        await client.set(session_id, payload, ex=expire)
+        flat = _flatten_fields(data)
+        turns = [codec.encode(turn) for turn in data.get("messages") or []]
+        args = [
+            expire,
+            SESSION_INVALIDATION_CHANNEL,
+            session_id,
+            len(flat),
+            *flat,
+            *turns,
+        ]
+        await script(keys=_session_keys(session_id), args=args)
         logger.debug("Set session %s", session_id)
         return True
     except Exception as exc:
@@ -63,35 +335,50 @@ async def set_session(
         return False
 
 
-async def get_session(session_id: str) -> Optional[dict]:
+async def get_session(session_id: str, history_limit: int = -1) -> Optional[dict]:
     """
     Retrieve a session dict from Redis, or None if not found.
+
+    history_limit: -1 loads the full history, N loads only the last N turns.
     """
-    client = get_redis_client()
     logger.info(f"Getting session: {session_id}")
     try:
-        raw = await client.get(session_id)
-        if raw is None:
-            logger.debug("Session %s not found", session_id)
-            return None
-        return json.loads(raw)
+        return await _load(session_id, history_limit)
     except Exception as exc:
         logger.exception("Error getting session %s: %s", session_id, exc)
         return None
 
 
+async def get_session_meta(session_id: str) -> Optional[dict]:
+    """Retrieve only the scalar session fields (no history), or None."""
+    return await get_session(session_id, history_limit=0)
+
+
+async def get_history(session_id: str, last_n: int) -> List[dict]:
+    """Retrieve only the last N turns of a session's history."""
+    session = await get_session(session_id, history_limit=last_n)
+    return (session or {}).get("messages", [])
+
+
 async def ping_redis() -> bool:
     """
     Check if Redis is reachable (PING).
     """
     client = get_redis_client()
+    started = time.perf_counter()
+    outcome = "error"
     try:
         res = await client.ping()
         logger.debug("Redis PING -> %s", res)
+        outcome = "ok"
         return bool(res)
     except Exception as exc:
         logger.exception("Redis ping failed: %s", exc)
         return False
+    finally:
+        metrics.STATE_OP_SECONDS.labels(op="ping", outcome=outcome).observe(
+            time.perf_counter() - started
+        )
 
 
 # optional: a graceful close helper (useful on app shutdown)
@@ -104,24 +391,199 @@ async def close_redis():
         except Exception:
             pass
         _redis_client = None
+    _scripts.clear()
 
 
-async def _release_lock(lock_key: str, token: str) -> None:
+# ---------------------- Session lock ----------------------
+# Waiters are queued FIFO in lockq:{session_id} as "<token>|<deadline ms>"
+# (Redis TIME). A releaser never just deletes the lock: it pops the next
+# waiter whose deadline has not passed, sets the lock to that waiter's token
+# and pushes to lockwake:{session_id}:{token}, where the waiter is blocked in
+# BLPOP. The lock is handed over in arrival order with no polling and no
+# window for a newcomer to jump the queue.
+_LOCK_QUEUE_LUA = """
+local function now_ms()
+    local t = redis.call("TIME")
+    return tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+end
+
+local function enqueue_waiter(queue_key, token, wait_ms)
+    redis.call("RPUSH", queue_key, token .. "|" .. (now_ms() + wait_ms))
+    redis.call("PEXPIRE", queue_key, wait_ms + 60000)
+end
+
+local function remove_waiter(queue_key, token)
+    local prefix = token .. "|"
+    for _, entry in ipairs(redis.call("LRANGE", queue_key, 0, -1)) do
+        if string.sub(entry, 1, #prefix) == prefix then
+            redis.call("LREM", queue_key, 1, entry)
+            return
+        end
+    end
+end
+
+local function release_or_handoff(lock_key, queue_key, wake_prefix, lock_ttl)
+    local now = now_ms()
+    while true do
+        local entry = redis.call("LPOP", queue_key)
+        if not entry then
+            redis.call("DEL", lock_key)
+            return
+        end
+        local sep = string.find(entry, "|", 1, true)
+        if sep and tonumber(string.sub(entry, sep + 1)) > now then
+            local next_token = string.sub(entry, 1, sep - 1)
+            local wake_key = wake_prefix .. next_token
+            redis.call("SET", lock_key, next_token, "EX", lock_ttl)
+            redis.call("RPUSH", wake_key, "1")
+            redis.call("EXPIRE", wake_key, lock_ttl)
+            return
+        end
+        -- waiter already gave up (deadline passed): skip it
+    end
+end
+
+-- A queued waiter leaves without taking the critical section: if the lock
+-- was handed to it in the meantime, pass it on.
+local function drop_waiter(lock_key, queue_key, wake_prefix, lock_ttl, token)
+    remove_waiter(queue_key, token)
+    if redis.call("GET", lock_key) == token then
+        release_or_handoff(lock_key, queue_key, wake_prefix, lock_ttl)
+    end
+end
+"""
+
+# KEYS[1] = lock, KEYS[2] = queue
+# ARGV[1] = token, ARGV[2] = lock ttl, ARGV[3] = wait ms (0 = don't queue),
+# ARGV[4] = "1" if already queued
+# Returns {1} acquired | {0, lock pttl ms} busy (queued if ARGV[3] > 0)
+_ACQUIRE_LUA = (
+    _LOCK_QUEUE_LUA
+    + """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    if not redis.call("SET", KEYS[1], ARGV[1], "NX", "EX", ARGV[2]) then
+        if ARGV[4] ~= "1" and tonumber(ARGV[3]) > 0 then
+            enqueue_waiter(KEYS[2], ARGV[1], tonumber(ARGV[3]))
+        end
+        return {0, redis.call("PTTL", KEYS[1])}
+    end
+end
+if ARGV[4] == "1" then
+    remove_waiter(KEYS[2], ARGV[1])
+end
+return {1}
+"""
+)
+
+# KEYS[1] = lock, KEYS[2] = queue
+# ARGV[1] = token, ARGV[2] = lock ttl, ARGV[3] = wake key prefix
+_RELEASE_LUA = (
+    _LOCK_QUEUE_LUA
+    + """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    release_or_handoff(KEYS[1], KEYS[2], ARGV[3], ARGV[2])
+    return 1
+end
+return 0
+"""
+)
+
+# Waiter timed out. KEYS[1] = lock, KEYS[2] = queue, KEYS[3] = own wake key
+# ARGV[1] = token
+# Returns 1 if the lock was handed over just before giving up (keep it), else 0
+_ABANDON_LUA = (
+    _LOCK_QUEUE_LUA
+    + """
+redis.call("DEL", KEYS[3])
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return 1
+end
+remove_waiter(KEYS[2], ARGV[1])
+return 0
+"""
+)
+
+
+def _lock_args(session_id: str, token: str, lock_ttl: int) -> list:
+    return [token, lock_ttl, _wake_prefix(session_id)]
+
+
+async def _release_lock(session_id: str, token: str, lock_ttl: int = 10) -> None:
     """
-    Release lock only if token matches (safe unlock).
+    Release lock only if token matches (safe unlock), handing it to the
+    next queued waiter if there is one.
     """
-    client = get_redis_client()
-    release_script = """
-    if redis.call("GET", KEYS[1]) == ARGV[1] then
-        return redis.call("DEL", KEYS[1])
-    else
-        return 0
-    end
+    script = _script("release", _RELEASE_LUA)
+    try:
+        await script(
+            keys=[_lock_key(session_id), _lock_queue_key(session_id)],
+            args=_lock_args(session_id, token, lock_ttl),
+        )
+    except Exception as exc:
+        logger.warning("Failed to release lock %s: %s", _lock_key(session_id), exc)
+
+
+async def _wait_for_handoff(
+    session_id: str, token: str, deadline: float, lock_pttl_ms: int
+) -> bool:
     """
+    Block until the lock holder hands the lock to `token`.
+
+    Returns True if the lock is now ours. Returns False when the deadline
+    passes, or when the lock expired without a release (crashed holder),
+    so the caller retries the acquire script instead of sleeping through
+    the rest of its deadline.
+    """
+    remaining = deadline - asyncio.get_event_loop().time()
+    if remaining <= 0:
+        return False
+    timeout = remaining
+    if lock_pttl_ms > 0:
+        timeout = min(remaining, lock_pttl_ms / 1000 + 0.01)
+    with tracing.span("session_lock.wait", **{"ina.session_id": session_id}) as current:
+        try:
+            woken = await get_redis_client().blpop(
+                [_wake_key(session_id, token)], timeout=max(timeout, 0.01)
+            )
+        except Exception as exc:
+            logger.warning("Error waiting for lock %s: %s", _lock_key(session_id), exc)
+            await asyncio.sleep(min(remaining, 0.05))
+            return False
+        tracing.set_attributes(current, **{"ina.handed_over": bool(woken)})
+        return bool(woken)
+
+
+async def _abandon_wait(session_id: str, token: str) -> bool:
+    """Leave the wait queue. Returns True if the lock was handed over anyway."""
+    script = _script("abandon", _ABANDON_LUA)
     try:
-        await client.eval(release_script, 1, lock_key, token)
+        res = await script(
+            keys=[
+                _lock_key(session_id),
+                _lock_queue_key(session_id),
+                _wake_key(session_id, token),
+            ],
+            args=[token],
+        )
+        return bool(res)
     except Exception as exc:
-        logger.warning("Failed to release lock %s: %s", lock_key, exc)
+        logger.warning("Failed to leave lock queue %s: %s", _lock_key(session_id), exc)
+        return False
+
+
+def _lock_timeout(session_id: str, waited: float):
+    from fastapi import HTTPException  # local import to avoid circular dep
+
+    metrics.SESSION_LOCK_TIMEOUTS.inc()
+    metrics.SESSION_LOCK_WAIT_SECONDS.labels(outcome="timeout").observe(waited)
+    logger.warning(
+        "Could not acquire lock for session %s — concurrent request in progress",
+        session_id,
+    )
+    return HTTPException(
+        status_code=429,
+        detail="Another request is already being processed for this session. Please retry in a moment.",
+    )
 
 
 @asynccontextmanager
@@ -135,37 +597,437 @@ async def session_lock(
 
     - acquire_timeout: max seconds to wait for lock.
     - lock_ttl: lock expiry to avoid deadlocks if process crashes.
-    """
-    from fastapi import HTTPException  # local import to avoid circular dep
 
-    client = get_redis_client()
-    lock_key = f"lock:{session_id}"
+    Waiters queue up and are woken in arrival order when the holder
+    releases (no polling).
+    """
+    script = _script("acquire", _ACQUIRE_LUA)
+    keys = [_lock_key(session_id), _lock_queue_key(session_id)]
     token = str(uuid4())
-    deadline = asyncio.get_event_loop().time() + acquire_timeout
-    acquired = False
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    deadline = started + acquire_timeout
+    queued = False
 
-    while asyncio.get_event_loop().time() < deadline:
+    while True:
+        wait_ms = max(int((deadline - loop.time()) * 1000), 0)
         try:
-            acquired = bool(await client.set(lock_key, token, nx=True, ex=lock_ttl))
+            res = await script(
+                keys=keys, args=[token, lock_ttl, wait_ms, "1" if queued else "0"]
+            )
         except Exception as exc:
-            logger.exception("Error acquiring lock %s: %s", lock_key, exc)
-            acquired = False
+            logger.exception("Error acquiring lock %s: %s", keys[0], exc)
+            res = [0, 0]
 
-        if acquired:
+        if int(res[0]) == 1:
             break
-        await asyncio.sleep(0.05)
+        if not queued:
+            metrics.SESSION_LOCK_CONTENTION.inc()
+            queued = wait_ms > 0
+        if await _wait_for_handoff(session_id, token, deadline, int(res[1])):
+            continue
+        if loop.time() < deadline:
+            continue
+        if await _abandon_wait(session_id, token):
+            continue
+        raise _lock_timeout(session_id, loop.time() - started)
 
-    if not acquired:
-        logger.warning(
-            "Could not acquire lock for session %s — concurrent request in progress",
-            session_id,
+    metrics.SESSION_LOCK_WAIT_SECONDS.labels(outcome="acquired").observe(
+        loop.time() - started
+    )
+    try:
+        yield
+    finally:
+        await _release_lock(session_id, token, lock_ttl)
+
+
+# =====================================================
+# Atomic lock-and-load / save-and-unlock
+# A chat turn needs exactly two round trips:
+#   1. lock_and_load   → read session + acquire lock (or answer "locked")
+#   2. save_and_unlock → update fields, append turns, release lock
+# Under contention lock_and_load blocks on the same FIFO handoff queue as
+# session_lock() and retries once the lock has been handed to it.
+# =====================================================
+
+# KEYS[4] = lock key, KEYS[5] = lock queue
+# ARGV[1] = lock token, ARGV[2] = lock ttl, ARGV[3] = history limit,
+# ARGV[4] = version the caller already has cached ("" = none),
+# ARGV[5] = wait ms (0 = don't queue), ARGV[6] = "1" if already queued,
+# ARGV[7] = wake key prefix
+# Returns {0} missing | {1, meta, history} acquired | {2, meta} status locked
+#         {3, lock pttl ms} busy | {4} corrupt legacy blob
+#         {5} acquired, cache still current
+_LOCK_AND_LOAD_LUA = (
+    _MIGRATE_LUA
+    + _LOCK_QUEUE_LUA
+    + """
+local queued = ARGV[6] == "1"
+if not migrate_legacy() then
+    if queued then drop_waiter(KEYS[4], KEYS[5], ARGV[7], ARGV[2], ARGV[1]) end
+    return {4}
+end
+if redis.call("EXISTS", KEYS[2]) == 0 then
+    if queued then drop_waiter(KEYS[4], KEYS[5], ARGV[7], ARGV[2], ARGV[1]) end
+    return {0}
+end
+if redis.call("HGET", KEYS[2], "status") == '"locked"' then
+    if queued then drop_waiter(KEYS[4], KEYS[5], ARGV[7], ARGV[2], ARGV[1]) end
+    return {2, redis.call("HGETALL", KEYS[2])}
+end
+if redis.call("GET", KEYS[4]) ~= ARGV[1] then
+    if not redis.call("SET", KEYS[4], ARGV[1], "NX", "EX", ARGV[2]) then
+        if not queued and tonumber(ARGV[5]) > 0 then
+            enqueue_waiter(KEYS[5], ARGV[1], tonumber(ARGV[5]))
+        end
+        return {3, redis.call("PTTL", KEYS[4])}
+    end
+end
+if queued then
+    remove_waiter(KEYS[5], ARGV[1])
+end
+if ARGV[4] ~= "" and redis.call("HGET", KEYS[2], "version") == ARGV[4] then
+    return {5}
+end
+return {1, redis.call("HGETALL", KEYS[2]), read_history(tonumber(ARGV[3]))}
+"""
+)
+
+# KEYS[1] = meta, KEYS[2] = history, KEYS[3] = lock key, KEYS[4] = lock queue
+# ARGV[1] = lock token, ARGV[2] = session ttl, ARGV[3] = invalidation channel,
+# ARGV[4] = session id, ARGV[5] = lock ttl, ARGV[6] = wake key prefix,
+# ARGV[7] = number of field/value items N,
+# ARGV[8 .. 7+N] = field/value pairs, ARGV[8+N ..] = turns to append
+# Returns the new version, or 0 if the lock is no longer ours
+_SAVE_AND_UNLOCK_LUA = (
+    _LOCK_QUEUE_LUA
+    + """
+if redis.call("GET", KEYS[3]) ~= ARGV[1] then
+    return 0
+end
+local nfields = tonumber(ARGV[7])
+if nfields > 0 then
+    redis.call("HSET", KEYS[1], unpack(ARGV, 8, 7 + nfields))
+end
+if #ARGV > 7 + nfields then
+    redis.call("RPUSH", KEYS[2], unpack(ARGV, 8 + nfields, #ARGV))
+end
+local version = redis.call("HINCRBY", KEYS[1], "version", 1)
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+redis.call("EXPIRE", KEYS[2], ARGV[2])
+release_or_handoff(KEYS[3], KEYS[4], ARGV[6], ARGV[5])
+redis.call("PUBLISH", ARGV[3], version .. ":" .. ARGV[4])
+return version
+"""
+)
+
+
+async def lock_and_load(
+    session_id: str,
+    acquire_timeout: float = 3.0,
+    lock_ttl: int = 10,
+    history_limit: int = SESSION_HISTORY_WINDOW,
+    known_version: Optional[int] = None,
+) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Read a session and acquire its lock in a single round trip.
+
+    Returns (session, token):
+        (None, None)    → session not found (nothing was locked)
+        (session, None) → session status is "locked"; answered from the same
+                          read (scalar fields only) without entering the
+                          critical section
+        (session, token)→ lock held; hand the token to save_and_unlock()
+                          or release_lock()
+        (NOT_MODIFIED, token) → lock held and the stored version equals
+                          known_version; no payload was transferred, the
+                          caller's cached copy is current
+
+    history_limit: -1 loads the full history, N only the last N turns.
+
+    Same timeout/TTL semantics as session_lock(): waits in the FIFO queue
+    and raises HTTPException(429) if the lock has not been handed over
+    after acquire_timeout.
+    """
+    script = _script("lock_and_load", _LOCK_AND_LOAD_LUA)
+    keys = _session_keys(session_id) + [
+        _lock_key(session_id),
+        _lock_queue_key(session_id),
+    ]
+    token = str(uuid4())
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    deadline = started + acquire_timeout
+    queued = False
+    logger.info(f"Lock-and-load session: {session_id}")
+
+    while True:
+        wait_ms = max(int((deadline - loop.time()) * 1000), 0)
+        try:
+            args = [
+                token,
+                lock_ttl,
+                history_limit,
+                "" if known_version is None else known_version,
+                wait_ms,
+                "1" if queued else "0",
+                _wake_prefix(session_id),
+            ]
+            res = await script(keys=keys, args=args)
+            code = int(res[0])
+            if code == _LOAD_MISSING:
+                logger.debug("Session %s not found", session_id)
+                return None, None
+            if code == _LOAD_CORRUPT:
+                logger.warning("Corrupt legacy session JSON for %s", session_id)
+                return {}, None
+            if code == _LOAD_STATUS_LOCKED:
+                return _decode_meta(res[1]), None
+            if code in (_LOAD_ACQUIRED, _LOAD_NOT_MODIFIED):
+                metrics.SESSION_LOCK_WAIT_SECONDS.labels(outcome="acquired").observe(
+                    loop.time() - started
+                )
+            if code == _LOAD_NOT_MODIFIED:
+                return NOT_MODIFIED, token
+            if code == _LOAD_ACQUIRED:
+                session = _decode_meta(res[1])
+                session["messages"] = _decode_history(res[2])
+                return session, token
+        except Exception as exc:
+            logger.exception("Error in lock-and-load for %s: %s", session_id, exc)
+            if queued:
+                await _abandon_wait(session_id, token)
+            await release_lock(session_id, token, lock_ttl)
+            return None, None
+
+        # _LOAD_BUSY: we are queued (unless the deadline had already passed)
+        if not queued:
+            metrics.SESSION_LOCK_CONTENTION.inc()
+            queued = wait_ms > 0
+        if await _wait_for_handoff(session_id, token, deadline, int(res[1])):
+            continue  # lock is ours — next call loads the session
+        if loop.time() < deadline:
+            continue  # lock expired without a release: try to take it
+        if await _abandon_wait(session_id, token):
+            continue  # handed over just as we gave up
+        raise _lock_timeout(session_id, loop.time() - started)
+
+
+async def save_and_unlock(
+    session_id: str,
+    token: str,
+    fields: dict,
+    new_turns: List[dict],
+    expire: int = REDIS_EXPIRE_SECONDS,
+    lock_ttl: int = 10,
+) -> Optional[int]:
+    """
+    Update scalar fields, append this turn's messages and release the lock
+    in a single round trip. The TTL of both session keys is refreshed, the
+    session version is incremented and an invalidation is published. If a
+    request is queued on the lock, it is handed over (with `lock_ttl`) in
+    the same script.
+
+    Returns the new session version. The write only happens if `token`
+    still owns the lock — if the lock TTL expired and another request took
+    over, nothing is written (avoids a lost update) and None is returned.
+    """
+    script = _script("save_and_unlock", _SAVE_AND_UNLOCK_LUA)
+    logger.info(f"Save-and-unlock session: {session_id}")
+    flat = _flatten_fields(fields)
+    args = [
+        token,
+        expire,
+        SESSION_INVALIDATION_CHANNEL,
+        session_id,
+        lock_ttl,
+        _wake_prefix(session_id),
+        len(flat),
+        *flat,
+        *(codec.encode(turn) for turn in new_turns),
+    ]
+    try:
+        version = await script(
+            keys=[
+                _meta_key(session_id),
+                _history_key(session_id),
+                _lock_key(session_id),
+                _lock_queue_key(session_id),
+            ],
+            args=args,
         )
-        raise HTTPException(
-            status_code=429,
-            detail="Another request is already being processed for this session. Please retry in a moment.",
+    except Exception as exc:
+        logger.exception("Error in save-and-unlock for %s: %s", session_id, exc)
+        return None
+
+    if not version:
+        logger.warning(
+            "Lock for session %s expired before save — update discarded", session_id
         )
+        return None
+    return int(version)
+
+
+async def release_lock(session_id: str, token: str, lock_ttl: int = 10) -> None:
+    """Release a lock taken by lock_and_load() without saving (error paths)."""
+    await _release_lock(session_id, token, lock_ttl)
+
+
+# =====================================================
+# Optimistic concurrency (SESSION_CONCURRENCY_MODE=optimistic)
+# The turn runs without a lock; the final write only applies if the
+# session version is still the one that was read.
+# =====================================================
+
+# KEYS[1..3] = legacy, meta, history
+# ARGV[1] = expected version, ARGV[2] = session ttl, ARGV[3] = invalidation
+# channel, ARGV[4] = session id, ARGV[5] = number of field/value items N,
+# ARGV[6 .. 5+N] = field/value pairs, ARGV[6+N ..] = turns to append
+# Returns {1, new version} saved | {0, current version} conflict | {0, -1} missing
+_CAS_SAVE_LUA = (
+    _MIGRATE_LUA
+    + """
+if not migrate_legacy() or redis.call("EXISTS", KEYS[2]) == 0 then
+    return {0, -1}
+end
+local current = tonumber(redis.call("HGET", KEYS[2], "version")) or 0
+if current ~= tonumber(ARGV[1]) then
+    return {0, current}
+end
+local nfields = tonumber(ARGV[5])
+if nfields > 0 then
+    redis.call("HSET", KEYS[2], unpack(ARGV, 6, 5 + nfields))
+end
+if #ARGV > 5 + nfields then
+    redis.call("RPUSH", KEYS[3], unpack(ARGV, 6 + nfields, #ARGV))
+end
+local version = redis.call("HINCRBY", KEYS[2], "version", 1)
+redis.call("EXPIRE", KEYS[2], ARGV[2])
+redis.call("EXPIRE", KEYS[3], ARGV[2])
+redis.call("PUBLISH", ARGV[3], version .. ":" .. ARGV[4])
+return {1, version}
+"""
+)
+
+
+class SessionFinalized(Exception):
+    """
+    A concurrent turn locked the session (5-offer limit) before this turn
+    could be saved; the turn must not be applied. `meta` holds the stored
+    scalar fields.
+    """
+
+    def __init__(self, session_id: str, meta: dict):
+        super().__init__(f"Session {session_id} was locked by a concurrent turn")
+        self.meta = meta
+
+
+async def compare_and_save(
+    session_id: str,
+    expected_version: int,
+    fields: dict,
+    new_turns: List[dict],
+    expire: int = REDIS_EXPIRE_SECONDS,
+) -> Tuple[bool, Optional[int]]:
+    """
+    Update scalar fields and append turns only if the stored version still
+    equals expected_version (compare-and-set, one round trip).
 
+    Returns:
+        (True, new_version)      → written
+        (False, current_version) → version changed since the read
+        (False, None)            → session missing or Redis error
+    """
+    script = _script("cas_save", _CAS_SAVE_LUA)
+    flat = _flatten_fields(fields)
+    args = [
+        expected_version,
+        expire,
+        SESSION_INVALIDATION_CHANNEL,
+        session_id,
+        len(flat),
+        *flat,
+        *(codec.encode(turn) for turn in new_turns),
+    ]
     try:
-        yield
-    finally:
-        await _release_lock(lock_key, token)
+        res = await script(keys=_session_keys(session_id), args=args)
+    except Exception as exc:
+        logger.exception("Error in compare-and-save for %s: %s", session_id, exc)
+        return False, None
+
+    saved, version = bool(int(res[0])), int(res[1])
+    if version < 0:
+        logger.warning("Session %s disappeared before save", session_id)
+        return False, None
+    return saved, version
+
+
+async def save_turn_optimistic(
+    session_id: str,
+    expected_version: int,
+    fields: dict,
+    new_turns: List[dict],
+    rebase: Callable[[dict], dict],
+    policy: str = SESSION_CONFLICT_POLICY,
+    max_retries: int = SESSION_CAS_MAX_RETRIES,
+    expire: int = REDIS_EXPIRE_SECONDS,
+) -> Tuple[Optional[int], dict]:
+    """
+    Persist a turn with compare_and_save() and apply the conflict policy.
+
+    On a version conflict:
+        policy "retry"  → re-read the scalar fields, call rebase(current_meta)
+                          to recompute the turn's bookkeeping (offer_count,
+                          status, last_bot_offer) on top of them and try
+                          again, up to max_retries times. The slow part of
+                          the turn (NLU / strategy / phraser) is not redone.
+        policy "reject" → raise HTTPException(409).
+    A retry never rebases onto a session that is now "locked" (finalized
+    by the concurrent turn): SessionFinalized is raised and the turn is
+    dropped, never appended.
+
+    Returns (new_version, fields_written); new_version is None if the
+    session vanished or Redis failed (same as save_and_unlock()).
+    """
+    from fastapi import HTTPException  # local import to avoid circular dep
+
+    for attempt in range(max_retries + 1):
+        saved, version = await compare_and_save(
+            session_id, expected_version, fields, new_turns, expire
+        )
+        if saved:
+            if attempt:
+                metrics.SESSION_CAS_CONFLICTS.labels(outcome="retried").inc()
+            return version, fields
+        if version is None:
+            return None, fields
+
+        logger.info(
+            "Version conflict on session %s (expected %s, found %s)",
+            session_id,
+            expected_version,
+            version,
+        )
+        if policy != "retry" or attempt == max_retries:
+            break
+
+        current = await get_session_meta(session_id)
+        if not current:
+            return None, fields
+        if current.get("status") == "locked":
+            metrics.SESSION_CAS_CONFLICTS.labels(outcome="finalized").inc()
+            raise SessionFinalized(session_id, current)
+        fields = rebase(current)
+        expected_version = int(current.get("version", 0))
+
+    metrics.SESSION_CAS_CONFLICTS.labels(
+        outcome="rejected" if policy != "retry" else "exhausted"
+    ).inc()
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "error": True,
+            "code": "SESSION_CONFLICT",
+            "message": "This session was updated by another request. Please retry.",
+        },
+    )
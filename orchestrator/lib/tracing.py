@@ -0,0 +1,193 @@
+"""
+OpenTelemetry tracing with W3C trace context propagation.
+
+Problem (before):
+    X-Request-ID reached NLU, Brain and Phraser only for log correlation.
+    A slow turn could not be seen as one waterfall (lock → Redis → nodes →
+    downstream services → LLM call).
+
+Solution:
+    - A server span per incoming request (trace_middleware), continuing the
+      caller's `traceparent` if there is one.
+    - The shared http_pool client injects `traceparent`/`tracestate` into
+      every outgoing request (inject_request_hook), so the spans created by
+      nlu-service, strategy-engine and llm-phraser join the same trace.
+    - Spans for each graph node and downstream attempt
+      (lib/instrumentation.py), each Redis script and the lock wait
+      (lib/state_manager.py).
+
+    Head sampling: ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)).
+    The orchestrator makes the decision for a turn; services follow the
+    parent's sampled flag, so overhead stays bounded at production QPS.
+    Spans are exported in batches off the request path.
+
+    OpenTelemetry is optional: without the packages (or with
+    TRACING_ENABLED=false, the default) every helper is a no-op.
+
+Config (env):
+    TRACING_ENABLED        "true" to enable (default: false)
+    TRACING_EXPORTER       otlp (default) | file | console
+    TRACING_SAMPLE_RATIO   fraction of new traces kept (default: 0.05)
+    TRACING_FILE           JSON-lines output for the file exporter
+                           (default: traces.jsonl)
+    OTEL_SERVICE_NAME      service.name resource (default: ina-orchestrator)
+    OTEL_EXPORTER_OTLP_ENDPOINT  collector, read by the OTLP exporter
+                           (default: http://localhost:4318)
+
+Install: pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http
+
+Usage:
+    from orchestrator.lib import tracing
+
+    tracing.setup_tracing()
+    with tracing.span("graph.nlu_node", intent="GREET") as s:
+        ...
+"""
+
+import os
+import logging
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger("tracing")
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "otlp").lower()
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", 0.05))
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ina-orchestrator")
+
+_tracer = None
+_provider = None
+
+
+def _build_exporter():
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter()
+    if TRACING_EXPORTER == "file":
+        out = open(TRACING_FILE, "a", buffering=1)
+        return ConsoleSpanExporter(
+            out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    return ConsoleSpanExporter()
+
+
+def setup_tracing() -> bool:
+    """Install the tracer provider once per process. Returns True if tracing is on."""
+    global _tracer, _provider
+    if _tracer is not None:
+        return True
+    if not TRACING_ENABLED:
+        return False
+    if not OTEL_AVAILABLE:
+        logger.warning("TRACING_ENABLED=true but opentelemetry-sdk is not installed")
+        return False
+
+    try:
+        exporter = _build_exporter()
+    except ImportError:
+        logger.warning("OTLP exporter not installed — tracing disabled")
+        return False
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("ina.orchestrator")
+    logger.info(
+        "Tracing enabled: exporter=%s sample_ratio=%s",
+        TRACING_EXPORTER,
+        TRACING_SAMPLE_RATIO,
+    )
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans (app shutdown)."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """
+    Start a span as a child of the current one. Yields the span (or None
+    when tracing is off). Exceptions are recorded and re-raised.
+
+    kind: "internal" | "client" | "server"
+    """
+    if _tracer is None:
+        yield None
+        return
+    span_kind = {"client": SpanKind.CLIENT, "server": SpanKind.SERVER}.get(
+        kind, SpanKind.INTERNAL
+    )
+    with _tracer.start_as_current_span(
+        name,
+        kind=span_kind,
+        attributes={k: v for k, v in attributes.items() if v is not None},
+    ) as current:
+        yield current
+
+
+def set_attributes(current, **attributes):
+    """Set attributes on a span yielded by span() (no-op for None)."""
+    if current is not None:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+
+
+async def inject_request_hook(request):
+    """httpx request hook: add W3C trace context headers to outgoing calls."""
+    if _tracer is not None:
+        propagate.inject(request.headers)
+
+
+async def trace_middleware(request, call_next):
+    """Server span per request, continuing the caller's trace if present."""
+    if _tracer is None:
+        return await call_next(request)
+
+    token = otel_context.attach(propagate.extract(request.headers))
+    try:
+        with _tracer.start_as_current_span(
+            f"{request.method} {request.url.path}",
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": request.method,
+                "url.path": request.url.path,
+                "ina.request_id": getattr(request.state, "request_id", None)
+                or request.headers.get("X-Request-ID", ""),
+            },
+        ) as current:
+            response = await call_next(request)
+            current.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                current.set_status(Status(StatusCode.ERROR))
+            return response
+    finally:
+        otel_context.detach(token)
@@ -6,10 +6,13 @@ It handles:
 1. Security: Validating tenant API session tokens against Redis.
 2. Rate Limiting: Applying connection limits to prevent abuse.
 3. Execution: Orchestrating the flow of conversation through the LangGraph workflow.
-4. Persistence: Handling final state sync to the central database.
+4. Persistence: Handling final state sync to the central database (via a
+   durable Redis Stream outbox, see lib/outcome_outbox.py).
 """
 
 import os
+import json
+import asyncio
 import logging
 import uuid
 from contextlib import asynccontextmanager
@@ -17,10 +20,20 @@ from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 import httpx
 
-from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Depends,
+    Request,
+    Response,
+    BackgroundTasks,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, ValidationError
+from starlette.requests import HTTPConnection
 
 try:
     from prometheus_fastapi_instrumentator import Instrumentator
@@ -29,10 +42,14 @@ try:
 except ImportError:
     PROMETHEUS_AVAILABLE = False
 
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-
-from orchestrator.lib import state_manager
+from orchestrator.lib import (
+    metrics,
+    state_manager,
+    session_cache,
+    rate_limiter,
+    outcome_outbox,
+    tracing,
+)
 from orchestrator.lib.http_pool import close_http_client
 from orchestrator.graph.workflow import build_workflow
 from orchestrator.session_schemas import SessionData
@@ -49,17 +66,18 @@ graph_app = build_workflow()
 
 
 # ---------------------- Rate Limiter ----------------------
-def _get_session_id_from_request(request: Request) -> str:
+def _rate_limit_key(request: HTTPConnection, user_id: str | None = None) -> str:
     """
-    Extract session_id from the request body for rate limiting.
-    Falls back to client IP if session_id can't be extracted.
-    This ensures rate limiting is per-session, not just per-IP.
+    Rate limit key: the session (user_id from the parsed body) if known.
+    Falls back to the real client IP — behind nginx request.client.host is
+    always the nginx container, so X-Real-IP is preferred.
     """
-    # For non-JSON requests or health checks, use IP
-    return request.client.host if request.client else "unknown"
-
-
-limiter = Limiter(key_func=_get_session_id_from_request)
+    if user_id:
+        return f"session:{user_id}"
+    real_ip = request.headers.get("X-Real-IP")
+    if real_ip:
+        return f"ip:{real_ip}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
 
 
 # ---------------------- Lifespan ----------------------
@@ -67,10 +85,23 @@ limiter = Limiter(key_func=_get_session_id_from_request)
 async def lifespan(app: FastAPI):
     """Manage application startup and shutdown."""
     logger.info("INA Orchestrator starting up...")
+    tracing.setup_tracing()
+    background = []
+    if session_cache.SESSION_CACHE_ENABLED:
+        background.append(
+            asyncio.create_task(session_cache.run_invalidation_listener())
+        )
+    if outcome_outbox.OUTBOX_FLUSHER_ENABLED:
+        background.append(asyncio.create_task(outcome_outbox.run_flusher()))
     yield
     logger.info("INA Orchestrator shutting down...")
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
     await close_http_client()
+    await outcome_outbox.close_client()
     await state_manager.close_redis()
+    tracing.shutdown_tracing()
 
 
 # ---------------------- App Init ----------------------
@@ -80,40 +111,20 @@ app = FastAPI(title="INA Orchestrator", lifespan=lifespan)
 if PROMETHEUS_AVAILABLE:
     Instrumentator().instrument(app).expose(app)
 
-# Attach limiter to app state (required by slowapi)
-app.state.limiter = limiter
-
-
-# ---------------------- Rate Limit Error Handler ----------------------
-@app.exception_handler(RateLimitExceeded)
-async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    """Return a clean JSON 429 response when rate limit is exceeded."""
-    logger.warning(
-        "Rate limit exceeded — client=%s path=%s",
-        request.client.host if request.client else "unknown",
-        request.url.path,
-    )
-    return JSONResponse(
-        status_code=429,
-        content={
-            "error": True,
-            "code": "RATE_LIMITED",
-            "message": "Too many requests. Please slow down.",
-            "retry_after": str(exc.detail),
-        },
-    )
-
-
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 
 @app.exception_handler(StarletteHTTPException)
 async def custom_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    headers = getattr(exc, "headers", None)  # e.g. Retry-After on 429
     if isinstance(exc.detail, dict) and "error" in exc.detail:
-        return JSONResponse(status_code=exc.status_code, content=exc.detail)
+        return JSONResponse(
+            status_code=exc.status_code, content=exc.detail, headers=headers
+        )
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": True, "code": "HTTP_ERROR", "message": str(exc.detail)},
+        headers=headers,
     )
 
 
@@ -134,6 +145,12 @@ app.add_middleware(
 )
 
 
+# ---------------------- Tracing Middleware ----------------------
+# Registered before the request-id middleware so it runs inside it
+# (request.state.request_id is already set when the server span starts).
+app.middleware("http")(tracing.trace_middleware)
+
+
 # ---------------------- Request ID Middleware ----------------------
 @app.middleware("http")
 async def request_id_middleware(request: Request, call_next):
@@ -164,54 +181,145 @@ class ChatOutput(BaseModel):
     is_locked: bool = False
 
 
+# =====================================================
+# 🚦 RATE LIMIT DEPENDENCY
+# =====================================================
+async def enforce_rate_limit(payload: ChatInput, request: Request, response: Response):
+    """
+    Distributed rate limit per session (Redis sliding window, shared by all
+    workers). Runs before validate_session so a rejected request never
+    touches the session lock.
+
+    Limit: RATE_LIMIT_DEFAULT, or the tenant's override from
+    RATE_LIMIT_TENANTS (tenant_id of the session).
+    """
+    key = _rate_limit_key(request, payload.user_id)
+    decision = await rate_limiter.hit(key, session_id=payload.user_id)
+    if not decision.allowed:
+        retry_after = rate_limiter.retry_after_header(decision)
+        logger.warning(
+            "Rate limit exceeded — key=%s path=%s retry_after=%ss",
+            key,
+            request.url.path,
+            retry_after,
+        )
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "error": True,
+                "code": "RATE_LIMITED",
+                "message": "Too many requests. Please slow down.",
+                "retry_after": retry_after,
+            },
+            headers={
+                "Retry-After": retry_after,
+                "X-RateLimit-Limit": str(decision.limit),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+    response.headers["X-RateLimit-Limit"] = str(decision.limit)
+    response.headers["X-RateLimit-Remaining"] = str(decision.remaining)
+
+
 # =====================================================
 # 🔐 AUTH DEPENDENCY — Session Validation
 # =====================================================
-async def validate_session(payload: ChatInput) -> SessionData:
+async def validate_session(payload: ChatInput, request: Request):
     """
     FastAPI dependency that validates the session from Redis.
 
     Auth logic:
-        1. Session ID se Redis mein session fetch karo.
+        1. Session ID se Redis mein session fetch karo — same round trip
+           mein per-session lock bhi acquire hota hai (lock_and_load).
         2. Agar session nahi mili → 401 Unauthorized (invalid/expired).
         3. Agar session structure corrupt hai → 401 Unauthorized (invalid data).
         4. Valid session return karo as a Pydantic SessionData object.
-    """
-    redis_key = payload.user_id
 
-    # 1. Fetch session from Redis
-    raw_session = await state_manager.get_session(redis_key)
+    The lock token is stored on request.state.session_lock_token. The chat
+    endpoint hands it back via save_and_unlock(); if the request ends
+    before that (error, rate limit), the lock is released here.
+    A session with status "locked" is returned without taking the lock.
 
-    if raw_session is None:
-        logger.warning("Auth failed: session not found — user_id=%s", payload.user_id)
-        raise HTTPException(
-            status_code=401,
-            detail={
-                "error": True,
-                "code": "SESSION_EXPIRED",
-                "message": "Unauthorized: Invalid or expired session ID.",
-            },
-        )
+    With the L1 session cache enabled, the cached version is sent along;
+    if Redis still holds that version the cached SessionData is reused
+    without transferring or re-validating the payload.
 
-    # 2. Validate session structure
-    try:
-        session = SessionData(**raw_session)
-    except ValidationError as e:
-        logger.warning(
-            "Auth failed: corrupt session data — user_id=%s errors=%s",
-            payload.user_id,
-            e.errors(),
+    SESSION_CONCURRENCY_MODE=optimistic: no lock is taken at all. The
+    session (cached or freshly read) carries its version and the chat
+    endpoint saves with a compare-and-set.
+    """
+    redis_key = payload.user_id
+    cached = session_cache.cache.get(redis_key)
+    optimistic = state_manager.SESSION_CONCURRENCY_MODE == "optimistic"
+
+    if optimistic:
+        # Optimistic mode: koi lock nahi — final write version check karta hai
+        request.state.session_lock_token = None
+        if cached is not None:
+            yield cached
+            return
+        raw_session, token = (
+            await state_manager.get_session(
+                redis_key, history_limit=state_manager.SESSION_HISTORY_WINDOW
+            ),
+            None,
         )
-        raise HTTPException(
-            status_code=401,
-            detail={
-                "error": True,
-                "code": "SESSION_CORRUPT",
-                "message": "Unauthorized: Session data is invalid or incomplete.",
-            },
+    else:
+        # 1. Fetch session + acquire lock from Redis (one round trip)
+        raw_session, token = await state_manager.lock_and_load(
+            redis_key, known_version=cached.version if cached else None
         )
+        request.state.session_lock_token = token
+
+    try:
+        if raw_session is state_manager.NOT_MODIFIED:
+            yield cached
+            return
+
+        if cached is not None:
+            session_cache.cache.invalidate(redis_key)
+
+        if raw_session is None:
+            logger.warning(
+                "Auth failed: session not found — user_id=%s", payload.user_id
+            )
+            raise HTTPException(
+                status_code=401,
+                detail={
+                    "error": True,
+                    "code": "SESSION_EXPIRED",
+                    "message": "Unauthorized: Invalid or expired session ID.",
+                },
+            )
 
-    return session
+        # 2. Validate session structure
+        try:
+            session = SessionData(**raw_session)
+        except ValidationError as e:
+            logger.warning(
+                "Auth failed: corrupt session data — user_id=%s errors=%s",
+                payload.user_id,
+                e.errors(),
+            )
+            raise HTTPException(
+                status_code=401,
+                detail={
+                    "error": True,
+                    "code": "SESSION_CORRUPT",
+                    "message": "Unauthorized: Session data is invalid or incomplete.",
+                },
+            )
+
+        if token or optimistic:
+            session_cache.cache.put(redis_key, session)
+        yield session
+
+    finally:
+        # Lock still ours → the turn never reached save_and_unlock
+        leftover = getattr(request.state, "session_lock_token", None)
+        if leftover:
+            request.state.session_lock_token = None
+            await state_manager.release_lock(redis_key, leftover)
 
 
 # ---------------------- Health (no rate limit) ----------------------
@@ -246,46 +354,46 @@ async def health_check():
     return {"status": "ok" if redis_ok else "degraded"}
 
 
-# ---------------------- DB Sync Task ----------------------
-async def send_negotiation_outcome_to_db(
+# ---------------------- DB Sync (Outbox) ----------------------
+def build_negotiation_outcome(
     session_id: str,
     outcome: str,
     asking_price: float,
     final_price: float,
     language: str,
     history: list,
-):
-    """Fire-and-forget task to send negotiation summary to external DB."""
+) -> dict:
+    """Negotiation summary payload for the external DB."""
+    user_turns = sum(1 for msg in history if msg.get("from") == "user")
+    discount_percent = 0.0
+    if asking_price > 0 and final_price:
+        discount_percent = round(((asking_price - final_price) / asking_price) * 100, 2)
+
+    return {
+        "session_id": session_id,
+        "outcome": outcome,
+        "asking_price": asking_price,
+        "final_price": final_price,
+        "discount_percent": discount_percent,
+        "total_turns": user_turns,
+        "user_language": language,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "ended_at": datetime.now(timezone.utc).isoformat(),
+        "message_history": history,
+    }
+
+
+async def send_negotiation_outcome_to_db(payload: dict):
+    """
+    Direct POST, used only when the outbox (Redis) is unavailable.
+    Fire-and-forget: failures are logged.
+    """
+    session_id = payload.get("session_id")
     try:
-        user_turns = sum(1 for msg in history if msg.get("from") == "user")
-        discount_percent = 0.0
-        if asking_price > 0 and final_price:
-            discount_percent = round(
-                ((asking_price - final_price) / asking_price) * 100, 2
-            )
-
-        payload = {
-            "session_id": session_id,
-            "outcome": outcome,
-            "asking_price": asking_price,
-            "final_price": final_price,
-            "discount_percent": discount_percent,
-            "total_turns": user_turns,
-            "user_language": language,
-            "started_at": datetime.now(timezone.utc).isoformat(),
-            "ended_at": datetime.now(timezone.utc).isoformat(),
-            "message_history": history,
-        }
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(
-                "https://ina-backend-fyp.onrender.com/api/negotiations/", json=payload
-            )
-            resp.raise_for_status()
-            logger.info(
-                "Successfully sent negotiation outcome to DB for session %s", session_id
-            )
-
+        await outcome_outbox.send_outcome(payload)
+        logger.info(
+            "Successfully sent negotiation outcome to DB for session %s", session_id
+        )
     except httpx.HTTPStatusError as e:
         logger.error(
             "DB Sync HTTP Error [%s]: %s - Response: %s", session_id, e, e.response.text
@@ -300,226 +408,776 @@ async def send_negotiation_outcome_to_db(
         )
 
 
+def _turn_bookkeeping(
+    session_id: str,
+    offer_count: int,
+    status: str,
+    last_bot_offer: float | None,
+    user_intent: str | None,
+    user_offer: float | None,
+    counter_price: float | None,
+    log: bool = True,
+) -> dict:
+    """
+    Session fields after this turn: offer_count, status, last_bot_offer.
+
+    Pure function of the session's previous values and the graph result, so
+    optimistic mode can re-apply it cheaply after a version conflict and the
+    streaming endpoint can preview it (log=False) before the turn commits.
+    """
+    new_offer_count = offer_count
+    new_status = status
+    new_last_bot_offer = last_bot_offer
+
+    # 📊 Increment offer_count on valid monetary offers
+    if user_intent == "MAKE_OFFER" and user_offer:
+        new_offer_count = offer_count + 1
+        if log:
+            logger.info(
+                "[Session %s] Offer #%s received (offer=%s)",
+                session_id,
+                new_offer_count,
+                user_offer,
+            )
+
+    # Update last_bot_offer from this turn's counter price
+    if counter_price:
+        new_last_bot_offer = float(counter_price)
+
+    # Lock session after 5th offer
+    if new_offer_count >= 5 and new_status == "negotiating":
+        new_status = "locked"
+        if log:
+            logger.info(
+                "[Session %s] 5-offer limit reached. Locking session. Final price: %s",
+                session_id,
+                new_last_bot_offer,
+            )
+
+    return {
+        "offer_count": new_offer_count,
+        "status": new_status,
+        "last_bot_offer": new_last_bot_offer,
+    }
+
+
+def _negotiation_view(brain_action: str | None, fields: dict) -> dict:
+    """Client-facing deal state derived from the brain action + session fields."""
+    status = fields["status"]
+    deal_accepted = brain_action in ("ACCEPT", "DEAL") or status == "locked"
+    return {
+        "deal_accepted": deal_accepted,
+        "negotiation_status": (
+            "locked"
+            if status == "locked"
+            else ("deal_accepted" if deal_accepted else "in_progress")
+        ),
+        "final_price": (
+            float(fields["last_bot_offer"] or 0.0) if deal_accepted else None
+        ),
+        "offer_count": fields["offer_count"],
+        "is_locked": status == "locked",
+    }
+
+
+def _locked_response(session_id: str, session: SessionData) -> ChatOutput:
+    """
+    🚫 OFFER LIMIT CHECK — session is locked.
+    After 5 valid offers, no further bargaining allowed.
+    Answered from the lock_and_load read; no lock was taken.
+    """
+    logger.info(
+        "Session %s is locked (offer_count=%s). Returning last bot offer.",
+        session_id,
+        session.offer_count,
+    )
+    return ChatOutput(
+        response=f"This negotiation session has been finalized. The locked price is {session.last_bot_offer}.",
+        is_fallback=False,
+        deal_accepted=True,
+        negotiation_status="locked",
+        final_price=session.last_bot_offer,
+        offer_count=session.offer_count,
+        is_locked=True,
+    )
+
+
+async def _run_turn(
+    request_id: str,
+    payload: ChatInput,
+    latest_session: SessionData,
+    background_tasks: BackgroundTasks,
+    lock_token: str | None,
+    events=None,
+    optimistic: bool | None = None,
+) -> tuple[ChatOutput, SessionData | None]:
+    """
+    One chat turn: LangGraph execution → bookkeeping → persist exactly once.
+
+    Shared by /ina/v1/chat, /ina/v1/chat/stream and the WebSocket channel.
+    The caller hands over ownership of lock_token (lock mode); it is
+    released here if the turn fails before save_and_unlock.
+
+    events: optional async sink(event, data) — streaming turns receive
+    "thinking", "metadata" and "token" events while the graph runs.
+    optimistic: force the compare-and-set save (True) regardless of
+    SESSION_CONCURRENCY_MODE (None = use the configured mode).
+
+    Returns the response and the session as just written (None if it
+    could not be derived locally — e.g. after a version conflict).
+    """
+    if optimistic is None:
+        optimistic = state_manager.SESSION_CONCURRENCY_MODE == "optimistic"
+    redis_key = payload.user_id
+    mam = latest_session.mam
+    asking_price = latest_session.asking_price
+    offer_count = latest_session.offer_count
+    current_status = latest_session.status
+    last_bot_offer = latest_session.last_bot_offer
+
+    try:
+        history = list(latest_session.messages)
+        history.append(
+            {
+                "from": "user",
+                "text": payload.message,
+            }
+        )
+
+        # --------------------------------------------
+        # Streaming: node events → client events
+        # --------------------------------------------
+        streamed = {"nlu": {}, "tokens": 0}
+
+        async def node_events(event: str, data: dict):
+            if event == "thinking":
+                streamed["nlu"] = data
+                await events(
+                    "thinking",
+                    {"intent": data.get("intent"), "language": data.get("language")},
+                )
+            elif event == "decision":
+                # Preview of the bookkeeping applied at commit
+                preview = _turn_bookkeeping(
+                    redis_key,
+                    offer_count,
+                    current_status,
+                    last_bot_offer,
+                    streamed["nlu"].get("intent"),
+                    streamed["nlu"].get("user_offer"),
+                    data.get("counter_price"),
+                    log=False,
+                )
+                await events(
+                    "metadata",
+                    {
+                        "action": data.get("action"),
+                        **_negotiation_view(data.get("action"), preview),
+                    },
+                )
+            elif event == "token":
+                streamed["tokens"] += 1
+                await events("token", data)
+
+        # --------------------------------------------
+        # LangGraph Execution
+        # --------------------------------------------
+        result = None
+        try:
+            state = {
+                "session_id": redis_key,
+                "mam": mam,
+                "asking_price": asking_price,
+                "user_input": payload.message,
+                "history": history,
+                "request_id": request_id,
+            }
+            if events is not None:
+                state["_events"] = node_events
+
+            result = await graph_app.ainvoke(state)
+
+            ai_response = result.get(
+                "final_response",
+                "Let me think about that for a moment.",
+            )
+            brain_action = result.get("brain_action")
+            brain_key = result.get("response_key")
+            is_fallback = result.get("is_fallback", False)
+
+        except Exception:
+            logger.exception("Graph failed, using safe fallback")
+            ai_response = (
+                "Let me think about that for a moment. Could you please try again?"
+            )
+            brain_action = "FALLBACK"
+            brain_key = "GRAPH_FAIL"
+            is_fallback = True
+
+        # Nothing was streamed (INVALID input, graph failure) → send the reply in one piece
+        if events is not None and not streamed["tokens"]:
+            await events("token", {"text": ai_response})
+
+        # --------------------------------------------
+        # Save updated history back to Redis
+        # --------------------------------------------
+
+        # Retroactively add user_offer to the last user message now that NLU has parsed it
+        user_offer = result.get("user_offer") if result else None
+        user_intent = result.get("intent") if result else None
+        # Update the last element (which is the user message we just appended)
+        if history and history[-1].get("from") == "user":
+            history[-1]["user_offer"] = user_offer
+
+        # ------------------------------------------------
+        # 📊 Bookkeeping: offer_count / 5-offer lock / last_bot_offer
+        # ------------------------------------------------
+        counter_price = result.get("counter_price") if result else None
+        updated_fields = _turn_bookkeeping(
+            redis_key,
+            offer_count,
+            current_status,
+            last_bot_offer,
+            user_intent,
+            user_offer,
+            counter_price,
+        )
+
+        history.append(
+            {
+                "from": "ina",
+                "text": ai_response,
+                "brain_action": brain_action,
+                "brain_key": brain_key,
+                "bot_offer": counter_price,
+            }
+        )
+
+        # Only this turn's user + bot messages are appended — the stored
+        # history is never rewritten.
+        rebased = False
+        if optimistic:
+
+            def _rebase(current: dict) -> dict:
+                # Conflict: doosri request ne session update kar diya —
+                # sirf bookkeeping dobara apply karo, graph dobara nahi chalta
+                nonlocal rebased
+                rebased = True
+                return _turn_bookkeeping(
+                    redis_key,
+                    current.get("offer_count", 0),
+                    current.get("status", "negotiating"),
+                    current.get("last_bot_offer"),
+                    user_intent,
+                    user_offer,
+                    counter_price,
+                )
+
+            try:
+                new_version, updated_fields = await state_manager.save_turn_optimistic(
+                    redis_key,
+                    latest_session.version,
+                    fields=updated_fields,
+                    new_turns=history[-2:],
+                    rebase=_rebase,
+                )
+            except state_manager.SessionFinalized as e:
+                # A concurrent turn locked the session (our copy, possibly
+                # the L1 cache, was stale): drop this turn — no append, no
+                # second outcome — and answer like any locked session
+                session_cache.cache.invalidate(redis_key)
+                locked = latest_session.model_copy(
+                    update={
+                        name: e.meta[name]
+                        for name in ("offer_count", "status", "last_bot_offer", "version")
+                        if name in e.meta
+                    }
+                )
+                return _locked_response(redis_key, locked), None
+        else:
+            token, lock_token = lock_token, None
+            new_version = await state_manager.save_and_unlock(
+                redis_key, token, fields=updated_fields, new_turns=history[-2:]
+            )
+
+    finally:
+        # Lock still ours → the turn never reached save_and_unlock
+        if lock_token:
+            await state_manager.release_lock(redis_key, lock_token)
+
+    new_status = updated_fields["status"]
+    new_last_bot_offer = updated_fields["last_bot_offer"]
+
+    # Keep this worker's L1 copy in step with what was just written
+    saved_session = None
+    if rebased:
+        # Our copy of the history missed the concurrent turn
+        session_cache.cache.invalidate(redis_key)
+    elif new_version is not None:
+        window = state_manager.SESSION_HISTORY_WINDOW
+        saved_session = latest_session.model_copy(
+            update={
+                **updated_fields,
+                "messages": history[-window:] if window > 0 else history,
+                "version": new_version,
+            }
+        )
+        session_cache.cache.put(redis_key, saved_session)
+
+    # Record DB sync if deal was naturally closed OR session just got locked
+    if brain_action in ("ACCEPT", "DEAL") or new_status == "locked":
+        db_final_price = new_last_bot_offer or user_offer or 0.0
+        language = result.get("language", "english") if result else "english"
+        db_outcome = "ACCEPTED" if brain_action in ("ACCEPT", "DEAL") else "FORCED_DEAL"
+        outcome_payload = build_negotiation_outcome(
+            session_id=redis_key,
+            outcome=db_outcome,
+            asking_price=asking_price,
+            final_price=float(db_final_price),
+            language=language,
+            history=history,
+        )
+        # Durable outbox — the flusher delivers it (with retries).
+        # Redis down → old fire-and-forget path as a last resort.
+        if not await outcome_outbox.enqueue(outcome_payload):
+            background_tasks.add_task(send_negotiation_outcome_to_db, outcome_payload)
+
+    output = ChatOutput(
+        response=ai_response,
+        is_fallback=is_fallback,
+        **_negotiation_view(brain_action, updated_fields),
+    )
+    return output, saved_session
+
+
+def _error_detail(exc: Exception, user_id: str) -> tuple[int, dict]:
+    """Map a failed turn to (status_code, error body) — same codes for both endpoints."""
+    if isinstance(exc, HTTPException) and isinstance(exc.detail, dict):
+        return exc.status_code, exc.detail
+    if isinstance(exc, TimeoutError):
+        logger.warning("Session lock timeout for user_id=%s", user_id)
+        return 409, {
+            "error": True,
+            "code": "SESSION_LOCKED",
+            "message": "Another request is already processing this session. Please retry.",
+        }
+    logger.error("Unexpected error for session %s: %s", user_id, exc, exc_info=exc)
+    return 500, {
+        "error": True,
+        "code": "INTERNAL_ERROR",
+        "message": "Internal server error",
+    }
+
+
 # =====================================================
 # 🔥 MAIN CHAT ENDPOINT (Session-Authenticated + Rate-Limited)
 # =====================================================
 @app.post("/ina/v1/chat", response_model=ChatOutput)
-@limiter.limit("10/minute")
 async def chat_endpoint(
     request: Request,
     payload: ChatInput,
     background_tasks: BackgroundTasks,
+    _rate_limited: None = Depends(enforce_rate_limit),
     _validated_session: SessionData = Depends(validate_session),
 ):
     """
     Main chat endpoint.
     - Auth: handled by validate_session dependency
-    - Rate limit: 10 requests per minute per client IP (application layer)
+    - Rate limit: 10 requests per minute per session by default, per-tenant
+      overrides (application layer, Redis — shared by all workers)
     - Nginx also enforces 10 req/s per IP (gateway layer)
     """
 
+    # ------------------------------------------------
+    # 🔒 Session + distributed lock were taken together by validate_session
+    # (lock_and_load) — no re-read needed, we already hold the latest state.
+    # ------------------------------------------------
+    if _validated_session.status == "locked":
+        return _locked_response(payload.user_id, _validated_session)
+
+    # The turn owns the lock from here on
+    lock_token = request.state.session_lock_token
+    request.state.session_lock_token = None
+
     try:
-        redis_key = payload.user_id
+        output, _ = await _run_turn(
+            request.state.request_id,
+            payload,
+            _validated_session,
+            background_tasks,
+            lock_token,
+        )
+        return output
 
-        # ------------------------------------------------
-        # ------------------------------------------------
-        # 🔒 Acquire distributed lock (Race Condition Fix)
-        # Ensures only one request processes a session at a time.
-        # ------------------------------------------------
-        async with state_manager.session_lock(redis_key):
-            # Re-read inside lock so we always work on the latest state.
-            latest_raw = await state_manager.get_session(redis_key)
-            if latest_raw is None:
-                raise HTTPException(
-                    status_code=401,
-                    detail={
-                        "error": True,
-                        "code": "SESSION_EXPIRED",
-                        "message": "Unauthorized: Invalid or expired session ID.",
-                    },
-                )
+    except HTTPException:
+        raise
 
-            latest_session = SessionData(**latest_raw)
-            mam = latest_session.mam
-            asking_price = latest_session.asking_price
-            offer_count = latest_session.offer_count
-            current_status = latest_session.status
-            last_bot_offer = latest_session.last_bot_offer
-
-            # ------------------------------------------------
-            # 🚫 OFFER LIMIT CHECK — Reject if session is locked
-            # After 5 valid offers, no further bargaining allowed.
-            # ------------------------------------------------
-            if current_status == "locked":
-                logger.info(
-                    "Session %s is locked (offer_count=%s). Returning last bot offer.",
-                    redis_key,
-                    offer_count,
-                )
-                return ChatOutput(
-                    response=f"This negotiation session has been finalized. The locked price is {last_bot_offer}.",
-                    is_fallback=False,
-                    deal_accepted=True,
-                    negotiation_status="locked",
-                    final_price=last_bot_offer,
-                    offer_count=offer_count,
-                    is_locked=True,
-                )
+    except Exception as e:
+        status_code, detail = _error_detail(e, payload.user_id)
+        raise HTTPException(status_code=status_code, detail=detail)
 
-            history = list(latest_session.messages)
-            history.append(
-                {
-                    "from": "user",
-                    "text": payload.message,
-                }
+
+# =====================================================
+# 🌊 STREAMING CHAT ENDPOINT (Server-Sent Events)
+# =====================================================
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx: don't buffer the event stream
+}
+
+# Streaming turns run as tasks; keep references until they finish
+_stream_turns: set = set()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/ina/v1/chat/stream")
+async def chat_stream_endpoint(
+    request: Request,
+    payload: ChatInput,
+    background_tasks: BackgroundTasks,
+    _rate_limited: None = Depends(enforce_rate_limit),
+    _validated_session: SessionData = Depends(validate_session),
+):
+    """
+    Streaming variant of /ina/v1/chat (same auth, rate limit and session
+    semantics). Responds with Server-Sent Events:
+
+        thinking  {"intent", "language"}                 — right after NLU
+        metadata  {"action", "negotiation_status", "final_price", ...}
+                                                         — once the brain decides
+        token     {"text"}                               — phraser chunks
+        done      ChatOutput                             — after the turn is saved
+        error     {"error", "code", "message"}           — turn failed
+
+    The turn runs as a task that persists the session exactly once after the
+    graph completes — even if the client disconnects mid-stream.
+    """
+    if _validated_session.status == "locked":
+        locked = _locked_response(payload.user_id, _validated_session)
+
+        async def locked_stream():
+            yield _sse("done", locked.model_dump())
+
+        return StreamingResponse(
+            locked_stream(), media_type="text/event-stream", headers=_SSE_HEADERS
+        )
+
+    # The turn task owns the lock from here on
+    lock_token = request.state.session_lock_token
+    request.state.session_lock_token = None
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def emit(event: str, data: dict):
+        await queue.put((event, data))
+
+    async def turn():
+        try:
+            output, _ = await _run_turn(
+                request.state.request_id,
+                payload,
+                _validated_session,
+                background_tasks,
+                lock_token,
+                events=emit,
             )
+            await emit("done", output.model_dump())
+        except Exception as e:
+            _, detail = _error_detail(e, payload.user_id)
+            await emit("error", detail)
+
+    task = asyncio.create_task(turn())
+    _stream_turns.add(task)
+    task.add_done_callback(_stream_turns.discard)
+
+    async def event_stream():
+        while True:
+            event, data = await queue.get()
+            yield _sse(event, data)
+            if event in ("done", "error"):
+                break
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=_SSE_HEADERS
+    )
 
-            # --------------------------------------------
-            # LangGraph Execution
-            # --------------------------------------------
-            result = None
-            try:
-                state = {
-                    "session_id": redis_key,
-                    "mam": mam,
-                    "asking_price": asking_price,
-                    "user_input": payload.message,
-                    "history": history,
-                    "request_id": getattr(request.state, "request_id", ""),
-                }
 
-                result = await graph_app.ainvoke(state)
+# =====================================================
+# 🔌 WEBSOCKET CHAT CHANNEL
+# =====================================================
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", 1000))  # per worker
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", 300))
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", 25))
 
-                ai_response = result.get(
-                    "final_response",
-                    "Let me think about that for a moment.",
-                )
-                brain_action = result.get("brain_action")
-                brain_key = result.get("response_key")
-                is_fallback = result.get("is_fallback", False)
-
-            except Exception:
-                logger.exception("Graph failed, using safe fallback")
-                ai_response = (
-                    "Let me think about that for a moment. Could you please try again?"
-                )
-                brain_action = "FALLBACK"
-                brain_key = "GRAPH_FAIL"
-                is_fallback = True
-
-            # --------------------------------------------
-            # Save updated history back to Redis
-            # --------------------------------------------
-
-            # Retroactively add user_offer to the last user message now that NLU has parsed it
-            user_offer = result.get("user_offer") if result else None
-            user_intent = result.get("intent") if result else None
-            # Update the last element (which is the user message we just appended)
-            if history and history[-1].get("from") == "user":
-                history[-1]["user_offer"] = user_offer
-
-            # ------------------------------------------------
-            # 📊 Increment offer_count on valid monetary offers
-            # ------------------------------------------------
-            new_offer_count = offer_count
-            new_status = current_status
-            new_last_bot_offer = last_bot_offer
-
-            if user_intent == "MAKE_OFFER" and user_offer:
-                new_offer_count = offer_count + 1
-                logger.info(
-                    "[Session %s] Offer #%s received (offer=%s)",
-                    redis_key,
-                    new_offer_count,
-                    user_offer,
-                )
+_ws_active = 0
+_ws_background: set = set()  # turn background tasks still running
 
-            # Update last_bot_offer from this turn's counter price
-            counter_price = result.get("counter_price") if result else None
-            if counter_price:
-                new_last_bot_offer = float(counter_price)
 
-            # Lock session after 5th offer
-            if new_offer_count >= 5 and new_status == "negotiating":
-                new_status = "locked"
-                logger.info(
-                    "[Session %s] 5-offer limit reached. Locking session. Final price: %s",
-                    redis_key,
-                    new_last_bot_offer,
-                )
+def _run_after_response(tasks: BackgroundTasks):
+    """
+    Run a WebSocket turn's background tasks (e.g. the direct DB sync
+    fallback) off the socket loop, so the next frame is not held up.
+    """
+    task = asyncio.create_task(tasks())
+    _ws_background.add(task)
+    task.add_done_callback(_ws_background.discard)
+
+
+async def _ws_lock_turn(
+    user_id: str, session: SessionData
+) -> tuple[SessionData | None, str | None]:
+    """
+    SESSION_CONCURRENCY_MODE=lock: take the session lock for one WebSocket
+    turn, exactly like an HTTP turn (lock_and_load). The connection's copy
+    is reused when its version is still current.
 
-            history.append(
+    → (current session, lock token); token None when the session is
+    "locked" (no lock taken); (None, None) when it is gone or corrupt.
+    """
+    raw, token = await state_manager.lock_and_load(user_id, known_version=session.version)
+    if raw is state_manager.NOT_MODIFIED:
+        return session, token
+    try:
+        current = SessionData(**raw) if raw else None
+    except ValidationError:
+        current = None
+    if current is None:
+        if token:
+            await state_manager.release_lock(user_id, token)
+        return None, None
+    if token:
+        session_cache.cache.put(user_id, current)
+    return current, token
+
+
+@app.websocket("/ina/v1/ws/{user_id}")
+async def chat_websocket(websocket: WebSocket, user_id: str):
+    """
+    Persistent chat channel for one session.
+
+    The session is authenticated once on connect and the validated
+    SessionData stays on the connection. Messages are processed strictly
+    one after another per socket. Each turn follows
+    SESSION_CONCURRENCY_MODE like HTTP turns do: "lock" takes the session
+    lock per turn (lock_and_load / save_and_unlock; an unchanged session
+    is not re-transferred), "optimistic" saves with the versioned
+    compare-and-set. Either way a concurrent HTTP turn on the same session
+    is never lost. Per-session rate limits still apply per message.
+
+    Client → server:
+        {"type": "message", "message": "...", "request_id": "..."?}
+        {"type": "ping"} | {"type": "pong"}
+    Server → client:
+        {"type": "ready", "offer_count", "status"}       after auth
+        {"type": "response", "request_id", ...ChatOutput}
+        {"type": "error", "code", "message", ...}
+        {"type": "ping"} every WS_HEARTBEAT_INTERVAL s of silence
+
+    Closed after WS_IDLE_TIMEOUT s without any client frame (1000), when the
+    session is missing/expired (4401) or when this worker already holds
+    WS_MAX_CONNECTIONS sockets (1013, try again later).
+    """
+    global _ws_active
+    # Reserve the slot before the first await: a burst of connects must not
+    # all pass the check while their session reads are pending
+    reserved = _ws_active < WS_MAX_CONNECTIONS
+    if reserved:
+        _ws_active += 1
+    connected = False
+    loop = asyncio.get_event_loop()
+    close_reason = "client"
+
+    try:
+        await websocket.accept()
+
+        if not reserved:
+            metrics.WS_CONNECTIONS.labels(outcome="rejected_cap").inc()
+            await websocket.send_json(
+                {
+                    "type": "error",
+                    "error": True,
+                    "code": "TOO_MANY_CONNECTIONS",
+                    "message": "Server is at capacity. Please retry shortly.",
+                }
+            )
+            await websocket.close(code=1013)
+            return
+
+        # Auth once per connection
+        session = await session_cache.get_session(user_id)
+        if session is None:
+            logger.warning("WS auth failed: session not found — user_id=%s", user_id)
+            metrics.WS_CONNECTIONS.labels(outcome="auth_failed").inc()
+            await websocket.send_json(
                 {
-                    "from": "ina",
-                    "text": ai_response,
-                    "brain_action": brain_action,
-                    "brain_key": brain_key,
-                    "bot_offer": counter_price,
+                    "type": "error",
+                    "error": True,
+                    "code": "SESSION_EXPIRED",
+                    "message": "Unauthorized: Invalid or expired session ID.",
                 }
             )
+            await websocket.close(code=4401)
+            return
+
+        connected = True
+        metrics.WS_CONNECTIONS.labels(outcome="accepted").inc()
+        metrics.WS_ACTIVE_CONNECTIONS.inc()
+        last_seen = loop.time()
+
+        await websocket.send_json(
+            {
+                "type": "ready",
+                "offer_count": session.offer_count,
+                "status": session.status,
+            }
+        )
 
-            updated_session = latest_session.model_dump()
-            updated_session["messages"] = history
-            updated_session["offer_count"] = new_offer_count
-            updated_session["status"] = new_status
-            updated_session["last_bot_offer"] = new_last_bot_offer
-            await state_manager.set_session(redis_key, updated_session)
-
-            # Fire off DB save if deal was naturally closed OR session just got locked
-            if brain_action in ("ACCEPT", "DEAL") or new_status == "locked":
-                db_final_price = new_last_bot_offer or user_offer or 0.0
-                language = result.get("language", "english") if result else "english"
-                db_outcome = (
-                    "ACCEPTED" if brain_action in ("ACCEPT", "DEAL") else "FORCED_DEAL"
+        while True:
+            # ---------- Heartbeat / idle timeout ----------
+            try:
+                raw = await asyncio.wait_for(
+                    websocket.receive_text(), timeout=WS_HEARTBEAT_INTERVAL
                 )
-                background_tasks.add_task(
-                    send_negotiation_outcome_to_db,
-                    session_id=redis_key,
-                    outcome=db_outcome,
-                    asking_price=asking_price,
-                    final_price=float(db_final_price),
-                    language=language,
-                    history=history,
+            except asyncio.TimeoutError:
+                if loop.time() - last_seen >= WS_IDLE_TIMEOUT:
+                    close_reason = "idle"
+                    await websocket.close(code=1000, reason="idle timeout")
+                    break
+                await websocket.send_json({"type": "ping"})
+                continue
+
+            last_seen = loop.time()
+            try:
+                frame = json.loads(raw)
+            except ValueError:
+                frame = None
+            kind = frame.get("type", "message") if isinstance(frame, dict) else None
+
+            if kind == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            if kind == "pong":
+                continue
+
+            message = frame.get("message") if kind == "message" else None
+            if not isinstance(message, str) or not message.strip():
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "error": True,
+                        "code": "BAD_MESSAGE",
+                        "message": 'Expected {"type": "message", "message": "<text>"}.',
+                    }
                 )
+                continue
 
-        deal_accepted = brain_action in ("ACCEPT", "DEAL") or new_status == "locked"
-        negotiation_status = (
-            "locked"
-            if new_status == "locked"
-            else ("deal_accepted" if deal_accepted else "in_progress")
-        )
-        out_final_price = float(new_last_bot_offer or 0.0) if deal_accepted else None
-        return ChatOutput(
-            response=ai_response,
-            is_fallback=is_fallback,
-            deal_accepted=deal_accepted,
-            negotiation_status=negotiation_status,
-            final_price=out_final_price,
-            offer_count=new_offer_count,
-            is_locked=(new_status == "locked"),
-        )
+            # ---------- One chat turn ----------
+            started = loop.time()
+            request_id = str(frame.get("request_id") or uuid.uuid4())
 
-    except HTTPException:
-        raise
+            decision = await rate_limiter.hit(
+                _rate_limit_key(websocket, user_id), session_id=user_id
+            )
+            if not decision.allowed:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "request_id": request_id,
+                        "error": True,
+                        "code": "RATE_LIMITED",
+                        "message": "Too many requests. Please slow down.",
+                        "retry_after": rate_limiter.retry_after_header(decision),
+                    }
+                )
+                continue
+
+            tasks = None
+            optimistic = state_manager.SESSION_CONCURRENCY_MODE == "optimistic"
+            lock_token = None
+            if not optimistic and session.status != "locked":
+                try:
+                    session, lock_token = await _ws_lock_turn(user_id, session)
+                except Exception as e:
+                    _, detail = _error_detail(e, user_id)
+                    await websocket.send_json(
+                        {"type": "error", "request_id": request_id, **detail}
+                    )
+                    continue
+                if session is None:
+                    await websocket.send_json(
+                        {
+                            "type": "error",
+                            "error": True,
+                            "code": "SESSION_EXPIRED",
+                            "message": "Session expired.",
+                        }
+                    )
+                    close_reason = "expired"
+                    await websocket.close(code=4401)
+                    break
+
+            if session.status == "locked":
+                output = _locked_response(user_id, session)
+            else:
+                tasks = BackgroundTasks()
+                try:
+                    # The turn owns lock_token (lock mode) from here on
+                    output, saved = await _run_turn(
+                        request_id,
+                        ChatInput(user_id=user_id, message=message),
+                        session,
+                        tasks,
+                        lock_token,
+                        optimistic=optimistic,
+                    )
+                except Exception as e:
+                    output, saved = None, None
+                    _, detail = _error_detail(e, user_id)
+                    await websocket.send_json(
+                        {"type": "error", "request_id": request_id, **detail}
+                    )
+
+                # Connection state: the copy we just wrote, or re-read after a
+                # conflict / failed save
+                session = saved or await session_cache.get_session(user_id, fresh=True)
+                if session is None:
+                    if output is not None:
+                        await websocket.send_json(
+                            {"type": "response", "request_id": request_id, **output.model_dump()}
+                        )
+                        _run_after_response(tasks)
+                    await websocket.send_json(
+                        {
+                            "type": "error",
+                            "error": True,
+                            "code": "SESSION_EXPIRED",
+                            "message": "Session expired.",
+                        }
+                    )
+                    close_reason = "expired"
+                    await websocket.close(code=4401)
+                    break
+
+            if output is not None:
+                await websocket.send_json(
+                    {"type": "response", "request_id": request_id, **output.model_dump()}
+                )
+                if tasks is not None:
+                    _run_after_response(tasks)
+            metrics.WS_MESSAGE_SECONDS.observe(loop.time() - started)
 
-    except TimeoutError:
-        logger.warning("Session lock timeout for user_id=%s", payload.user_id)
-        raise HTTPException(
-            status_code=409,
-            detail={
-                "error": True,
-                "code": "SESSION_LOCKED",
-                "message": "Another request is already processing this session. Please retry.",
-            },
-        )
+    except WebSocketDisconnect:
+        pass
 
     except Exception as e:
-        logger.exception("Unexpected error for session %s: %s", payload.user_id, e)
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": True,
-                "code": "INTERNAL_ERROR",
-                "message": "Internal server error",
-            },
-        )
+        close_reason = "error"
+        logger.exception("WebSocket error for session %s: %s", user_id, e)
+
+    finally:
+        if reserved:
+            _ws_active -= 1
+        if connected:
+            metrics.WS_ACTIVE_CONNECTIONS.dec()
+            metrics.WS_DISCONNECTS.labels(reason=close_reason).inc()
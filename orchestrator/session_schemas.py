@@ -18,6 +18,9 @@ Expected Redis session format (JSON):
     "product_id": "prod_xyz",        # optional
     "created_at": "2026-04-08T..."   # optional
 }
+
+On first read the orchestrator migrates this blob into a hash of scalar
+fields plus an append-only history list (see lib/state_manager.py).
 """
 
 from pydantic import BaseModel, Field
@@ -61,6 +64,12 @@ class SessionData(BaseModel):
         description="The last counter-offer made by the bot. Returned as final price after lock.",
     )
 
+    # --- Storage Version (managed by Redis, see lib/state_manager.py) ---
+    version: int = Field(
+        default=0,
+        description="Incremented on every write; tags cached copies of the session.",
+    )
+
     # --- Optional Metadata (useful for logging/analytics) ---
     tenant_id: Optional[str] = Field(
         default=None,